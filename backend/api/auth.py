@@ -32,3 +32,6 @@ def verify_credentials(credentials: Optional[HTTPBasicCredentials] = Security(se
             headers={"WWW-Authenticate": "Basic"},
         )
     return True
+
+def request_user(credentials: Optional[HTTPBasicCredentials] = Security(security)) -> Optional[str]:
+    return credentials.username if credentials is not None else None
@@ -0,0 +1,20 @@
+import time
+
+from backend.api.schemas import QueryResponse
+from backend.services.serialization import dumps, to_columnar
+
+def encode_response(result: dict, columnar: bool) -> tuple[bytes, float]:
+    start = time.perf_counter()
+    rows = result.pop("rows")
+    columns = result["columns"]
+    if columnar:
+        result["data"] = to_columnar(rows, columns)
+    else:
+        results = [dict(zip(columns, row)) for row in rows]
+    elapsed = time.perf_counter() - start
+    if result.get("timings") is not None:
+        result["timings"]["serialize"] = round(elapsed * 1000, 1)
+
+    if columnar:
+        return dumps(result), elapsed
+    return QueryResponse(results=results, **result).model_dump_json().encode(), elapsed
@@ -1,18 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from dataclasses import asdict
+from typing import Literal, Optional
+import asyncio
+import json
 import logging
+import time
 
-from backend.api.schemas import QueryRequest, QueryResponse, HealthResponse
-from backend.api.auth import verify_credentials
+from backend.api.schemas import (
+    QueryRequest, BatchQueryRequest, QueryResponse, ColumnarQueryResponse, HealthResponse,
+    CatalogStatusResponse, CacheInvalidateRequest, CacheInvalidateResponse, MetricsResponse,
+    StatsResponse, JobRequest, JobStatus
+)
+from backend.api.auth import verify_credentials, request_user
+from backend.api.encoding import encode_response
 from backend.services.query_service import process_query
-from backend.db.connection import check_db_health
-from backend.core.exceptions import ValidationError, ExecutionError, LLMError
+from backend.services.llm_client import llm_client
+from backend.services.result_cache import result_cache
+from backend.services.planner import plan_cache
+from backend.services.repair import repair_rates
+from backend.services.streaming import open_query_stream
+from backend.services.warmup import warmup_state
+from backend.services.offload import offload
+from backend.services.jobs import Job, job_queue
+from backend.services.cancellation import statement_timeout, timeout_for
+from backend.services.serialization import COLUMNAR_MEDIA_TYPE, dumps
+from backend.core.config import get_settings
+from backend.core.metrics import (
+    current_timings, increment, observe_stage, render_prometheus, snapshot
+)
+from backend.db.connection import check_db_health, pool_snapshot
+from backend.db.catalog import SchemaCatalog, get_catalog, refresh_catalog, invalidate_catalog
+from backend.db.audit import audit_writer, collected_records
+from backend.db.audit_store import query_stats
+from backend.core.exceptions import (
+    ValidationError, ExecutionError, PlanRejectedError, QueryTimeoutError, LLMError,
+    LLMSaturatedError
+)
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    db_healthy = check_db_health()
+    db_healthy = await check_db_health()
     return HealthResponse(
         status="healthy" if db_healthy else "degraded",
         database=db_healthy
@@ -20,28 +52,384 @@ async def health_check():
 
 @router.get("/ready", response_model=HealthResponse)
 async def readiness_check():
-    db_healthy = check_db_health()
+    db_healthy = await check_db_health()
     if not db_healthy:
         raise HTTPException(status_code=503, detail="Database not ready")
+    if not warmup_state.ready:
+        detail = f"Warming up: {warmup_state.error or 'in progress'}"
+        raise HTTPException(status_code=503, detail=detail)
     return HealthResponse(status="ready", database=True)
 
-@router.post("/query", response_model=QueryResponse)
+def http_error(e: Exception) -> HTTPException:
+    if isinstance(e, ValidationError):
+        logger.warning(f"Validation error: {e}")
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, PlanRejectedError):
+        logger.warning(f"Plan rejected: {e}")
+        return HTTPException(status_code=422, detail=str(e))
+    if isinstance(e, QueryTimeoutError):
+        logger.warning(f"Query timed out: {e}")
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, ExecutionError):
+        logger.error(f"Execution error: {e}")
+        return HTTPException(status_code=500, detail=f"Query execution failed: {str(e)}")
+    if isinstance(e, LLMSaturatedError):
+        logger.warning(f"LLM saturated: {e}")
+        return HTTPException(
+            status_code=503,
+            detail=f"LLM service busy: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if isinstance(e, LLMError):
+        logger.error(f"LLM error: {e}")
+        return HTTPException(status_code=503, detail=f"LLM service error: {str(e)}")
+    logger.error(f"Unexpected error: {e}")
+    return HTTPException(status_code=500, detail="Internal server error")
+
+async def run_until_disconnected(http_request: Request, coro):
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected, cancelling query")
+                task.cancel()
+                await asyncio.wait({task})
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
+def wants_columnar(request: QueryRequest, http_request: Request) -> bool:
+    accept = http_request.headers.get("accept", "")
+    return request.format == "columnar" or COLUMNAR_MEDIA_TYPE in accept
+
+async def encode_result(result: dict, columnar: bool) -> bytes:
+    if len(result["rows"]) >= settings.offload_min_rows:
+        body, elapsed = await offload.run_in_thread(encode_response, result, columnar)
+    else:
+        body, elapsed = encode_response(result, columnar)
+    observe_stage("serialize", elapsed)
+    return body
+
+COLUMNAR_RESPONSE_SCHEMA = ColumnarQueryResponse.model_json_schema()
+
+@router.post(
+    "/query",
+    response_model=QueryResponse,
+    responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {"schema": COLUMNAR_RESPONSE_SCHEMA}}}}
+)
 async def execute_query(
     request: QueryRequest,
+    http_request: Request,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    statement_timeout.set(timeout_for("/query", user))
+    try:
+        result = await run_until_disconnected(http_request, process_query(request.question))
+    except Exception as e:
+        raise http_error(e)
+    if result is None:
+        return Response(status_code=499)
+    
+    if wants_columnar(request, http_request):
+        return Response(await encode_result(result, columnar=True), media_type=COLUMNAR_MEDIA_TYPE)
+    return Response(await encode_result(result, columnar=False), media_type="application/json")
+
+@router.post("/query/sse")
+async def query_events(
+    request: QueryRequest,
+    http_request: Request,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    statement_timeout.set(timeout_for("/query/sse", user))
+    partials: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(process_query(request.question, on_partial=partials.put_nowait))
+    task.add_done_callback(lambda _: partials.put_nowait(None))
+    columnar = wants_columnar(request, http_request)
+    
+    async def events():
+        try:
+            last = None
+            while (partial := await partials.get()) is not None:
+                if partial and partial != last:
+                    last = partial
+                    yield f"event: sql\ndata: {json.dumps({'partial': partial})}\n\n"
+            
+            try:
+                result = task.result()
+            except Exception as e:
+                error = http_error(e)
+                payload = {"status": error.status_code, "detail": error.detail}
+                yield f"event: error\ndata: {json.dumps(payload)}\n\n"
+                return
+            yield f"event: result\ndata: {(await encode_result(result, columnar)).decode()}\n\n"
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+async def batch_item(
+    index: int, question: str, catalog: SchemaCatalog, columnar: bool
+) -> tuple[bool, bytes]:
+    start = time.perf_counter()
+    try:
+        result = await process_query(question, catalog=catalog)
+    except Exception as e:
+        error = http_error(e)
+        timings = current_timings.get()
+        return False, dumps({
+            "index": index,
+            "status": error.status_code,
+            "error": error.detail,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "timings": timings.breakdown() if timings else None
+        }) + b"\n"
+    body = await encode_result(result, columnar)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    # The encoded response is spliced in as-is rather than parsed and re-encoded
+    prefix = f'{{"index":{index},"status":200,"elapsed_ms":{elapsed_ms},"result":'.encode()
+    return True, prefix + body + b"}\n"
+
+@router.post("/query/batch")
+async def execute_batch(
+    request: BatchQueryRequest,
+    http_request: Request,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=422, detail=f"At most {settings.batch_max_questions} questions per batch"
+        )
+    statement_timeout.set(timeout_for("/query/batch", user))
+    try:
+        catalog = await get_catalog()
+    except Exception as e:
+        raise http_error(e)
+    columnar = wants_columnar(request, http_request)
+    increment("batches")
+    
+    async def items():
+        records: list = []
+        collected_records.set(records)
+        slots = asyncio.Semaphore(settings.batch_concurrency)
+        
+        async def run(index: int, question: str) -> tuple[bool, bytes]:
+            async with slots:
+                return await batch_item(index, question, catalog, columnar)
+        
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(run(i, q)) for i, q in enumerate(request.questions)]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                ok, line = await next_done
+                failed += not ok
+                yield line
+            yield dumps({"summary": {
+                "total": len(tasks),
+                "succeeded": len(tasks) - failed,
+                "failed": failed,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+            }}) + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.shield(audit_writer.write_batch(records))
+    
+    return StreamingResponse(items(), media_type="application/x-ndjson")
+
+async def run_job(job: Job) -> tuple[int, bytes]:
+    statement_timeout.set(timeout_for("/jobs", job.user))
+    try:
+        result = await process_query(job.question)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        error = http_error(e)
+        return error.status_code, dumps({"detail": error.detail})
+    return 200, await encode_result(result, job.columnar)
+
+def job_status(job: Job) -> JobStatus:
+    fields = {name: value for name, value in asdict(job).items() if name in JobStatus.model_fields}
+    return JobStatus(**fields)
+
+def find_job(job_id: str, user: Optional[str]) -> Job:
+    job = job_queue.get(job_id)
+    if job is None or (settings.auth_enabled and job.user != user):
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    request: JobRequest,
+    http_request: Request,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    columnar = wants_columnar(request, http_request)
+    job = job_queue.submit(request.question, columnar, request.priority, user)
+    if job is None:
+        raise HTTPException(status_code=503, detail="Job queue full", headers={"Retry-After": "5"})
+    return job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    return job_status(find_job(job_id, user))
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    find_job(job_id, user)
+    
+    async def events():
+        last = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                expired = json.dumps({"status": 404, "detail": "Job expired"})
+                yield f"event: error\ndata: {expired}\n\n"
+                return
+            status = job_status(job).model_dump_json()
+            if status != last:
+                last = status
+                yield f"event: {'done' if job.finished else 'status'}\ndata: {status}\n\n"
+            if job.finished:
+                return
+            await asyncio.sleep(settings.jobs_progress_interval)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    job = find_job(job_id, user)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    body = job_queue.store.load_result(job_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Job result expired")
+    columnar = job.columnar and job.status_code == 200
+    media_type = COLUMNAR_MEDIA_TYPE if columnar else "application/json"
+    return Response(body, status_code=job.status_code, media_type=media_type)
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(
+    job_id: str,
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    find_job(job_id, user)
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Job is running in another worker process")
+    return job_status(job)
+
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    http_request: Request,
+    format: Literal["ndjson", "csv", "arrow"] = "ndjson",
+    _: bool = Depends(verify_credentials),
+    user: Optional[str] = Depends(request_user)
+):
+    statement_timeout.set(timeout_for("/query/stream", user))
+    try:
+        stream = await run_until_disconnected(
+            http_request, open_query_stream(request.question, format)
+        )
+    except Exception as e:
+        raise http_error(e)
+    if stream is None:
+        return Response(status_code=499)
+
+    return StreamingResponse(
+        stream.body,
+        media_type=stream.media_type,
+        headers={"X-GuardSQL-SQL": " ".join(stream.sql.split())}
+    )
+
+@router.post("/admin/schema/refresh", response_model=CatalogStatusResponse)
+async def refresh_schema(_: bool = Depends(verify_credentials)):
+    invalidate_catalog()
+    try:
+        catalog = await refresh_catalog(force=True)
+    except Exception as e:
+        logger.error(f"Schema refresh failed: {e}")
+        raise HTTPException(status_code=503, detail="Schema catalog refresh failed")
+    return CatalogStatusResponse(
+        tables=len(catalog.tables),
+        fingerprint=catalog.fingerprint,
+        checksum=catalog.checksum,
+        loaded_at=catalog.loaded_at
+    )
+
+@router.post("/admin/cache/invalidate", response_model=CacheInvalidateResponse)
+async def invalidate_cache(
+    request: CacheInvalidateRequest,
+    _: bool = Depends(verify_credentials)
+):
+    if request.tables:
+        invalidated = result_cache.invalidate_tables(set(request.tables))
+    else:
+        invalidated = result_cache.clear()
+        plan_cache.clear()
+    return CacheInvalidateResponse(invalidated=invalidated)
+
+@router.get("/admin/metrics", response_model=MetricsResponse)
+async def get_metrics(_: bool = Depends(verify_credentials)):
+    return MetricsResponse(
+        counters=snapshot(),
+        pools=pool_snapshot(),
+        result_cache_hits=result_cache.hits,
+        result_cache_misses=result_cache.misses,
+        repairs=repair_rates()
+    )
+
+def prometheus_gauges() -> dict[str, dict[str, float]]:
+    gauges: dict[str, dict[str, float]] = {}
+    for pool, stats in pool_snapshot().items():
+        for name, value in stats.items():
+            gauges.setdefault(f"pool_{name}", {})[f'pool="{pool}"'] = value
+    gauges["llm_in_flight"] = {f'backend="{b.url}"': b.outstanding for b in llm_client.backends}
+    gauges["llm_queue_waiting"] = {"": llm_client.waiting}
+    gauges["offload_pending"] = {"": offload.pending}
+    gauges["jobs_waiting"] = {"": job_queue.waiting}
+    gauges["jobs_running"] = {"": len(job_queue.running)}
+    gauges["repair_success_rate"] = {
+        f'kind="{kind}"': r["success_rate"] for kind, r in repair_rates().items()
+    }
+    return gauges
+
+@router.get("/metrics")
+async def prometheus_metrics(_: bool = Depends(verify_credentials)):
+    return Response(render_prometheus(prometheus_gauges()), media_type="text/plain; version=0.0.4")
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    top: int = Query(10, ge=1, le=100),
     _: bool = Depends(verify_credentials)
 ):
     try:
-        result = await process_query(request.question)
-        return QueryResponse(**result)
-    except ValidationError as e:
-        logger.warning(f"Validation error: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except ExecutionError as e:
-        logger.error(f"Execution error: {e}")
-        raise HTTPException(status_code=500, detail=f"Query execution failed: {str(e)}")
-    except LLMError as e:
-        logger.error(f"LLM error: {e}")
-        raise HTTPException(status_code=503, detail=f"LLM service error: {str(e)}")
+        return StatsResponse(**await query_stats(hours, top))
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        logger.error(f"Failed to load query stats: {e}")
+        raise HTTPException(status_code=503, detail="Query statistics unavailable")
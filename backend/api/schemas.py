@@ -1,8 +1,16 @@
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class QueryRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=500)
+    format: Literal["rows", "columnar"] = "rows"
+
+class BatchQueryRequest(BaseModel):
+    questions: List[Annotated[str, Field(min_length=1, max_length=500)]] = Field(..., min_length=1)
+    format: Literal["rows", "columnar"] = "rows"
+
+class JobRequest(QueryRequest):
+    priority: int = Field(0, ge=0, le=9)
 
 class QueryResponse(BaseModel):
     sql: str
@@ -10,6 +18,34 @@ class QueryResponse(BaseModel):
     columns: List[str]
     row_count: int
     execution_time_ms: int
+    cached: bool = False
+    memo: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    schema_tables: Optional[int] = None
+    schema_pruning_ratio: Optional[float] = None
+    llm_ttft_ms: Optional[int] = None
+    llm_tokens_per_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
+
+class ColumnarData(BaseModel):
+    columns: List[str]
+    types: List[str]
+    values: List[List[Any]]
+
+class ColumnarQueryResponse(BaseModel):
+    sql: str
+    data: ColumnarData
+    columns: List[str]
+    row_count: int
+    execution_time_ms: int
+    cached: bool = False
+    memo: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    schema_tables: Optional[int] = None
+    schema_pruning_ratio: Optional[float] = None
+    llm_ttft_ms: Optional[int] = None
+    llm_tokens_per_sec: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
 
 class ErrorResponse(BaseModel):
     error: str
@@ -19,3 +55,49 @@ class HealthResponse(BaseModel):
     status: str
     database: bool
     ollama: bool = None
+
+class CatalogStatusResponse(BaseModel):
+    tables: int
+    fingerprint: str
+    checksum: str
+    loaded_at: float
+
+class CacheInvalidateRequest(BaseModel):
+    tables: List[str] = Field(default_factory=list)
+
+class CacheInvalidateResponse(BaseModel):
+    invalidated: int
+
+class MetricsResponse(BaseModel):
+    counters: Dict[str, int]
+    pools: Dict[str, Dict[str, float]]
+    result_cache_hits: int
+    result_cache_misses: int
+    repairs: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+
+class TopQuestion(BaseModel):
+    question: str
+    requests: int
+    errors: int
+
+class StatsResponse(BaseModel):
+    window_hours: int
+    requests: int
+    error_rate: float
+    status_counts: Dict[str, int]
+    latency_ms: Dict[str, Optional[int]]
+    top_questions: List[TopQuestion]
+
+class JobStatus(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    question: str
+    priority: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: float
+    stage: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
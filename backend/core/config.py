@@ -1,17 +1,93 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     database_url: str
     ollama_base_url: str
     ollama_model: str
     ollama_timeout: int = 60
+    ollama_base_urls: str = ""
+    llm_max_concurrency: int = 4
+    llm_max_queue: int = 32
+    llm_retry_after: int = 5
+    llm_eject_after: int = 3
+    llm_eject_seconds: int = 30
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_audit_pool_size: int = 2
+    db_audit_max_overflow: int = 2
+    db_audit_pool_timeout: int = 5
+    db_meta_pool_size: int = 2
+    db_meta_max_overflow: int = 2
+    db_meta_pool_timeout: int = 10
+    db_replica_urls: str = ""
+    db_replica_max_lag: float = 30
+    db_replica_check_interval: int = 10
+    audit_queue_size: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval: float = 1.0
+    audit_full_policy: str = "drop"
+    audit_spill_path: Optional[str] = None
+    audit_partition_months_ahead: int = 2
+    audit_retention_months: int = 12
+    audit_rollup_interval: int = 300
+    audit_admin_database_url: Optional[str] = None
+    result_cache_enabled: bool = True
+    result_cache_size: int = 256
+    result_cache_ttl: int = 300
+    result_cache_max_rows: int = 10000
+    result_cache_path: Optional[str] = None
+    result_cache_store_size: int = 5000
+    sql_memo_enabled: bool = True
+    sql_memo_size: int = 5000
+    sql_memo_similarity: float = 0.9
+    bind_check_enabled: bool = True
+    plan_check_enabled: bool = True
+    plan_mode: str = "reject"
+    plan_max_cost: float = 1000000
+    plan_max_rows: int = 10000000
+    plan_queue_concurrency: int = 1
+    plan_queue_timeout: int = 30
+    plan_cache_size: int = 1024
+    plan_cache_ttl: int = 600
+    statement_timeout_ms: int = 30000
+    statement_timeout_overrides: str = "route:/query/stream=600000"
+    disconnect_poll_interval: float = 0.5
+    stream_batch_size: int = 1000
+    stream_max_rows: int = 1000000
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     log_level: str = "INFO"
     auth_enabled: bool = False
     auth_username: str = "admin"
     auth_password: str = "changeme"
+    schema_name: str = "public"
+    schema_cache_ttl: int = 3600
+    schema_probe_interval: int = 30
+    schema_pruning_enabled: bool = True
+    schema_top_k: int = 8
+    catalog_cache_path: Optional[str] = None
+    workers: int = 1
+    shared_state_dir: Optional[str] = None
+    audit_store_init: bool = True
+    offload_mode: str = "off"
+    offload_workers: int = 2
+    offload_max_pending: int = 32
+    offload_min_rows: int = 1000
+    batch_max_questions: int = 500
+    batch_concurrency: int = 4
+    jobs_concurrency: int = 2
+    jobs_max_queued: int = 1000
+    jobs_ttl: int = 3600
+    jobs_spool_dir: Optional[str] = None
+    jobs_cleanup_interval: int = 60
+    jobs_progress_interval: float = 0.5
+    repair_fix_identifiers: bool = True
+    repair_match_cutoff: float = 0.85
+    repair_candidates: int = 1
+    repair_temperature: float = 0.7
 
     class Config:
         env_file = ".env"
@@ -1,3 +1,5 @@
+from typing import Optional
+
 class GuardSQLException(Exception):
     pass
 
@@ -5,10 +7,29 @@ class ValidationError(GuardSQLException):
     pass
 
 class ExecutionError(GuardSQLException):
+    def __init__(self, message: str = "", sqlstate: Optional[str] = None):
+        super().__init__(message)
+        self.sqlstate = sqlstate
+
+class BindingError(ExecutionError):
+    def __init__(self, message: str, sqlstate: str, kind: str, identifier: Optional[str] = None):
+        super().__init__(message, sqlstate)
+        self.kind = kind
+        self.identifier = identifier
+
+class PlanRejectedError(ExecutionError):
+    pass
+
+class QueryTimeoutError(ExecutionError):
     pass
 
 class LLMError(GuardSQLException):
     pass
 
+class LLMSaturatedError(LLMError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class AuthenticationError(GuardSQLException):
     pass
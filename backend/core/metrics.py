@@ -0,0 +1,115 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+counters: Counter = Counter()
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def increment(name: str, value: int = 1):
+    counters[name] += value
+
+def snapshot() -> dict[str, int]:
+    return dict(counters)
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            result.append((str(bound), seen))
+        result.append(("+Inf", self.count))
+        return result
+
+stage_histograms: dict[str, Histogram] = {}
+
+class Timings:
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.prefix = ""
+        self.active: Optional[str] = None
+        self._children: list[float] = []
+
+    def add(self, stage: str, ms: float):
+        key = self.prefix + stage
+        self.stages[key] = self.stages.get(key, 0.0) + ms
+
+    def total(self, prefix: str) -> float:
+        return sum(ms for stage, ms in self.stages.items() if stage.startswith(prefix))
+
+    def breakdown(self) -> dict[str, float]:
+        return {stage: round(ms, 1) for stage, ms in self.stages.items()}
+
+current_timings: ContextVar[Optional[Timings]] = ContextVar("current_timings", default=None)
+
+def observe_stage(stage: str, seconds: float):
+    histogram = stage_histograms.get(stage)
+    if histogram is None:
+        histogram = stage_histograms[stage] = Histogram()
+    histogram.observe(seconds)
+
+class span:
+    __slots__ = ("stage", "timings", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.timings = current_timings.get()
+        if self.timings is not None:
+            self.timings.active = self.timings.prefix + self.stage
+            self.timings._children.append(0.0)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        observe_stage(self.stage, elapsed)
+        timings = self.timings
+        if timings is not None:
+            children = timings._children.pop()
+            timings.add(self.stage, (elapsed - children) * 1000)
+            if timings._children:
+                timings._children[-1] += elapsed
+
+def start_timings() -> Timings:
+    timings = Timings()
+    current_timings.set(timings)
+    return timings
+
+def _metric_name(name: str) -> str:
+    return "guardsql_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def render_prometheus(gauges: dict[str, dict[str, float]]) -> str:
+    lines = []
+    for name, value in sorted(counters.items()):
+        metric = _metric_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+    if stage_histograms:
+        lines.append("# TYPE guardsql_stage_seconds histogram")
+    for stage, histogram in sorted(stage_histograms.items()):
+        for bound, count in histogram.cumulative():
+            lines.append(f'guardsql_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'guardsql_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+        lines.append(f'guardsql_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+    for group, values in sorted(gauges.items()):
+        metric = _metric_name(group)
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in sorted(values.items()):
+            lines.append(f"{metric}{{{labels}}} {value}" if labels else f"{metric} {value}")
+    return "\n".join(lines) + "\n"
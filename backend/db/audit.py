@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core.config import get_settings
+from backend.core.metrics import increment, span
+from backend.db.connection import connect
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+TIMING_COLUMNS = ("catalog", "schema", "prompt", "llm", "validate", "plan", "db", "retry")
+
+INSERT_SQL = text(f"""
+    INSERT INTO query_logs
+    (question, generated_sql, status, error_message, execution_time_ms, schema_fingerprint,
+     created_at, {", ".join(f"{stage}_ms" for stage in TIMING_COLUMNS)})
+    VALUES (:question, :sql, :status, :error, :exec_time, :fingerprint,
+            CURRENT_TIMESTAMP - make_interval(secs => :age),
+            {", ".join(f":{stage}_ms" for stage in TIMING_COLUMNS)})
+""")
+
+def timing_params(timings: Optional[dict[str, float]]) -> dict[str, Optional[int]]:
+    timings = dict(timings or {})
+    retry = [ms for stage, ms in timings.items() if stage.startswith("retry_")]
+    if retry:
+        timings["retry"] = sum(retry)
+    return {
+        f"{stage}_ms": round(timings[stage]) if stage in timings else None
+        for stage in TIMING_COLUMNS
+    }
+
+@dataclass
+class AuditRecord:
+    question: str
+    sql: str
+    status: str
+    error: Optional[str]
+    exec_time: Optional[int]
+    fingerprint: Optional[str]
+    logged_at: float
+    timings: Optional[dict[str, float]] = None
+
+    def params(self, now: float) -> dict:
+        params = asdict(self)
+        params["age"] = max(0.0, now - params.pop("logged_at"))
+        params.update(timing_params(params.pop("timings")))
+        return params
+
+async def insert_records(records: list[AuditRecord]):
+    now = time.time()
+    with span("audit_flush"):
+        async with connect("audit") as conn:
+            await conn.execute(INSERT_SQL, [r.params(now) for r in records])
+            await conn.commit()
+
+class AuditWriter:
+    def __init__(
+        self,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        full_policy: str = "drop",
+        spill_path: Optional[str] = None
+    ):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.spill_path = spill_path
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if not self.running:
+            self.task = asyncio.create_task(self._run())
+            logger.info(
+                f"Audit writer started (batch {self.batch_size}, every {self.flush_interval}s)"
+            )
+
+    async def stop(self):
+        if not self.running:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+        logger.info("Audit writer stopped")
+
+    async def submit(self, record: AuditRecord):
+        if not self.running:
+            await self._flush([record])
+            return
+        if self.full_policy == "block":
+            await self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            increment("audit_dropped")
+            logger.warning(f"Audit queue full, dropped log for: {record.question[:100]}")
+
+    async def write_batch(self, records: list[AuditRecord]):
+        if records:
+            await self._flush(records)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[AuditRecord]):
+        try:
+            await self._replay_spill()
+            await insert_records(batch)
+            increment("audit_flushes")
+            increment("audit_records", len(batch))
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} query logs: {e}")
+            self._spill(batch)
+
+    def _spill(self, batch: list[AuditRecord]):
+        if not self.spill_path:
+            increment("audit_dropped", len(batch))
+            return
+        try:
+            with open(self.spill_path, "a") as f:
+                for record in batch:
+                    f.write(json.dumps(asdict(record)) + "\n")
+            increment("audit_spilled", len(batch))
+        except OSError as e:
+            increment("audit_dropped", len(batch))
+            logger.error(f"Failed to spill query logs to {self.spill_path}: {e}")
+
+    async def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path) as f:
+            records = [AuditRecord(**json.loads(line)) for line in f if line.strip()]
+        os.remove(self.spill_path)
+        for i in range(0, len(records), self.batch_size):
+            try:
+                await insert_records(records[i:i + self.batch_size])
+            except Exception:
+                self._spill(records[i:])
+                raise
+        logger.info(f"Replayed {len(records)} spilled query logs")
+
+audit_writer = AuditWriter(
+    queue_size=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+    full_policy=settings.audit_full_policy,
+    spill_path=settings.audit_spill_path
+)
+
+# When set, log_query collects records here instead of submitting them, so a
+# caller can write a whole unit of work in one insert
+collected_records: ContextVar[Optional[list[AuditRecord]]] = ContextVar(
+    "collected_records", default=None
+)
+
+async def log_query(
+    question: str,
+    sql: str,
+    status: str,
+    error: str = None,
+    exec_time: int = None,
+    fingerprint: str = None,
+    timings: dict[str, float] = None
+):
+    record = AuditRecord(
+        question, sql, status, error, exec_time, fingerprint, time.time(),
+        dict(timings) if timings else None
+    )
+    collected = collected_records.get()
+    if collected is not None:
+        collected.append(record)
+        return
+    await audit_writer.submit(record)
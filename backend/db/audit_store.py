@@ -0,0 +1,327 @@
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.core.config import get_settings
+from backend.db.audit import TIMING_COLUMNS
+from backend.db.connection import connect, create_pool
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PARTITION_PREFIX = "query_logs_p"
+
+SUCCESS_STATUSES = ("success", "success_retry", "success_fixed")
+ERROR_STATUSES = ("validation_error", "execution_error", "llm_error", "error")
+
+LATENCY_BOUNDS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+RELKIND_SQL = """
+    SELECT c.relkind::text FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relname = 'query_logs' AND n.nspname = current_schema()
+"""
+
+CREATE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS query_logs (
+        id BIGSERIAL,
+        question TEXT NOT NULL,
+        generated_sql TEXT,
+        status VARCHAR(50) NOT NULL,
+        error_message TEXT,
+        execution_time_ms INTEGER,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        schema_fingerprint VARCHAR(32),
+        sql_hash CHAR(32) GENERATED ALWAYS AS (md5(COALESCE(generated_sql, ''))) STORED,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    *(
+        f"ALTER TABLE query_logs ADD COLUMN IF NOT EXISTS {stage}_ms INTEGER"
+        for stage in TIMING_COLUMNS
+    ),
+    "CREATE INDEX IF NOT EXISTS idx_query_logs_created_at ON query_logs (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_query_logs_status ON query_logs (status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_query_logs_sql_hash ON query_logs (sql_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_query_logs_fingerprint "
+    "ON query_logs (schema_fingerprint, question)",
+    """
+    CREATE TABLE IF NOT EXISTS query_log_rollups (
+        bucket TIMESTAMP NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        latency_bucket SMALLINT NOT NULL,
+        requests INTEGER NOT NULL,
+        PRIMARY KEY (bucket, status, latency_bucket)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS query_log_questions (
+        day DATE NOT NULL,
+        question TEXT NOT NULL,
+        requests INTEGER NOT NULL,
+        errors INTEGER NOT NULL,
+        PRIMARY KEY (day, question)
+    )
+    """,
+]
+
+LEGACY_COLUMNS = (
+    "question, generated_sql, status, error_message, execution_time_ms, created_at, "
+    "schema_fingerprint"
+)
+
+GRANTS_SQL = """
+    SELECT grantee, privilege_type FROM information_schema.role_table_grants
+    WHERE table_name = 'query_logs_legacy'
+      AND table_schema = current_schema()
+      AND grantee <> current_user
+"""
+
+PARTITIONS_SQL = """
+    SELECT c.relname FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'query_logs'::regclass
+"""
+
+# Only one process refreshes rollups or manages partitions at a time
+MAINTENANCE_LOCK_SQL = "SELECT pg_try_advisory_xact_lock(hashtext('guardsql_audit_maintenance'))"
+
+ROLLUP_SINCE_SQL = """
+    SELECT date_trunc('day', COALESCE(
+        (SELECT max(bucket) FROM query_log_rollups),
+        (SELECT min(created_at) FROM query_logs),
+        CURRENT_TIMESTAMP::timestamp
+    ) - interval '1 hour')
+"""
+
+ROLLUP_SQL = [
+    "DELETE FROM query_log_rollups WHERE bucket >= :since",
+    """
+    INSERT INTO query_log_rollups (bucket, status, latency_bucket, requests)
+    SELECT date_trunc('hour', created_at), status,
+           width_bucket(COALESCE(execution_time_ms, 0), CAST(:bounds AS INTEGER[])), count(*)
+    FROM query_logs
+    WHERE created_at >= :since
+    GROUP BY 1, 2, 3
+    """,
+    "DELETE FROM query_log_questions WHERE day >= :since_day",
+    """
+    INSERT INTO query_log_questions (day, question, requests, errors)
+    SELECT created_at::date, question, count(*),
+           count(*) FILTER (WHERE status = ANY(CAST(:errors AS TEXT[])))
+    FROM query_logs
+    WHERE created_at >= :since_day
+    GROUP BY 1, 2
+    """,
+]
+
+_admin_engine: Optional[AsyncEngine] = None
+
+def admin_connect():
+    global _admin_engine
+    if not settings.audit_admin_database_url:
+        return connect("meta")
+    if _admin_engine is None:
+        _admin_engine = create_pool(
+            settings.audit_admin_database_url, 1, 1, settings.db_meta_pool_timeout
+        )
+    return _admin_engine.connect()
+
+async def dispose_admin_pool():
+    global _admin_engine
+    if _admin_engine is not None:
+        await _admin_engine.dispose()
+        _admin_engine = None
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[date]:
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").date()
+    except ValueError:
+        return None
+
+async def create_partitions(conn, start: date, end: date):
+    month = date(start.year, start.month, 1)
+    while month <= end:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF query_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        month = add_months(month, 1)
+
+async def migrate_legacy(conn, today: date):
+    logger.info("Migrating query_logs to a partitioned table")
+    await conn.execute(text(
+        "ALTER TABLE query_logs ADD COLUMN IF NOT EXISTS schema_fingerprint VARCHAR(32)"
+    ))
+    await conn.execute(text("ALTER TABLE query_logs RENAME TO query_logs_legacy"))
+    await conn.execute(text(
+        "ALTER TABLE query_logs_legacy RENAME CONSTRAINT query_logs_pkey TO query_logs_legacy_pkey"
+    ))
+    await conn.execute(text(
+        "ALTER SEQUENCE IF EXISTS query_logs_id_seq RENAME TO query_logs_legacy_id_seq"
+    ))
+    await conn.execute(text(
+        "ALTER INDEX IF EXISTS idx_query_logs_fingerprint "
+        "RENAME TO idx_query_logs_legacy_fingerprint"
+    ))
+    for statement in CREATE_SQL:
+        await conn.execute(text(statement))
+
+    grants = (await conn.execute(text(GRANTS_SQL))).fetchall()
+    for grant in grants:
+        await conn.execute(text(f'GRANT {grant.privilege_type} ON query_logs TO "{grant.grantee}"'))
+    for grantee in {grant.grantee for grant in grants if grant.privilege_type == "INSERT"}:
+        await conn.execute(text(
+            f'GRANT USAGE, SELECT ON SEQUENCE query_logs_id_seq TO "{grantee}"'
+        ))
+
+    oldest = (await conn.execute(text("SELECT min(created_at) FROM query_logs_legacy"))).scalar()
+    await create_partitions(conn, oldest.date() if oldest else today, today)
+    moved = (await conn.execute(text(
+        f"INSERT INTO query_logs ({LEGACY_COLUMNS}) "
+        f"SELECT {LEGACY_COLUMNS.replace('created_at', 'COALESCE(created_at, CURRENT_TIMESTAMP)')} "
+        f"FROM query_logs_legacy"
+    ))).rowcount
+    await conn.execute(text("DROP TABLE query_logs_legacy"))
+    logger.info(f"Moved {moved} rows into partitioned query_logs")
+
+async def ensure_partitions(conn, today: date):
+    await create_partitions(conn, today, add_months(today, settings.audit_partition_months_ahead))
+
+async def drop_expired_partitions(conn, today: date) -> list[str]:
+    if settings.audit_retention_months <= 0:
+        return []
+    cutoff = add_months(today, -settings.audit_retention_months)
+    dropped = []
+    for name in (await conn.execute(text(PARTITIONS_SQL))).scalars():
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            await conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    if dropped:
+        await conn.execute(
+            text("DELETE FROM query_log_rollups WHERE bucket < :cutoff"),
+            {"cutoff": datetime.combine(cutoff, datetime.min.time())}
+        )
+        await conn.execute(
+            text("DELETE FROM query_log_questions WHERE day < :cutoff"), {"cutoff": cutoff}
+        )
+        logger.info(f"Dropped expired query log partitions: {dropped}")
+    return dropped
+
+async def init_audit_store():
+    async with admin_connect() as conn:
+        today = (await conn.execute(text("SELECT CURRENT_DATE"))).scalar()
+        relkind = (await conn.execute(text(RELKIND_SQL))).scalar()
+        if relkind == "r":
+            await migrate_legacy(conn, today)
+        else:
+            for statement in CREATE_SQL:
+                await conn.execute(text(statement))
+        await ensure_partitions(conn, today)
+        await conn.commit()
+    logger.info("Query logs store initialized")
+
+async def refresh_rollups():
+    async with admin_connect() as conn:
+        if not (await conn.execute(text(MAINTENANCE_LOCK_SQL))).scalar():
+            return
+        since = (await conn.execute(text(ROLLUP_SINCE_SQL))).scalar()
+        params = {
+            "since": since, "since_day": since.date(), "bounds": LATENCY_BOUNDS_MS,
+            "errors": list(ERROR_STATUSES)
+        }
+        for statement in ROLLUP_SQL:
+            await conn.execute(text(statement), params)
+        await conn.commit()
+
+async def audit_maintainer():
+    last_partition_check = None
+    while True:
+        await asyncio.sleep(settings.audit_rollup_interval)
+        try:
+            await refresh_rollups()
+            today = date.today()
+            if last_partition_check != today:
+                async with admin_connect() as conn:
+                    if not (await conn.execute(text(MAINTENANCE_LOCK_SQL))).scalar():
+                        continue
+                    await ensure_partitions(conn, today)
+                    await drop_expired_partitions(conn, today)
+                    await conn.commit()
+                last_partition_check = today
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Query log maintenance failed: {e}")
+
+def latency_percentiles(
+    histogram: dict[int, int], percentiles=(50, 95, 99)
+) -> dict[str, Optional[int]]:
+    total = sum(histogram.values())
+    result = {}
+    for pct in percentiles:
+        if not total:
+            result[f"p{pct}"] = None
+            continue
+        target = total * pct / 100
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= target:
+                result[f"p{pct}"] = LATENCY_BOUNDS_MS[min(bucket, len(LATENCY_BOUNDS_MS) - 1)]
+                break
+    return result
+
+async def query_stats(hours: int, top: int) -> dict:
+    async with connect("meta") as conn:
+        rows = (await conn.execute(text("""
+            SELECT status, latency_bucket, SUM(requests) AS requests
+            FROM query_log_rollups
+            WHERE bucket >= date_trunc('hour', CURRENT_TIMESTAMP::timestamp)
+                             - make_interval(hours => :hours)
+            GROUP BY status, latency_bucket
+        """), {"hours": hours})).fetchall()
+        questions = (await conn.execute(text("""
+            SELECT question, SUM(requests) AS requests, SUM(errors) AS errors
+            FROM query_log_questions
+            WHERE day >= (CURRENT_TIMESTAMP - make_interval(hours => :hours))::date
+            GROUP BY question
+            ORDER BY requests DESC, question
+            LIMIT :top
+        """), {"hours": hours, "top": top})).fetchall()
+
+    status_counts: dict[str, int] = {}
+    histogram: dict[int, int] = {}
+    for row in rows:
+        status_counts[row.status] = status_counts.get(row.status, 0) + int(row.requests)
+        if row.status in SUCCESS_STATUSES:
+            histogram[row.latency_bucket] = histogram.get(row.latency_bucket, 0) + int(row.requests)
+
+    total = sum(status_counts.values())
+    errors = sum(count for status, count in status_counts.items() if status in ERROR_STATUSES)
+    return {
+        "window_hours": hours,
+        "requests": total,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "status_counts": status_counts,
+        "latency_ms": latency_percentiles(histogram),
+        "top_questions": [
+            {"question": q.question, "requests": int(q.requests), "errors": int(q.errors)}
+            for q in questions
+        ]
+    }
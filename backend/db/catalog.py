@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core.config import get_settings
+from backend.core.metrics import span
+from backend.db.connection import connect
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EXCLUDED_TABLES = {"query_logs", "query_log_rollups", "query_log_questions", "pg_stat_statements"}
+
+COLUMNS_SQL = """
+    SELECT c.relname AS table_name,
+           obj_description(c.oid, 'pg_class') AS table_comment,
+           a.attname AS column_name,
+           format_type(a.atttypid, a.atttypmod) AS data_type,
+           NOT a.attnotnull AS nullable,
+           col_description(c.oid, a.attnum) AS column_comment
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid
+    WHERE n.nspname = :schema
+      AND c.relkind IN ('r', 'p')
+      AND NOT c.relispartition
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY c.relname, a.attnum
+"""
+
+CONSTRAINTS_SQL = """
+    SELECT tc.relname AS table_name,
+           con.contype::text AS kind,
+           a.attname AS column_name,
+           rc.relname AS ref_table,
+           ra.attname AS ref_column
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class tc ON tc.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = tc.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, ref_attnum)
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+    LEFT JOIN pg_catalog.pg_class rc ON rc.oid = con.confrelid
+    LEFT JOIN pg_catalog.pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.ref_attnum
+    WHERE n.nspname = :schema
+      AND con.contype IN ('p', 'f')
+    ORDER BY tc.relname, con.conname, k.attnum
+"""
+
+CHECKSUM_SQL = """
+    SELECT md5(coalesce(string_agg(
+               c.oid::text || '.' || a.attnum || '.' || a.attname
+               || '.' || a.atttypid || '.' || a.atttypmod,
+               ',' ORDER BY c.oid, a.attnum), ''))
+           || md5(coalesce((
+               SELECT string_agg(con.oid::text, ',' ORDER BY con.oid)
+               FROM pg_catalog.pg_constraint con
+               JOIN pg_catalog.pg_namespace cn ON cn.oid = con.connamespace
+               WHERE cn.nspname = :schema AND con.contype IN ('p', 'f')), ''))
+           || md5(coalesce((
+               SELECT string_agg(rc.oid::text || '.' || rc.relname, ',' ORDER BY rc.oid)
+               FROM pg_catalog.pg_class rc
+               JOIN pg_catalog.pg_namespace rn ON rn.oid = rc.relnamespace
+               WHERE rn.nspname = :schema
+                 AND (rc.relkind IN ('v', 'm', 'f') OR rc.relispartition)), ''))
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid
+    WHERE n.nspname = :schema
+      AND c.relkind IN ('r', 'p')
+      AND NOT c.relispartition
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+"""
+
+# Everything a query can select from, including the views and partitions the prompt leaves out
+RELATIONS_SQL = """
+    SELECT c.relname
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = :schema
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+"""
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    data_type: str
+    nullable: bool = True
+    comment: Optional[str] = None
+
+@dataclass(frozen=True)
+class ForeignKey:
+    column: str
+    ref_table: str
+    ref_column: str
+
+@dataclass
+class Table:
+    name: str
+    columns: list[Column] = field(default_factory=list)
+    primary_key: list[str] = field(default_factory=list)
+    foreign_keys: list[ForeignKey] = field(default_factory=list)
+    comment: Optional[str] = None
+
+    def render(self) -> str:
+        col_defs = [f"  {c.name} {c.data_type}" for c in self.columns]
+        return f"Table: {self.name}\n" + "\n".join(col_defs)
+
+@dataclass
+class SchemaCatalog:
+    tables: dict[str, Table]
+    checksum: str
+    loaded_at: float = field(default_factory=time.time)
+    other_relations: frozenset[str] = frozenset()
+
+    def __post_init__(self):
+        self.rendered = "\n\n".join(t.render() for t in self.tables.values())
+        # Keys change the join paths the retriever adds and the markers in the prompt, so they
+        # count too
+        keys = "\n".join(
+            f"{t.name} {t.primary_key} "
+            f"{[(fk.column, fk.ref_table, fk.ref_column) for fk in t.foreign_keys]}"
+            for t in self.tables.values()
+        )
+        self.fingerprint = hashlib.sha256(f"{self.rendered}\n\n{keys}".encode()).hexdigest()[:16]
+        self.column_names = {
+            name: frozenset(c.name for c in t.columns) for name, t in self.tables.items()
+        }
+
+    def render(self) -> str:
+        return self.rendered
+
+    def age(self) -> float:
+        return time.time() - self.loaded_at
+
+def build_catalog(column_rows, constraint_rows, checksum: str, relation_names=()) -> SchemaCatalog:
+    tables: dict[str, Table] = {}
+
+    for row in column_rows:
+        if row.table_name in EXCLUDED_TABLES:
+            continue
+        table = tables.get(row.table_name)
+        if table is None:
+            table = tables[row.table_name] = Table(row.table_name, comment=row.table_comment)
+        table.columns.append(
+            Column(row.column_name, row.data_type, row.nullable, row.column_comment)
+        )
+
+    for row in constraint_rows:
+        table = tables.get(row.table_name)
+        if table is None:
+            continue
+        if row.kind == "p":
+            table.primary_key.append(row.column_name)
+        elif row.ref_table:
+            table.foreign_keys.append(ForeignKey(row.column_name, row.ref_table, row.ref_column))
+
+    return SchemaCatalog(
+        tables=tables, checksum=checksum, other_relations=frozenset(relation_names) - tables.keys()
+    )
+
+async def load_catalog() -> SchemaCatalog:
+    params = {"schema": settings.schema_name}
+    with span("catalog_load"):
+        async with connect("meta") as conn:
+            checksum = (await conn.execute(text(CHECKSUM_SQL), params)).scalar()
+            column_rows = (await conn.execute(text(COLUMNS_SQL), params)).fetchall()
+            constraint_rows = (await conn.execute(text(CONSTRAINTS_SQL), params)).fetchall()
+            relation_names = (await conn.execute(text(RELATIONS_SQL), params)).scalars().all()
+
+    catalog = build_catalog(column_rows, constraint_rows, checksum, relation_names)
+    logger.info(
+        f"Schema catalog loaded: {len(catalog.tables)} tables, fingerprint {catalog.fingerprint}"
+    )
+    return catalog
+
+async def probe_checksum() -> str:
+    async with connect("meta") as conn:
+        return (await conn.execute(text(CHECKSUM_SQL), {"schema": settings.schema_name})).scalar()
+
+def dump_catalog(catalog: SchemaCatalog) -> str:
+    return json.dumps({
+        "checksum": catalog.checksum,
+        "loaded_at": catalog.loaded_at,
+        "tables": [asdict(table) for table in catalog.tables.values()],
+        "other_relations": sorted(catalog.other_relations)
+    })
+
+def parse_catalog(payload: str) -> SchemaCatalog:
+    data = json.loads(payload)
+    tables = {}
+    for table in data["tables"]:
+        tables[table["name"]] = Table(
+            name=table["name"],
+            columns=[Column(**column) for column in table["columns"]],
+            primary_key=table["primary_key"],
+            foreign_keys=[ForeignKey(**fk) for fk in table["foreign_keys"]],
+            comment=table["comment"]
+        )
+    return SchemaCatalog(
+        tables=tables, checksum=data["checksum"], loaded_at=data["loaded_at"],
+        other_relations=frozenset(data.get("other_relations", ()))
+    )
+
+def shared_catalog_stamp() -> Optional[int]:
+    if not settings.catalog_cache_path:
+        return None
+    try:
+        return os.stat(settings.catalog_cache_path).st_mtime_ns
+    except OSError:
+        return None
+
+def read_shared_catalog() -> Optional[SchemaCatalog]:
+    if not settings.catalog_cache_path:
+        return None
+    try:
+        with open(settings.catalog_cache_path) as f:
+            return parse_catalog(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable shared catalog {settings.catalog_cache_path}: {e}")
+        return None
+
+def write_shared_catalog(catalog: SchemaCatalog):
+    if not settings.catalog_cache_path:
+        return
+    partial = f"{settings.catalog_cache_path}.{os.getpid()}"
+    try:
+        with open(partial, "w") as f:
+            f.write(dump_catalog(catalog))
+        os.replace(partial, settings.catalog_cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write shared catalog {settings.catalog_cache_path}: {e}")
+
+async def load_shared_or_fresh() -> SchemaCatalog:
+    global _shared_stamp
+    stamp = shared_catalog_stamp()
+    shared = read_shared_catalog()
+    fresh = shared is not None and shared.age() < settings.schema_cache_ttl
+    if fresh and await probe_checksum() == shared.checksum:
+        logger.info(f"Schema catalog loaded from shared store: {len(shared.tables)} tables")
+        _shared_stamp = stamp
+        return shared
+    catalog = await load_catalog()
+    write_shared_catalog(catalog)
+    _shared_stamp = shared_catalog_stamp()
+    return catalog
+
+_catalog: Optional[SchemaCatalog] = None
+# The shared file's mtime when this worker last read or wrote it; another worker replacing or
+# removing the file (a reload, or /admin/schema/refresh) changes it
+_shared_stamp: Optional[int] = None
+_lock = asyncio.Lock()
+
+async def refresh_catalog(force: bool = False) -> SchemaCatalog:
+    global _catalog
+    async with _lock:
+        if _catalog is not None and not force:
+            return _catalog
+        _catalog = await load_shared_or_fresh()
+        return _catalog
+
+async def get_catalog() -> SchemaCatalog:
+    if _catalog is not None:
+        return _catalog
+    return await refresh_catalog()
+
+def invalidate_catalog():
+    global _catalog
+    _catalog = None
+    if settings.catalog_cache_path:
+        try:
+            os.remove(settings.catalog_cache_path)
+        except FileNotFoundError:
+            pass
+    logger.info("Schema catalog invalidated")
+
+async def catalog_refresher():
+    while True:
+        await asyncio.sleep(settings.schema_probe_interval)
+        try:
+            current = _catalog
+            if current is None or current.age() >= settings.schema_cache_ttl:
+                await refresh_catalog(force=True)
+                continue
+
+            if shared_catalog_stamp() != _shared_stamp:
+                logger.info("Shared schema catalog changed by another worker, reloading")
+                await refresh_catalog(force=True)
+                continue
+
+            checksum = await probe_checksum()
+            if checksum != current.checksum:
+                logger.info("Schema change detected, reloading catalog")
+                await refresh_catalog(force=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Schema catalog refresh failed: {e}")
@@ -1,80 +1,189 @@
+import asyncio
 import logging
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from contextlib import asynccontextmanager
 
 from backend.core.config import get_settings
+from backend.core.metrics import observe_stage
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    echo=False
+def async_database_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+def create_pool(url: str, size: int, overflow: int, timeout: int) -> AsyncEngine:
+    return create_async_engine(
+        async_database_url(url),
+        pool_pre_ping=True,
+        pool_size=size,
+        max_overflow=overflow,
+        pool_timeout=timeout,
+        echo=False
+    )
+
+async_engine = create_pool(
+    settings.database_url, settings.db_pool_size, settings.db_max_overflow, settings.db_pool_timeout
+)
+audit_engine = create_pool(
+    settings.database_url, settings.db_audit_pool_size, settings.db_audit_max_overflow,
+    settings.db_audit_pool_timeout
 )
+meta_engine = create_pool(
+    settings.database_url, settings.db_meta_pool_size, settings.db_meta_max_overflow,
+    settings.db_meta_pool_timeout
+)
+
+REPLICA_LAG_SQL = """
+    SELECT CASE WHEN pg_is_in_recovery()
+        THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        ELSE 0 END
+"""
+
+@dataclass
+class Replica:
+    url: str
+    engine: AsyncEngine
+    healthy: bool = True
+    lag_seconds: Optional[float] = None
+
+@dataclass
+class PoolStats:
+    capacity_per_engine: int
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    engines: list[AsyncEngine] = field(default_factory=list)
+
+    def record(self, wait_ms: float):
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def snapshot(self) -> dict[str, float]:
+        capacity = self.capacity_per_engine * len(self.engines)
+        checked_out = sum(e.pool.checkedout() for e in self.engines)
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+            "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3)
+        }
+
+replicas = [
+    Replica(url, create_pool(
+        url, settings.db_pool_size, settings.db_max_overflow, settings.db_pool_timeout
+    ))
+    for url in (u.strip() for u in settings.db_replica_urls.split(",")) if url
+]
+
+pool_stats = {
+    "query": PoolStats(
+        settings.db_pool_size + settings.db_max_overflow,
+        engines=[async_engine] + [r.engine for r in replicas]
+    ),
+    "audit": PoolStats(
+        settings.db_audit_pool_size + settings.db_audit_max_overflow, engines=[audit_engine]
+    ),
+    "meta": PoolStats(
+        settings.db_meta_pool_size + settings.db_meta_max_overflow, engines=[meta_engine]
+    ),
+}
+
+def query_engines() -> list[AsyncEngine]:
+    healthy = [r.engine for r in replicas if r.healthy]
+    healthy.sort(key=lambda e: e.pool.checkedout())
+    return healthy + [async_engine]
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def mark_replica_down(engine: AsyncEngine, error: Exception):
+    for replica in replicas:
+        if replica.engine is engine and replica.healthy:
+            replica.healthy = False
+            logger.warning(f"Replica {make_url(replica.url).host} marked down: {error}")
+
+@asynccontextmanager
+async def connect(pool: str = "query") -> AsyncIterator[AsyncConnection]:
+    stats = pool_stats[pool]
+    candidates = query_engines() if pool == "query" else stats.engines
+    for i, candidate in enumerate(candidates):
+        start = time.perf_counter()
+        try:
+            conn = await candidate.connect()
+        except Exception as e:
+            saturated = isinstance(e, exc.TimeoutError)
+            if saturated:
+                stats.timeouts += 1
+            if i == len(candidates) - 1:
+                raise
+            if not saturated:
+                mark_replica_down(candidate, e)
+            continue
+        wait = time.perf_counter() - start
+        stats.record(wait * 1000)
+        observe_stage(f"pool_wait_{pool}", wait)
+        break
 
-@contextmanager
-def get_db():
-    db = SessionLocal()
     try:
-        yield db
+        yield conn
     finally:
-        db.close()
-
-def init_query_logs():
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS query_logs (
-                id SERIAL PRIMARY KEY,
-                question TEXT NOT NULL,
-                generated_sql TEXT,
-                status VARCHAR(50) NOT NULL,
-                error_message TEXT,
-                execution_time_ms INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
-    logger.info("Query logs table initialized")
-
-def log_query(question: str, sql: str, status: str, error: str = None, exec_time: int = None):
-    try:
-        with engine.connect() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO query_logs 
-                    (question, generated_sql, status, error_message, execution_time_ms)
-                    VALUES (:q, :sql, :status, :error, :time)
-                """),
-                {"q": question, "sql": sql, "status": status, "error": error, "time": exec_time}
-            )
-            conn.commit()
-    except Exception as e:
-        logger.error(f"Failed to log query: {e}")
-
-def get_schema() -> str:
-    inspector = inspect(engine)
-    schema_parts = []
-    
-    for table in inspector.get_table_names():
-        if table in ['query_logs', 'pg_stat_statements']:
+        await conn.close()
+
+async def check_replicas():
+    for replica in replicas:
+        try:
+            async with replica.engine.connect() as conn:
+                lag = float((await conn.execute(text(REPLICA_LAG_SQL))).scalar() or 0)
+        except Exception as e:
+            replica.lag_seconds = None
+            mark_replica_down(replica.engine, e)
             continue
-        
-        cols = inspector.get_columns(table)
-        col_defs = [f"  {c['name']} {c['type']}" for c in cols]
-        schema_parts.append(f"Table: {table}\n" + "\n".join(col_defs))
-    
-    return "\n\n".join(schema_parts)
-
-def check_db_health() -> bool:
+
+        replica.lag_seconds = lag
+        healthy = lag <= settings.db_replica_max_lag
+        if healthy != replica.healthy:
+            state = "back in rotation" if healthy else f"lagging {lag:.1f}s, out of rotation"
+            logger.info(f"Replica {make_url(replica.url).host} {state}")
+        replica.healthy = healthy
+
+async def replica_monitor():
+    while True:
+        try:
+            await check_replicas()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Replica check failed: {e}")
+        await asyncio.sleep(settings.db_replica_check_interval)
+
+def pool_snapshot() -> dict[str, dict[str, float]]:
+    snapshot = {name: stats.snapshot() for name, stats in pool_stats.items()}
+    for replica in replicas:
+        snapshot["query"][f"replica_{make_url(replica.url).host}_healthy"] = int(replica.healthy)
+    return snapshot
+
+async def warm_pool(pool: str, connections: int):
+    async def touch():
+        async with connect(pool) as conn:
+            await conn.execute(text("SELECT 1"))
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
+async def dispose_pools():
+    for engine in [async_engine, audit_engine, meta_engine] + [r.engine for r in replicas]:
+        await engine.dispose()
+
+async def check_db_health() -> bool:
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with connect("meta") as conn:
+            await conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
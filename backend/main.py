@@ -2,12 +2,20 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from backend.api.routes import router
+from backend.api.routes import router, run_job
 from backend.core.logging import setup_logging
 from backend.core.config import get_settings
-from backend.db.connection import init_query_logs
+from backend.db.connection import dispose_pools, replicas, replica_monitor
+from backend.db.audit import audit_writer
+from backend.db.audit_store import init_audit_store, audit_maintainer, dispose_admin_pool
+from backend.db.catalog import catalog_refresher
+from backend.services.llm_client import llm_client
+from backend.services.offload import offload
+from backend.services.jobs import job_queue
+from backend.services.warmup import warm_up, warm_up_until_ready
 from backend.core.exceptions import GuardSQLException
 
 setup_logging()
@@ -17,13 +25,32 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting GuardSQL API")
-    try:
-        init_query_logs()
-        logger.info("Application started")
-    except Exception as e:
-        logger.error(f"Startup failed: {e}")
+    await llm_client.start()
+    offload.start()
+    if settings.audit_store_init:
+        try:
+            await init_audit_store()
+        except Exception as e:
+            logger.error(f"Query log store initialization failed: {e}")
+    ready = await warm_up()
+    audit_writer.start()
+    job_queue.start(run_job)
+    tasks = [asyncio.create_task(catalog_refresher()), asyncio.create_task(audit_maintainer())]
+    if replicas:
+        tasks.append(asyncio.create_task(replica_monitor()))
+    if not ready:
+        tasks.append(asyncio.create_task(warm_up_until_ready()))
+    logger.info("Application started")
     yield
     logger.info("Shutting down")
+    for task in tasks:
+        task.cancel()
+    await job_queue.stop()
+    await llm_client.close()
+    offload.close()
+    await audit_writer.stop()
+    await dispose_admin_pool()
+    await dispose_pools()
 
 app = FastAPI(
     title="GuardSQL",
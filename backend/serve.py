@@ -0,0 +1,70 @@
+"""Run the API with WORKERS uvicorn processes sharing one warm cache directory.
+
+    WORKERS=4 python -m backend.serve
+
+Before forking, the parent prepares the query log tables, loads the schema
+catalog into the shared store and creates the shared result cache, so workers
+start from the shared copies instead of each introspecting the database.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+def configure_shared_state():
+    settings = get_settings()
+    if settings.workers <= 1:
+        return
+    directory = settings.shared_state_dir or os.path.join(tempfile.gettempdir(), "guardsql")
+    os.makedirs(directory, exist_ok=True)
+    os.environ.setdefault("RESULT_CACHE_PATH", os.path.join(directory, "results.sqlite"))
+    os.environ.setdefault("CATALOG_CACHE_PATH", os.path.join(directory, "catalog.json"))
+    os.environ.setdefault("JOBS_SPOOL_DIR", os.path.join(directory, "jobs"))
+    get_settings.cache_clear()
+
+async def prefork_warmup():
+    from backend.db.audit_store import dispose_admin_pool, init_audit_store
+    from backend.db.catalog import refresh_catalog
+    from backend.db.connection import dispose_pools
+    from backend.services.result_cache import result_cache
+
+    try:
+        if get_settings().audit_store_init:
+            await init_audit_store()
+        catalog = await refresh_catalog(force=True)
+        logger.info(
+            f"Prefork warmup: {len(catalog.tables)} tables, "
+            f"result store {result_cache.store is not None}"
+        )
+    except Exception as e:
+        logger.error(f"Prefork warmup failed, workers will retry: {e}")
+    finally:
+        await dispose_admin_pool()
+        await dispose_pools()
+
+def main():
+    configure_shared_state()
+    settings = get_settings()
+    if settings.workers > 1:
+        from backend.core.logging import setup_logging
+        setup_logging()
+        asyncio.run(prefork_warmup())
+        # The parent already created or migrated the query log tables
+        os.environ["AUDIT_STORE_INIT"] = "false"
+
+    uvicorn.run(
+        "backend.main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.workers,
+        log_level=settings.log_level.lower()
+    )
+
+if __name__ == "__main__":
+    main()
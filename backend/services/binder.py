@@ -0,0 +1,166 @@
+import logging
+from typing import Optional
+
+from sqlglot import exp, parse_one
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from backend.core.config import get_settings
+from backend.core.exceptions import BindingError
+from backend.core.metrics import increment
+from backend.db.catalog import EXCLUDED_TABLES, SchemaCatalog
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+UNDEFINED_COLUMN = "42703"
+UNDEFINED_TABLE = "42P01"
+AMBIGUOUS_COLUMN = "42702"
+
+MAX_HINT_NAMES = 30
+
+def normalize(identifier: exp.Identifier) -> str:
+    return identifier.name if identifier.quoted else identifier.name.lower()
+
+def hint(kind: str, names) -> str:
+    names = sorted(names)
+    listed = ", ".join(names[:MAX_HINT_NAMES]) + (", ..." if len(names) > MAX_HINT_NAMES else "")
+    return f"\nHINT:  Available {kind}: {listed}."
+
+def unknown_column(name: str, qualifier: Optional[str], candidates) -> BindingError:
+    identifier = f"{qualifier}.{name}" if qualifier else name
+    if qualifier:
+        message = f"column {identifier} does not exist"
+    else:
+        message = f'column "{name}" does not exist'
+    return BindingError(
+        message + hint("columns", candidates), UNDEFINED_COLUMN, "undefined_column", identifier
+    )
+
+def source_columns(
+    node: exp.Expression, source, catalog: SchemaCatalog
+) -> Optional[frozenset[str]]:
+    """Column names a FROM entry exposes, None when they can't be known without the database."""
+    if node.alias_column_names:
+        return None
+    if isinstance(source, exp.Table):
+        # Tables of other schemas aren't in the catalog, and a view's columns aren't loaded
+        if not in_schema(source):
+            return None
+        return catalog.column_names.get(normalize(source.this))
+    if isinstance(source, Scope):
+        cte = source.expression.parent
+        if isinstance(cte, exp.CTE) and cte.alias_column_names:
+            return None
+        select = source.expression
+        while isinstance(select, exp.Union):
+            select = select.left
+        if not isinstance(select, exp.Select) or any(
+            isinstance(e, exp.Star) or (isinstance(e, exp.Column) and isinstance(e.this, exp.Star))
+            or not e.output_name for e in select.expressions
+        ):
+            return None
+        return frozenset(select.named_selects)
+    return None
+
+def using_columns(select: exp.Expression) -> Optional[set[str]]:
+    names = set()
+    for join in select.args.get("joins") or []:
+        if join.method == "NATURAL":
+            return None
+        names.update(normalize(identifier) for identifier in join.args.get("using") or [])
+    return names
+
+def in_schema(table: exp.Table) -> bool:
+    return isinstance(table.this, exp.Identifier) and table.db.lower() in ("", settings.schema_name)
+
+def check_tables(tree: exp.Expression, catalog: SchemaCatalog):
+    cte_names = {normalize(cte.args["alias"].this) for cte in tree.find_all(exp.CTE)}
+    for table in tree.find_all(exp.Table):
+        if not in_schema(table):
+            continue
+        name = normalize(table.this)
+        known = catalog.column_names.keys() | catalog.other_relations | EXCLUDED_TABLES
+        if name not in cte_names and name not in known:
+            raise BindingError(
+                f'relation "{name}" does not exist' + hint("tables", catalog.column_names),
+                UNDEFINED_TABLE, "undefined_table", name
+            )
+
+def resolve(column: exp.Column, scope: Scope, catalog: SchemaCatalog):
+    name = normalize(column.this)
+    qualifier = column.table.lower() or None
+    current = scope
+    while current is not None:
+        sources = {alias.lower(): entry for alias, entry in current.selected_sources.items()}
+        if qualifier is not None:
+            if qualifier in sources:
+                columns = source_columns(*sources[qualifier], catalog)
+                if columns is not None and name not in columns:
+                    raise unknown_column(name, qualifier, columns)
+                return
+        else:
+            owners = []
+            known = True
+            for alias, entry in sources.items():
+                columns = source_columns(*entry, catalog)
+                if columns is None:
+                    known = False
+                elif name in columns:
+                    owners.append(alias)
+            if len(owners) > 1:
+                shared = using_columns(current.expression)
+                if shared is not None and name not in shared:
+                    raise BindingError(
+                        f'column reference "{name}" is ambiguous\n'
+                        f'HINT:  It exists in {", ".join(owners)}.',
+                        AMBIGUOUS_COLUMN, "ambiguous_column", name
+                    )
+            # A table alias on its own is a whole-row reference, an output alias may be used in
+            # ORDER/GROUP BY
+            aliases = {
+                e.alias.lower() for e in current.expression.expressions if isinstance(e, exp.Alias)
+            }
+            if owners or not known or name in sources or name in aliases:
+                return
+        # Correlated subqueries see the FROM entries of the queries around them
+        current = current.parent
+
+    if qualifier is not None:
+        raise BindingError(
+            f'missing FROM-clause entry for table "{qualifier}"'
+            + hint("tables and aliases", scope.selected_sources),
+            UNDEFINED_TABLE, "undefined_table"
+        )
+    candidates = set()
+    for entry in scope.selected_sources.values():
+        candidates |= source_columns(*entry, catalog) or set()
+    raise unknown_column(name, None, candidates)
+
+def check_columns(tree: exp.Expression, catalog: SchemaCatalog):
+    resolved = set()
+    # Innermost scopes come first; their outer references are listed again by the enclosing scopes
+    for scope in traverse_scope(tree):
+        for column in scope.columns:
+            if id(column) in resolved or column.args.get("db"):
+                continue
+            if not isinstance(column.this, exp.Identifier):
+                continue
+            resolved.add(id(column))
+            resolve(column, scope, catalog)
+
+def bind(sql: str, catalog: SchemaCatalog, tree: Optional[exp.Expression] = None):
+    """Resolves every table and column against the catalog, raising BindingError like Postgres."""
+    if not settings.bind_check_enabled:
+        return
+    if tree is None:
+        tree = parse_one(sql, read="postgres")
+    try:
+        check_tables(tree, catalog)
+        check_columns(tree, catalog)
+    except BindingError as e:
+        increment("binding_errors")
+        logger.info(f"Binding failed: {str(e).splitlines()[0]}")
+        raise
+    except Exception as e:
+        # Constructs the scope analysis can't follow are left for the database to judge
+        logger.warning(f"Skipped binding check: {e}")
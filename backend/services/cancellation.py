@@ -0,0 +1,32 @@
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+statement_timeout: ContextVar[int] = ContextVar(
+    "statement_timeout", default=settings.statement_timeout_ms
+)
+
+def parse_overrides(spec: str) -> dict[tuple[str, str], int]:
+    overrides = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            target, value = item.rsplit("=", 1)
+            kind, name = target.strip().split(":", 1)
+            overrides[(kind.strip(), name.strip())] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring malformed statement timeout override: {item!r}")
+    return overrides
+
+OVERRIDES = parse_overrides(settings.statement_timeout_overrides)
+
+def timeout_for(route: str, user: Optional[str] = None) -> int:
+    if user is not None and ("user", user) in OVERRIDES:
+        return OVERRIDES[("user", user)]
+    return OVERRIDES.get(("route", route), settings.statement_timeout_ms)
@@ -1,22 +1,57 @@
 import logging
+from typing import AsyncIterator
 from sqlalchemy import text
 
-from backend.db.connection import engine
-from backend.core.exceptions import ExecutionError
+from backend.db.connection import connect
+from backend.core.exceptions import ExecutionError, QueryTimeoutError
+from backend.core.metrics import increment, span
+from backend.services.cancellation import statement_timeout
 
 logger = logging.getLogger(__name__)
 
-def execute_query(sql: str) -> tuple[list[dict], list[str]]:
+QUERY_CANCELED = "57014"
+
+def execution_error(e: Exception) -> ExecutionError:
+    sqlstate = getattr(getattr(e, "orig", None), "sqlstate", None)
+    if sqlstate == QUERY_CANCELED:
+        increment("statement_timeouts")
+        return QueryTimeoutError(f"Query exceeded the statement timeout: {e.orig}", sqlstate)
+    return ExecutionError(str(e), sqlstate)
+
+async def set_statement_timeout(conn, timeout_ms: int):
+    if timeout_ms:
+        await conn.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+async def execute_query(sql: str, timeout_ms: int = None) -> tuple[list[tuple], list[str]]:
+    if timeout_ms is None:
+        timeout_ms = statement_timeout.get()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(sql))
-            columns = list(result.keys())
-            rows = [dict(row._mapping) for row in result.fetchall()]
+        with span("db"):
+            async with connect("query") as conn:
+                await set_statement_timeout(conn, timeout_ms)
+                result = await conn.execute(text(sql))
+                columns = list(result.keys())
+                rows = [tuple(row) for row in result.fetchall()]
             
             logger.info(f"Query executed: {len(rows)} rows returned")
             return rows, columns
             
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"Query execution failed: {error_msg}")
-        raise ExecutionError(error_msg)
+        logger.error(f"Query execution failed: {e}")
+        raise execution_error(e)
+
+async def stream_query(sql: str, batch_size: int, timeout_ms: int = None) -> AsyncIterator:
+    if timeout_ms is None:
+        timeout_ms = statement_timeout.get()
+    try:
+        async with connect("query") as conn:
+            await set_statement_timeout(conn, timeout_ms)
+            result = await conn.stream(text(sql), execution_options={"yield_per": batch_size})
+            yield list(result.keys())
+            
+            async for batch in result.partitions():
+                yield batch
+                
+    except Exception as e:
+        logger.error(f"Query stream failed: {e}")
+        raise execution_error(e)
@@ -0,0 +1,233 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+
+from backend.core.config import get_settings
+from backend.core.metrics import current_timings, increment
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FINISHED = {"succeeded", "failed", "cancelled"}
+
+@dataclass
+class Job:
+    id: str
+    question: str
+    columnar: bool
+    priority: int
+    user: Optional[str]
+    status: str
+    created_at: float
+    expires_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage: Optional[str] = None
+    timings: Optional[dict[str, float]] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+class JobStore:
+    """Job metadata and response bodies as files, so any worker process can serve them."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def write(self, path: str, data: bytes):
+        partial = f"{path}.{os.getpid()}"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    def save(self, job: Job):
+        self.write(self.path(job.id, "json"), json.dumps(asdict(job)).encode())
+
+    def load(self, job_id: str) -> Optional[Job]:
+        try:
+            with open(self.path(job_id, "json")) as f:
+                return Job(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def save_result(self, job_id: str, body: bytes):
+        self.write(self.path(job_id, "body"), body)
+
+    def load_result(self, job_id: str) -> Optional[bytes]:
+        try:
+            with open(self.path(job_id, "body"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def purge_expired(self, now: float) -> int:
+        purged = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            job = self.load(name[:-len(".json")])
+            if job is not None and job.expires_at > now:
+                continue
+            for suffix in ("json", "body"):
+                try:
+                    os.remove(self.path(name[:-len(".json")], suffix))
+                except FileNotFoundError:
+                    pass
+            purged += 1
+        return purged
+
+Runner = Callable[[Job], Awaitable[tuple[int, bytes]]]
+
+class JobQueue:
+    def __init__(self, store: JobStore, concurrency: int, max_queued: int, ttl: int):
+        self.store = store
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.jobs: dict[str, Job] = {}
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.sequence = itertools.count()
+        self.running: dict[str, tuple[asyncio.Task, contextvars.Context]] = {}
+        self.tasks: list[asyncio.Task] = []
+        self.runner: Optional[Runner] = None
+
+    def start(self, runner: Runner):
+        self.runner = runner
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self.tasks.append(asyncio.create_task(self._clean()))
+        logger.info(f"Job queue started ({self.concurrency} workers, spool {self.store.directory})")
+
+    async def stop(self):
+        for task, _ in list(self.running.values()):
+            task.cancel()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    @property
+    def waiting(self) -> int:
+        return self.queue.qsize()
+
+    def submit(
+        self, question: str, columnar: bool, priority: int, user: Optional[str]
+    ) -> Optional[Job]:
+        if self.queue.qsize() >= self.max_queued:
+            return None
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex, question=question, columnar=columnar, priority=priority, user=user,
+            status="queued", created_at=now, expires_at=now + self.ttl
+        )
+        self.jobs[job.id] = job
+        self.store.save(job)
+        # Higher priority first, then first come first served
+        self.queue.put_nowait((-priority, next(self.sequence), job.id))
+        increment("jobs_submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Submitted to another worker process
+            return self.store.load(job_id)
+        running = self.running.get(job_id)
+        if running is not None:
+            timings = running[1].get(current_timings)
+            if timings is not None:
+                job.stage = timings.active
+                job.timings = timings.breakdown()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        running = self.running.get(job_id)
+        if running is not None:
+            running[0].cancel()
+        else:
+            body = json.dumps({"detail": "Cancelled before it started"}).encode()
+            self.store.save_result(job_id, body)
+            self.finish(job, "cancelled", 499, "Cancelled before it started")
+        return job
+
+    def finish(self, job: Job, status: str, status_code: int, error: Optional[str] = None):
+        job.status = status
+        job.status_code = status_code
+        job.error = error
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.ttl
+        self.store.save(job)
+        increment(f"jobs_{status}")
+
+    async def _work(self):
+        while True:
+            _, _, job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            self.store.save(job)
+            # The job's own context, so status requests can read its live stage timings
+            context = contextvars.copy_context()
+            task = asyncio.create_task(self.runner(job), context=context)
+            self.running[job_id] = (task, context)
+            try:
+                status_code, body = await task
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                status_code, body = 499, json.dumps({"detail": "Cancelled while running"}).encode()
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {e}")
+                status_code, body = 500, json.dumps({"detail": "Internal server error"}).encode()
+            finally:
+                self.running.pop(job_id, None)
+
+            timings = context.get(current_timings)
+            if timings is not None:
+                job.stage = None
+                job.timings = timings.breakdown()
+            self.store.save_result(job_id, body)
+            if status_code == 200:
+                self.finish(job, "succeeded", status_code)
+            else:
+                status = "cancelled" if status_code == 499 else "failed"
+                self.finish(job, status, status_code, json.loads(body).get("detail"))
+
+    async def _clean(self):
+        while True:
+            await asyncio.sleep(settings.jobs_cleanup_interval)
+            now = time.time()
+            for job_id in [j.id for j in self.jobs.values() if j.finished and j.expires_at <= now]:
+                del self.jobs[job_id]
+            try:
+                purged = self.store.purge_expired(now)
+                if purged:
+                    logger.info(f"Purged {purged} expired jobs")
+            except OSError as e:
+                logger.error(f"Job spool cleanup failed: {e}")
+
+job_queue = JobQueue(
+    JobStore(settings.jobs_spool_dir or os.path.join(tempfile.gettempdir(), "guardsql-jobs")),
+    concurrency=settings.jobs_concurrency,
+    max_queued=settings.jobs_max_queued,
+    ttl=settings.jobs_ttl
+)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from backend.core.config import get_settings
+from backend.core.exceptions import LLMSaturatedError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+@dataclass
+class Backend:
+    url: str
+    outstanding: int = 0
+    failures: int = 0
+    ejected_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+class LLMClient:
+    def __init__(
+        self,
+        base_urls: list[str],
+        max_concurrency: int,
+        max_queue: int,
+        timeout: float,
+        retry_after: int = 5,
+        eject_after: int = 3,
+        eject_seconds: float = 30,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.backends = [Backend(url.rstrip("/")) for url in base_urls]
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * len(self.backends),
+                    max_keepalive_connections=self.max_concurrency * len(self.backends)
+                ),
+                transport=self.transport
+            )
+            logger.info(f"LLM client started for {[b.url for b in self.backends]}")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @property
+    def in_flight(self) -> int:
+        return sum(b.outstanding for b in self.backends)
+
+    def _pick(self) -> Backend:
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.available(now)] or self.backends
+        return min(candidates, key=lambda b: (b.outstanding, b.failures))
+
+    def _record_failure(self, backend: Backend):
+        backend.failures += 1
+        if backend.failures >= self.eject_after:
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+            logger.warning(
+                f"Ejecting LLM backend {backend.url} for {self.eject_seconds}s "
+                f"after {backend.failures} failures"
+            )
+
+    def _record_success(self, backend: Backend):
+        if backend.failures:
+            logger.info(f"LLM backend {backend.url} recovered")
+        backend.failures = 0
+        backend.ejected_until = 0.0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Backend]:
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            raise LLMSaturatedError(
+                f"LLM backend saturated ({self.in_flight} running, {self.waiting} queued)",
+                retry_after=self.retry_after
+            )
+
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        await self.start()
+        backend = self._pick()
+        backend.outstanding += 1
+        try:
+            yield backend
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            if not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500:
+                self._record_failure(backend)
+            raise
+        else:
+            self._record_success(backend)
+        finally:
+            backend.outstanding -= 1
+            self.semaphore.release()
+
+def configured_base_urls() -> list[str]:
+    urls = [u.strip() for u in settings.ollama_base_urls.split(",") if u.strip()]
+    return urls or [settings.ollama_base_url]
+
+llm_client = LLMClient(
+    base_urls=configured_base_urls(),
+    max_concurrency=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    timeout=settings.ollama_timeout,
+    retry_after=settings.llm_retry_after,
+    eject_after=settings.llm_eject_after,
+    eject_seconds=settings.llm_eject_seconds
+)
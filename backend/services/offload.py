@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from backend.core.config import get_settings
+from backend.core.metrics import increment
+from backend.services.validator import ValidatedQuery, validate_keyed
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+def warm_worker():
+    # Pays sqlglot's import and first-parse cost before the first request lands on this worker
+    validate_keyed(
+        "SELECT c.customer_id FROM customers c JOIN orders o ON o.customer_id = c.customer_id"
+    )
+
+class Offload:
+    def __init__(self, mode: str, workers: int, max_pending: int):
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor: Optional[Executor] = None
+        self.threads: Optional[Executor] = None
+
+    def start(self):
+        if self.mode in ("thread", "process"):
+            self.threads = ThreadPoolExecutor(self.workers, thread_name_prefix="guardsql-offload")
+        if self.mode == "thread":
+            self.executor = self.threads
+        elif self.mode == "process":
+            # spawn, not fork: the parent has a running event loop and open sockets
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_worker
+            )
+        elif self.mode != "off":
+            raise ValueError(f"Unknown OFFLOAD_MODE {self.mode!r}; use off, thread or process")
+        if self.executor is not None:
+            logger.info(
+                f"CPU offload: {self.workers} {self.mode} workers, "
+                f"{self.max_pending} pending at most"
+            )
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        return await self._submit(self.executor, fn, args)
+
+    async def run_in_thread(self, fn: Callable[..., T], *args) -> T:
+        # For work on large arguments: pickling them to a process costs more than the work itself
+        return await self._submit(self.threads, fn, args)
+
+    async def _submit(self, executor: Optional[Executor], fn: Callable[..., T], args) -> T:
+        if executor is None:
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            # A full pool would only add queueing delay on top of the work itself
+            increment("offload_inline")
+            return fn(*args)
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def warm(self):
+        if self.executor is not None:
+            await asyncio.gather(*(self.run(warm_worker) for _ in range(self.workers)))
+
+    def close(self):
+        for executor in {self.executor, self.threads} - {None}:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self.threads = None
+
+offload = Offload(settings.offload_mode, settings.offload_workers, settings.offload_max_pending)
+
+async def validate_offloaded(sql: str, limit: int = 100) -> ValidatedQuery:
+    # The tree comes back with the result, so binding and repair don't parse the SQL again on
+    # the loop; from a process worker it is unpickled, several times cheaper than a parse
+    return await offload.run(validate_keyed, sql, limit)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+
+from backend.core.config import get_settings
+from backend.core.exceptions import PlanRejectedError
+from backend.core.metrics import increment, span
+from backend.db.connection import connect
+from backend.services.executor import execution_error
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+@dataclass
+class PlanEstimate:
+    total_cost: float
+    rows: int
+    max_rows: int
+    node_types: list[str]
+
+    def describe(self) -> str:
+        nodes = ", ".join(dict.fromkeys(self.node_types))
+        return f"plan: {nodes}"
+
+# Nodes that read all of their input before returning a row, even under a Limit
+BLOCKING_NODES = {"Sort", "Aggregate", "Hash", "SetOp"}
+
+def parse_plan(explain_output) -> PlanEstimate:
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    root = explain_output[0]["Plan"]
+
+    node_types = []
+    max_rows = 0
+    stack = [(root, False)]
+    while stack:
+        node, limited = stack.pop()
+        node_types.append(node["Node Type"])
+        # Below a Limit a scan or join stops after the first rows, so its estimate for the full
+        # relation says nothing about the work done (every query gets an automatic LIMIT)
+        if not limited:
+            max_rows = max(max_rows, int(node.get("Plan Rows", 0)))
+        if node["Node Type"] == "Limit":
+            limited = True
+        elif node["Node Type"] in BLOCKING_NODES:
+            limited = False
+        stack.extend(
+            (child, limited and child.get("Parent Relationship") != "InitPlan")
+            for child in reversed(node.get("Plans", []))
+        )
+
+    return PlanEstimate(
+        total_cost=float(root["Total Cost"]),
+        rows=int(root["Plan Rows"]),
+        max_rows=max_rows,
+        node_types=node_types
+    )
+
+def over_threshold(estimate: PlanEstimate) -> Optional[str]:
+    if estimate.total_cost > settings.plan_max_cost:
+        return f"estimated cost {estimate.total_cost:.0f} exceeds {settings.plan_max_cost:.0f}"
+    if estimate.max_rows > settings.plan_max_rows:
+        return f"estimated {estimate.max_rows} intermediate rows exceeds {settings.plan_max_rows}"
+    return None
+
+def plan_rejected(reason: str, plan: PlanEstimate) -> PlanRejectedError:
+    return PlanRejectedError(
+        f"Query plan too expensive: {reason} ({plan.describe()}). "
+        "Rewrite it to avoid cartesian joins and full scans, filter earlier or aggregate less data."
+    )
+
+class PlanCache:
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[PlanEstimate, float]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[PlanEstimate]:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        estimate, expires_at = item
+        if expires_at <= time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return estimate
+
+    def put(self, key: str, estimate: PlanEstimate):
+        self.entries[key] = (estimate, time.time() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+plan_cache = PlanCache(max_entries=settings.plan_cache_size, ttl=settings.plan_cache_ttl)
+expensive_lane = asyncio.Semaphore(settings.plan_queue_concurrency)
+
+async def explain(sql: str) -> PlanEstimate:
+    try:
+        with span("plan"):
+            async with connect("query") as conn:
+                output = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+    except Exception as e:
+        logger.error(f"EXPLAIN failed: {e}")
+        raise execution_error(e)
+    return parse_plan(output)
+
+async def estimate(sql: str, key: str) -> PlanEstimate:
+    cached = plan_cache.get(key)
+    if cached is not None:
+        increment("plan_cache_hits")
+        return cached
+    result = await explain(sql)
+    plan_cache.put(key, result)
+    return result
+
+@asynccontextmanager
+async def admission(sql: str, key: str) -> AsyncIterator[Optional[PlanEstimate]]:
+    if not settings.plan_check_enabled:
+        yield None
+        return
+
+    plan = await estimate(sql, key)
+    reason = over_threshold(plan)
+    if reason is None:
+        yield plan
+        return
+
+    if settings.plan_mode != "queue":
+        increment("plan_rejected")
+        logger.warning(f"Planner rejected query: {reason}")
+        raise plan_rejected(reason, plan)
+
+    increment("plan_queued")
+    logger.info(f"Queueing expensive query: {reason}")
+    try:
+        await asyncio.wait_for(expensive_lane.acquire(), timeout=settings.plan_queue_timeout)
+    except asyncio.TimeoutError:
+        increment("plan_rejected")
+        raise PlanRejectedError(
+            "Query plan too expensive and the expensive-query queue is full: "
+            f"{reason} ({plan.describe()})"
+        )
+    try:
+        yield plan
+    finally:
+        expensive_lane.release()
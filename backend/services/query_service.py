@@ -1,65 +1,166 @@
+import asyncio
 import logging
 import time
+from typing import Callable, Optional
 
-from backend.services.llm import generate_sql
-from backend.services.validator import validate_sql
-from backend.services.executor import execute_query
-from backend.db.connection import get_schema, log_query
+from backend.services.llm import build_prompt, estimate_tokens, generate_shared
+from backend.services.schema_retriever import retrieve_schema
+from backend.services.binder import bind
+from backend.services.offload import validate_offloaded
+from backend.services.result_cache import execute_cached
+from backend.services.repair import classify, repair_query, tracked
+from backend.services.sql_memo import sql_memo
+from backend.db.audit import log_query
+from backend.db.catalog import SchemaCatalog, get_catalog
+from backend.core.config import get_settings
 from backend.core.exceptions import ValidationError, ExecutionError, LLMError
+from backend.core.metrics import increment, span, start_timings
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-async def process_query(question: str) -> dict:
+def generation_stats(generation) -> dict:
+    return {
+        "llm_ttft_ms": generation.ttft_ms,
+        "llm_tokens_per_sec": generation.tokens_per_sec
+    }
+
+async def process_query(
+    question: str, on_partial: Callable[[str], None] = None, catalog: Optional[SchemaCatalog] = None
+) -> dict:
     start_time = time.time()
-    schema = get_schema()
+    timings = start_timings()
+    increment("queries")
+    with span("catalog"):
+        if catalog is None:
+            catalog = await get_catalog()
+    with span("schema"):
+        context = retrieve_schema(question, catalog)
+    schema = context.text
+    with span("prompt"):
+        prompt_stats = {
+            "prompt_tokens": estimate_tokens(build_prompt(question, schema)),
+            "schema_tables": len(context.tables),
+            "schema_pruning_ratio": context.pruning_ratio
+        }
+    
+    memo = None
+    llm_stats = {}
     
     try:
-        sql = await generate_sql(question, schema)
-        validated_sql = validate_sql(sql)
+        with span("memo"):
+            memo_hit = None
+            if settings.sql_memo_enabled:
+                await sql_memo.ensure(catalog.fingerprint)
+                memo_hit = sql_memo.lookup(question, catalog.fingerprint)
+        if memo_hit:
+            sql, memo = memo_hit
+            logger.info(f"Using memoized SQL ({memo} match)")
+        else:
+            with span("llm"):
+                generation = await generate_shared(
+                    question, schema, catalog.fingerprint, on_partial=on_partial
+                )
+            sql = generation.sql
+            llm_stats = generation_stats(generation)
+        with span("validate"):
+            validated = await validate_offloaded(sql)
+        validated_sql = validated.sql
         
         try:
-            rows, columns = execute_query(validated_sql)
+            with span("bind"):
+                bind(validated_sql, catalog, validated.tree)
+            with span("execute"):
+                rows, columns, cached = await execute_cached(validated, catalog.fingerprint)
             exec_time = int((time.time() - start_time) * 1000)
             
-            log_query(question, validated_sql, "success", None, exec_time)
+            await log_query(
+                question, validated_sql, "success", None, exec_time, catalog.fingerprint,
+                timings.stages
+            )
+            sql_memo.remember(question, validated_sql, catalog.fingerprint)
             
             return {
                 "sql": validated_sql,
-                "results": rows,
+                "rows": rows,
                 "columns": columns,
                 "row_count": len(rows),
-                "execution_time_ms": exec_time
+                "execution_time_ms": exec_time,
+                "cached": cached,
+                "memo": memo,
+                "timings": timings.breakdown(),
+                **prompt_stats,
+                **llm_stats
             }
             
         except ExecutionError as e:
-            logger.info("Retrying with error context")
+            failure = classify(e)
+            logger.info(f"Repairing {failure.kind} failure")
+            increment("queries_retried")
+            timings.prefix = "retry_"
+            if memo == "exact":
+                sql_memo.forget(question)
+            memo = None
             
-            retry_sql = await generate_sql(question, schema, error_context=str(e))
-            validated_retry_sql = validate_sql(retry_sql)
-            
-            rows, columns = execute_query(validated_retry_sql)
+            with tracked(failure):
+                repair = await repair_query(
+                    question, schema, catalog, validated_sql, failure, on_partial
+                )
+                validated_retry_sql = repair.query.sql
+                if repair.generation is not None:
+                    llm_stats = generation_stats(repair.generation)
+                
+                with span("execute"):
+                    rows, columns, cached = await execute_cached(repair.query, catalog.fingerprint)
             exec_time = int((time.time() - start_time) * 1000)
             
-            log_query(question, validated_retry_sql, "success_retry", None, exec_time)
+            # A schema-matched identifier is a guess that worked once; only the LLM's answer is
+            # worth reusing, so the fix gets its own status and the memo never loads it back
+            status = "success_retry" if repair.generation is not None else "success_fixed"
+            await log_query(
+                question, validated_retry_sql, status, None, exec_time, catalog.fingerprint,
+                timings.stages
+            )
+            if repair.generation is not None:
+                sql_memo.remember(question, validated_retry_sql, catalog.fingerprint)
             
             return {
                 "sql": validated_retry_sql,
-                "results": rows,
+                "rows": rows,
                 "columns": columns,
                 "row_count": len(rows),
-                "execution_time_ms": exec_time
+                "execution_time_ms": exec_time,
+                "cached": cached,
+                "memo": memo,
+                "timings": timings.breakdown(),
+                **prompt_stats,
+                **llm_stats
             }
     
     except ValidationError as e:
-        log_query(question, sql if 'sql' in locals() else "", "validation_error", str(e))
+        await log_query(
+            question, sql if 'sql' in locals() else "", "validation_error", str(e),
+            timings=timings.stages
+        )
         raise
     except ExecutionError as e:
-        log_query(question, validated_retry_sql if 'validated_retry_sql' in locals() else validated_sql, "execution_error", str(e))
+        await log_query(
+            question, validated_retry_sql if 'validated_retry_sql' in locals() else validated_sql,
+            "execution_error", str(e), timings=timings.stages
+        )
         raise
     except LLMError as e:
-        log_query(question, "", "llm_error", str(e))
+        await log_query(question, "", "llm_error", str(e), timings=timings.stages)
+        raise
+    except asyncio.CancelledError:
+        increment("queries_cancelled")
+        logger.info(f"Query cancelled: {question[:100]}")
+        await asyncio.shield(log_query(
+            question, validated_sql if 'validated_sql' in locals() else "", "cancelled",
+            "Request abandoned", timings=timings.stages
+        ))
         raise
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        log_query(question, "", "error", str(e))
+        await log_query(question, "", "error", str(e), timings=timings.stages)
         raise
@@ -0,0 +1,377 @@
+import asyncio
+import difflib
+import logging
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlglot import exp, parse_one
+
+from backend.core.config import get_settings
+from backend.core.exceptions import (
+    BindingError, ExecutionError, GuardSQLException, PlanRejectedError, QueryTimeoutError,
+    ValidationError
+)
+from backend.core.metrics import current_timings, increment, snapshot, span
+from backend.db.catalog import SchemaCatalog, Table
+from backend.services.binder import bind
+from backend.services.llm import Generation, generate_shared, generate_sql
+from backend.services.offload import validate_offloaded
+from backend.services.planner import explain, over_threshold, plan_cache, plan_rejected
+from backend.services.result_cache import cache_key
+from backend.services.validator import ValidatedQuery, canonicalize
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+KINDS = (
+    "undefined_column", "undefined_table", "ambiguous_column", "undefined_function",
+    "type_mismatch", "timeout", "plan_rejected", "other"
+)
+
+# Checked before the SQLSTATE, which is shared by e.g. unknown functions and operator type
+# mismatches
+PATTERNS = [
+    ("undefined_column", re.compile(r'column "?([\w.]+)"? does not exist')),
+    ("undefined_table", re.compile(r'relation "([^"]+)" does not exist')),
+    ("ambiguous_column", re.compile(r'column reference "([^"]+)" is ambiguous')),
+    ("undefined_function", re.compile(r'function ([\w.]+)\(.*\) does not exist')),
+    ("type_mismatch", re.compile(
+        r'operator does not exist|invalid input syntax for type'
+        r'|is of type .* but expression is of type'
+    )),
+]
+
+SQLSTATE_KINDS = {
+    "42703": "undefined_column",
+    "42P01": "undefined_table",
+    "42702": "ambiguous_column",
+    "42883": "undefined_function",
+    "42804": "type_mismatch",
+    "22P02": "type_mismatch",
+    "22007": "type_mismatch",
+    "57014": "timeout",
+}
+
+GUIDANCE = {
+    "undefined_column": "Use only columns the schema lists for each table.",
+    "undefined_table": "Use only tables listed in the schema.",
+    "ambiguous_column": "Qualify every column with its table name or alias.",
+    "undefined_function": "Use only built-in PostgreSQL functions.",
+    "type_mismatch": "Compare values of the same type and add explicit casts where needed.",
+    "timeout": (
+        "The query was too slow: filter earlier, avoid cartesian joins and aggregate less data."
+    ),
+}
+
+MAX_IDENTIFIER_FIXES = 3
+
+SQLALCHEMY_PREFIX = re.compile(r"^\([\w.]+\) (?:<class '[\w.]+'>: )?")
+HINT_COLUMN = re.compile(r'Perhaps you meant to reference the column "([\w.]+)"')
+
+@dataclass
+class Failure:
+    kind: str
+    message: str
+    identifier: Optional[str] = None
+    hint: Optional[str] = None
+
+    def error_context(self) -> str:
+        guidance = GUIDANCE.get(self.kind)
+        return f"{self.message}\n{guidance}" if guidance else self.message
+
+@dataclass
+class Repair:
+    query: ValidatedQuery
+    method: str
+    generation: Optional[Generation] = None
+
+def error_message(error: Exception) -> str:
+    message = str(error).split("\n[SQL:")[0]
+    return SQLALCHEMY_PREFIX.sub("", message).strip()
+
+def classify(error: ExecutionError) -> Failure:
+    message = error_message(error)
+    if isinstance(error, BindingError):
+        return Failure(error.kind, message, error.identifier and error.identifier.lower())
+    if isinstance(error, PlanRejectedError):
+        kind = "plan_rejected"
+    elif isinstance(error, QueryTimeoutError):
+        kind = "timeout"
+    else:
+        kind = next((k for k, pattern in PATTERNS if pattern.search(message)), None)
+        kind = kind or SQLSTATE_KINDS.get(getattr(error, "sqlstate", None), "other")
+
+    identifier = None
+    pattern = dict(PATTERNS).get(kind)
+    match = pattern.search(message) if pattern is not None else None
+    if match and match.groups():
+        identifier = match.group(1).lower()
+    hint = HINT_COLUMN.search(message)
+    return Failure(kind, message, identifier, hint.group(1).lower() if hint else None)
+
+def scope_tables(tree: exp.Expression, catalog: SchemaCatalog) -> dict[str, Table]:
+    return {
+        table.alias_or_name: catalog.tables[table.name]
+        for table in tree.find_all(exp.Table) if table.name in catalog.tables
+    }
+
+TYPE_FAMILIES = [
+    ("numeric", ("int", "numeric", "decimal", "real", "double", "money", "serial")),
+    ("text", ("char", "text", "uuid")),
+    ("datetime", ("date", "time", "interval")),
+    ("boolean", ("bool",)),
+]
+NUMERIC_CONTEXTS = (exp.Sum, exp.Avg, exp.Add, exp.Sub, exp.Mul, exp.Div)
+DATE_LITERAL = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+def type_family(data_type: str) -> str:
+    data_type = data_type.lower()
+    for family, markers in TYPE_FAMILIES:
+        if any(marker in data_type for marker in markers):
+            return family
+    return "other"
+
+def expected_family(column: exp.Column) -> Optional[str]:
+    """The type family a column's surroundings call for, None when they don't tell."""
+    parent = column.parent
+    if isinstance(parent, NUMERIC_CONTEXTS):
+        return "numeric"
+    if isinstance(parent, (exp.Like, exp.ILike)):
+        return "text"
+    if isinstance(parent, (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE)):
+        other = parent.expression if parent.this is column else parent.this
+        if isinstance(other, exp.Literal):
+            if not other.is_string:
+                return "numeric"
+            return "datetime" if DATE_LITERAL.match(other.name) else "text"
+    return None
+
+def closest(name: str, candidates: list[str]) -> Optional[str]:
+    # Only an unambiguous near miss: customer_name is not a typo of customer_id
+    matches = difflib.get_close_matches(name, candidates, n=2, cutoff=settings.repair_match_cutoff)
+    return matches[0] if len(matches) == 1 else None
+
+def fix_column(tree: exp.Expression, failure: Failure, catalog: SchemaCatalog) -> bool:
+    qualifier, _, name = failure.identifier.rpartition(".")
+    tables = scope_tables(tree, catalog)
+    if qualifier:
+        if qualifier not in tables:
+            return False
+        candidates = {c.name: c.data_type for c in tables[qualifier].columns}
+    else:
+        candidates = {c.name: c.data_type for t in tables.values() for c in t.columns}
+
+    suggested = failure.hint.rpartition(".")[2] if failure.hint else None
+    replacement = suggested if suggested in candidates else closest(name, list(candidates))
+    if replacement is None:
+        return False
+    columns = [
+        c for c in tree.find_all(exp.Column)
+        if c.name.lower() == name and (not qualifier or c.table.lower() == qualifier)
+    ]
+    family = type_family(candidates[replacement])
+    if any(expected_family(c) not in (None, family) for c in columns):
+        return False
+    for column in columns:
+        column.set("this", exp.to_identifier(replacement))
+    return bool(columns)
+
+def fix_table(tree: exp.Expression, failure: Failure, catalog: SchemaCatalog) -> bool:
+    name = failure.identifier.rpartition(".")[2]
+    replacement = closest(name, list(catalog.tables))
+    if replacement is None:
+        return False
+    tables = [t for t in tree.find_all(exp.Table) if t.name.lower() == name]
+    if not any(t.alias for t in tables):
+        for column in list(tree.find_all(exp.Column)):
+            if column.table.lower() == name:
+                column.set("table", exp.to_identifier(replacement))
+    for table in tables:
+        table.set("this", exp.to_identifier(replacement))
+    return bool(tables)
+
+def joined_on(tree: exp.Expression, name: str) -> bool:
+    """True when every join is inner and one of them equates the column across two tables."""
+    joins = list(tree.find_all(exp.Join))
+    if any(join.side or join.method for join in joins):
+        return False
+    return any(
+        isinstance(eq.this, exp.Column) and isinstance(eq.expression, exp.Column)
+        and eq.this.name.lower() == name == eq.expression.name.lower()
+        for join in joins if join.args.get("on") for eq in join.args["on"].find_all(exp.EQ)
+    )
+
+def fix_ambiguous(tree: exp.Expression, failure: Failure, catalog: SchemaCatalog) -> bool:
+    # Only inner-join keys are equal on every side, so only then is the first table as good as any;
+    # below an outer join the key of the optional side is NULL for the unmatched rows
+    if not joined_on(tree, failure.identifier):
+        return False
+    owners = [
+        alias for alias, table in scope_tables(tree, catalog).items()
+        if any(c.name == failure.identifier for c in table.columns)
+    ]
+    if not owners:
+        return False
+    columns = [
+        c for c in tree.find_all(exp.Column) if not c.table and c.name.lower() == failure.identifier
+    ]
+    for column in columns:
+        column.set("table", exp.to_identifier(owners[0]))
+    return bool(columns)
+
+FIXERS = {
+    "undefined_column": fix_column,
+    "undefined_table": fix_table,
+    "ambiguous_column": fix_ambiguous,
+}
+
+def fix_identifiers(sql: str, failure: Failure, catalog: SchemaCatalog) -> Optional[str]:
+    fixer = FIXERS.get(failure.kind)
+    if fixer is None or not failure.identifier:
+        return None
+    try:
+        tree = parse_one(sql, read="postgres")
+    except Exception:
+        return None
+    if not fixer(tree, failure, catalog):
+        return None
+    return tree.sql(dialect="postgres")
+
+async def dry_run(query: ValidatedQuery, catalog: SchemaCatalog):
+    bind(query.sql, catalog, query.tree)
+    plan = await explain(query.sql)
+    # Admission finds the plan in the cache instead of running EXPLAIN again
+    query.canonical = query.canonical or canonicalize(query.tree)
+    plan_cache.put(cache_key(query.canonical[0], catalog.fingerprint), plan)
+    # Admission would reject it anyway; failing here lets a race go on to a cheaper candidate
+    reason = over_threshold(plan)
+    if reason is not None and settings.plan_check_enabled and settings.plan_mode != "queue":
+        raise plan_rejected(reason, plan)
+
+async def fix_query(sql: str, failure: Failure, catalog: SchemaCatalog) -> Optional[ValidatedQuery]:
+    # Binding is cheap, so a statement with several wrong identifiers is fixed one binding error
+    # at a time
+    for _ in range(MAX_IDENTIFIER_FIXES):
+        fixed = fix_identifiers(sql, failure, catalog)
+        if fixed is None:
+            return None
+        try:
+            with span("validate"):
+                query = await validate_offloaded(fixed)
+            await dry_run(query, catalog)
+        except BindingError as e:
+            sql, failure = fixed, classify(e)
+            continue
+        except (ValidationError, ExecutionError) as e:
+            logger.info(f"Identifier fix failed, asking the LLM: {e}")
+            return None
+        increment("repair_identifier_fixes")
+        logger.info(f"Repaired {failure.kind} {failure.identifier} without the LLM")
+        return query
+    return None
+
+async def generate_candidate(
+    question: str,
+    schema: str,
+    catalog: SchemaCatalog,
+    error_context: str,
+    on_partial: Callable[[str], None] = None,
+    temperature: Optional[float] = None
+) -> tuple[ValidatedQuery, Generation]:
+    with span("llm"):
+        if temperature is None:
+            generation = await generate_shared(
+                question, schema, catalog.fingerprint, error_context, on_partial
+            )
+        else:
+            generation = await generate_sql(
+                question, schema, error_context, temperature=temperature
+            )
+    with span("validate"):
+        query = await validate_offloaded(generation.sql)
+    return query, generation
+
+async def race_candidates(
+    question: str,
+    schema: str,
+    catalog: SchemaCatalog,
+    error_context: str,
+    on_partial: Callable[[str], None] = None
+) -> tuple[ValidatedQuery, Generation]:
+    async def candidate(index: int):
+        # Spans from concurrent candidates would interleave, the caller times the race as a whole
+        current_timings.set(None)
+        if index == 0:
+            result = await generate_candidate(question, schema, catalog, error_context, on_partial)
+        else:
+            result = await generate_candidate(
+                question, schema, catalog, error_context, temperature=settings.repair_temperature
+            )
+        await dry_run(result[0], catalog)
+        return result
+
+    tasks = [asyncio.create_task(candidate(i)) for i in range(settings.repair_candidates)]
+    increment("repair_candidates", len(tasks))
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except GuardSQLException as e:
+                increment("repair_candidates_rejected")
+                logger.info(f"Repair candidate rejected: {e}")
+        raise tasks[0].exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def repair_query(
+    question: str,
+    schema: str,
+    catalog: SchemaCatalog,
+    sql: str,
+    failure: Failure,
+    on_partial: Callable[[str], None] = None
+) -> Repair:
+    if settings.repair_fix_identifiers:
+        query = await fix_query(sql, failure, catalog)
+        if query is not None:
+            return Repair(query, "fix_identifiers")
+
+    error_context = failure.error_context()
+    if settings.repair_candidates > 1:
+        with span("llm"):
+            query, generation = await race_candidates(
+                question, schema, catalog, error_context, on_partial
+            )
+    else:
+        query, generation = await generate_candidate(
+            question, schema, catalog, error_context, on_partial
+        )
+        with span("bind"):
+            bind(query.sql, catalog, query.tree)
+    return Repair(query, "llm", generation)
+
+@contextmanager
+def tracked(failure: Failure):
+    try:
+        yield
+    except Exception:
+        increment(f"repair_{failure.kind}_failed")
+        raise
+    increment(f"repair_{failure.kind}_repaired")
+
+def repair_rates() -> dict[str, dict[str, float]]:
+    counts = snapshot()
+    rates = {}
+    for kind in KINDS:
+        repaired = counts.get(f"repair_{kind}_repaired", 0)
+        attempts = repaired + counts.get(f"repair_{kind}_failed", 0)
+        if attempts:
+            rates[kind] = {
+                "attempts": attempts,
+                "repaired": repaired,
+                "success_rate": round(repaired / attempts, 3),
+            }
+    return rates
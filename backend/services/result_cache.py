@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from backend.core.config import get_settings
+from backend.services.executor import execute_query
+from backend.services.planner import admission
+from backend.services.singleflight import SingleFlight
+from backend.services.serialization import to_columnar, from_columnar, dumps, loads
+from backend.services.validator import ValidatedQuery, canonicalize
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ORPHANED_TABLES_SQL = "DELETE FROM result_tables WHERE key NOT IN (SELECT key FROM results)"
+
+@dataclass
+class CacheEntry:
+    rows: list[tuple]
+    columns: list[str]
+    tables: frozenset[str]
+    expires_at: float
+
+class SQLiteStore:
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS result_tables (
+                    table_name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (table_name, key)
+                )
+            """)
+            # Bumped on every invalidation so other processes drop their in-memory copies
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS generation "
+                "(id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self.conn.execute("INSERT OR IGNORE INTO generation (id, value) VALUES (1, 0)")
+
+    def generation(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT value FROM generation WHERE id = 1").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, expires_at FROM results WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        payload = loads(row[0])
+        data = payload["data"]
+        tables = frozenset(payload["tables"])
+        return CacheEntry(from_columnar(data), data["columns"], tables, row[1])
+
+    def put(self, key: str, entry: CacheEntry):
+        payload = dumps({
+            "data": to_columnar(entry.rows, entry.columns),
+            "tables": sorted(entry.tables)
+        })
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, entry.expires_at)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO result_tables (table_name, key) VALUES (?, ?)",
+                [(table, key) for table in entry.tables]
+            )
+            self.conn.execute(
+                "DELETE FROM results WHERE expires_at <= ? OR key NOT IN "
+                "(SELECT key FROM results ORDER BY expires_at DESC LIMIT ?)",
+                (time.time(), self.max_entries)
+            )
+            self.conn.execute(ORPHANED_TABLES_SQL)
+            self.conn.execute("COMMIT")
+
+    def invalidate_tables(self, tables: set[str]) -> int:
+        marks = ",".join("?" * len(tables))
+        with self.lock:
+            self.conn.execute("BEGIN")
+            deleted = self.conn.execute(
+                "DELETE FROM results WHERE key IN "
+                f"(SELECT key FROM result_tables WHERE table_name IN ({marks}))",
+                tuple(tables)
+            ).rowcount
+            self.conn.execute(ORPHANED_TABLES_SQL)
+            self.conn.execute("UPDATE generation SET value = value + 1 WHERE id = 1")
+            self.conn.execute("COMMIT")
+        return deleted
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM results")
+            self.conn.execute("DELETE FROM result_tables")
+            self.conn.execute("UPDATE generation SET value = value + 1 WHERE id = 1")
+            self.conn.execute("COMMIT")
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl: int, store: Optional[SQLiteStore] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.table_keys: dict[str, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.generation = store.generation() if store is not None else 0
+
+    def _sync_generation(self):
+        generation = self.store.generation()
+        if generation != self.generation:
+            self.entries.clear()
+            self.table_keys.clear()
+            self.generation = generation
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        if self.store is not None:
+            self._sync_generation()
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at <= time.time():
+            self._evict(key)
+            entry = None
+
+        if entry is None and self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self._insert(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, tables: frozenset[str], rows: list[tuple], columns: list[str]):
+        entry = CacheEntry(rows, columns, tables, time.time() + self.ttl)
+        self._insert(key, entry)
+        if self.store is not None:
+            self.store.put(key, entry)
+
+    def _insert(self, key: str, entry: CacheEntry):
+        if key in self.entries:
+            self._evict(key)
+        self.entries[key] = entry
+        for table in entry.tables:
+            self.table_keys.setdefault(table, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._evict(next(iter(self.entries)))
+
+    def _evict(self, key: str):
+        entry = self.entries.pop(key)
+        for table in entry.tables:
+            keys = self.table_keys.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.table_keys[table]
+
+    def invalidate_tables(self, tables: set[str]) -> int:
+        keys = set()
+        for table in tables:
+            keys |= self.table_keys.get(table, set())
+        for key in keys:
+            self._evict(key)
+        if self.store is not None:
+            self.store.invalidate_tables(tables)
+        if keys:
+            logger.info(f"Result cache invalidated {len(keys)} entries for {sorted(tables)}")
+        return len(keys)
+
+    def clear(self) -> int:
+        count = len(self.entries)
+        self.entries.clear()
+        self.table_keys.clear()
+        if self.store is not None:
+            self.store.clear()
+        return count
+
+result_cache = ResultCache(
+    max_entries=settings.result_cache_size,
+    ttl=settings.result_cache_ttl,
+    store=SQLiteStore(settings.result_cache_path, settings.result_cache_store_size)
+    if settings.result_cache_path else None
+)
+
+db_flight = SingleFlight("db")
+
+def cache_key(canonical_sql: str, schema_fingerprint: str) -> str:
+    return hashlib.sha256(f"{schema_fingerprint}:{canonical_sql}".encode()).hexdigest()
+
+async def execute_cached(
+    query: ValidatedQuery, schema_fingerprint: str
+) -> tuple[list[tuple], list[str], bool]:
+    sql = query.sql
+    canonical_sql, tables = query.canonical or canonicalize(query.tree)
+    key = cache_key(canonical_sql, schema_fingerprint)
+
+    if not settings.result_cache_enabled:
+        async def execute_admitted():
+            async with admission(sql, key):
+                return await execute_query(sql)
+
+        rows, columns = await db_flight.do(key, execute_admitted)
+        return rows, columns, False
+
+    entry = result_cache.get(key)
+    if entry is not None:
+        logger.info(f"Result cache hit: {len(entry.rows)} rows")
+        return entry.rows, entry.columns, True
+
+    async def execute_and_store():
+        async with admission(sql, key):
+            rows, columns = await execute_query(sql)
+        if len(rows) <= settings.result_cache_max_rows:
+            result_cache.put(key, tables, rows, columns)
+        return rows, columns
+
+    rows, columns = await db_flight.do(key, execute_and_store)
+    return rows, columns, False
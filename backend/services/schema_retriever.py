@@ -0,0 +1,174 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from backend.core.config import get_settings
+from backend.db.catalog import SchemaCatalog, Table
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "as", "at", "be", "by", "each", "for", "from", "get",
+    "give", "has", "have", "how", "i", "in", "is", "it", "list", "many", "me", "much", "of", "on",
+    "or", "per", "show", "tell", "than", "that", "the", "their", "there", "to", "we", "what",
+    "which", "who", "with",
+}
+
+TYPE_ALIASES = {
+    "character varying": "varchar",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+    "double precision": "float8",
+}
+
+TABLE_NAME_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_JOIN_HOPS = 3
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> list[str]:
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    words = re.findall(r"[a-z]+|\d+", text.lower())
+    return [_stem(w) for w in words if w not in STOPWORDS]
+
+def _short_type(data_type: str) -> str:
+    for long, short in TYPE_ALIASES.items():
+        if data_type.startswith(long):
+            return short + data_type[len(long):]
+    return data_type
+
+def render_table(table: Table) -> str:
+    fk_targets = {fk.column: f"{fk.ref_table}.{fk.ref_column}" for fk in table.foreign_keys}
+    col_defs = []
+    for col in table.columns:
+        col_def = f"{col.name} {_short_type(col.data_type)}"
+        if col.name in table.primary_key:
+            col_def += " PK"
+        if col.name in fk_targets:
+            col_def += f" -> {fk_targets[col.name]}"
+        col_defs.append(col_def)
+
+    line = f"{table.name}({', '.join(col_defs)})"
+    if table.comment:
+        line += f" -- {table.comment}"
+    return line
+
+@dataclass
+class SchemaContext:
+    text: str
+    tables: list[str]
+    total_tables: int
+    pruning_ratio: float
+
+class SchemaIndex:
+    def __init__(self, catalog: SchemaCatalog):
+        self.catalog = catalog
+        self.postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: dict[str, int] = {}
+        self.neighbours: dict[str, set[str]] = defaultdict(set)
+
+        for table in catalog.tables.values():
+            for fk in table.foreign_keys:
+                if fk.ref_table in catalog.tables:
+                    self.neighbours[table.name].add(fk.ref_table)
+                    self.neighbours[fk.ref_table].add(table.name)
+
+        for table in catalog.tables.values():
+            terms = self._document(table)
+            self.doc_lengths[table.name] = len(terms)
+            for term, tf in Counter(terms).items():
+                self.postings[term][table.name] = tf
+
+        self.avg_length = sum(self.doc_lengths.values()) / max(len(self.doc_lengths), 1)
+        self.full_text = "\n".join(render_table(t) for t in catalog.tables.values())
+
+    def _document(self, table: Table) -> list[str]:
+        terms = tokenize(table.name) * TABLE_NAME_WEIGHT + tokenize(table.comment)
+        for col in table.columns:
+            terms += tokenize(col.name) + tokenize(col.comment)
+        for neighbour in self.neighbours[table.name]:
+            terms += tokenize(neighbour)
+        return terms
+
+    def score(self, question: str) -> dict[str, float]:
+        n_docs = len(self.doc_lengths)
+        scores: dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for table, tf in postings.items():
+                norm = 1 - BM25_B + BM25_B * self.doc_lengths[table] / self.avg_length
+                scores[table] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+        return scores
+
+    def _join_path(self, source: str, target: str) -> list[str]:
+        parents = {source: None}
+        queue = deque([(source, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path
+            if depth == MAX_JOIN_HOPS:
+                continue
+            for neighbour in self.neighbours[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append((neighbour, depth + 1))
+        return []
+
+    def select(self, question: str, top_k: int) -> list[str]:
+        scores = self.score(question)
+        ranked = sorted(scores, key=lambda t: (-scores[t], t))[:top_k]
+
+        selected = list(ranked)
+        for i, source in enumerate(ranked):
+            for target in ranked[i + 1:]:
+                for table in self._join_path(source, target):
+                    if table not in selected:
+                        selected.append(table)
+        return selected
+
+_index: Optional[SchemaIndex] = None
+
+def get_index(catalog: SchemaCatalog) -> SchemaIndex:
+    global _index
+    if _index is None or _index.catalog is not catalog:
+        _index = SchemaIndex(catalog)
+    return _index
+
+def retrieve_schema(question: str, catalog: SchemaCatalog, top_k: int = None) -> SchemaContext:
+    index = get_index(catalog)
+    total = len(catalog.tables)
+    top_k = top_k or settings.schema_top_k
+
+    if not settings.schema_pruning_enabled or total <= top_k:
+        return SchemaContext(index.full_text, list(catalog.tables), total, 0.0)
+
+    tables = index.select(question, top_k)
+    if not tables:
+        logger.info("No schema match for question, sending full schema")
+        return SchemaContext(index.full_text, list(catalog.tables), total, 0.0)
+
+    text = "\n".join(render_table(catalog.tables[t]) for t in tables)
+    ratio = round(1 - len(text) / max(len(index.full_text), 1), 3)
+    logger.info(f"Schema pruned to {len(tables)}/{total} tables ({ratio:.0%} smaller)")
+    return SchemaContext(text, tables, total, ratio)
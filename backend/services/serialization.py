@@ -0,0 +1,75 @@
+import base64
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from uuid import UUID
+
+import orjson
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.guardsql.columnar+json"
+
+TYPE_NAMES = [
+    (bool, "bool"),
+    (int, "int"),
+    (float, "float"),
+    (Decimal, "decimal"),
+    (datetime, "timestamp"),
+    (date, "date"),
+    (dt_time, "time"),
+    (UUID, "uuid"),
+    (str, "text"),
+    ((bytes, memoryview), "bytes"),
+    ((dict, list), "json"),
+]
+
+ENCODERS = {
+    "decimal": str,
+    "bytes": lambda v: base64.b64encode(bytes(v)).decode(),
+}
+
+DECODERS = {
+    "decimal": Decimal,
+    "timestamp": datetime.fromisoformat,
+    "timestamptz": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": dt_time.fromisoformat,
+    "uuid": UUID,
+    "bytes": base64.b64decode,
+}
+
+def column_type(values: list) -> str:
+    for value in values:
+        if value is None:
+            continue
+        for python_type, name in TYPE_NAMES:
+            if isinstance(value, python_type):
+                if name == "timestamp" and value.tzinfo is not None:
+                    return "timestamptz"
+                return name
+        return "text"
+    return "text"
+
+def to_columnar(rows: list[tuple], columns: list[str]) -> dict:
+    values = [list(col) for col in zip(*rows)] if rows else [[] for _ in columns]
+    types = []
+    for i, col in enumerate(values):
+        col_type = column_type(col)
+        types.append(col_type)
+        encode = ENCODERS.get(col_type)
+        if encode is not None:
+            values[i] = [None if v is None else encode(v) for v in col]
+    return {"columns": columns, "types": types, "values": values}
+
+def from_columnar(data: dict) -> list[tuple]:
+    values = []
+    for col_type, col in zip(data["types"], data["values"]):
+        decode = DECODERS.get(col_type)
+        if decode is not None:
+            col = [None if v is None else decode(v) for v in col]
+        values.append(col)
+    return list(zip(*values))
+
+def dumps(payload) -> bytes:
+    return orjson.dumps(payload, default=str)
+
+def loads(payload: bytes):
+    return orjson.loads(payload)
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from backend.core.metrics import increment
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass
+class Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls: dict[Hashable, Call] = {}
+
+    def _finish(self, key: Hashable, call: Call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self.calls.get(key)
+        if call is None:
+            call = Call(asyncio.create_task(fn()))
+            self.calls[key] = call
+            call.task.add_done_callback(lambda _: self._finish(key, call))
+            increment(f"{self.name}_calls")
+        else:
+            increment(f"{self.name}_coalesced")
+            logger.info(f"Coalesced {self.name} call ({call.waiters} already waiting)")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._finish(key, call)
+                call.task.cancel()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import re
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core.config import get_settings
+from backend.db.connection import connect
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NGRAM_SIZE = 3
+
+TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|\d+(?:\.\d+)?|[A-Za-z]+(?:'[a-z]+)?")
+NEGATIONS = {"not", "no", "never", "without", "except", "excluding", "none", "nor", "neither"}
+NUMBER_WORDS = {
+    "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "twenty", "hundred", "thousand", "million"
+}
+
+LOAD_SQL = """
+    SELECT question, generated_sql FROM (
+        SELECT DISTINCT ON (question) question, generated_sql, created_at
+        FROM query_logs
+        WHERE status IN ('success', 'success_retry')
+          AND schema_fingerprint = :fingerprint
+        ORDER BY question, created_at DESC
+    ) latest
+    ORDER BY created_at
+    LIMIT :limit
+"""
+
+def normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9$.]+", question.lower())).strip(" .")
+
+def key_terms(question: str) -> tuple[str, ...]:
+    """Numbers, literals and negations: words that change the answer but barely move similarity."""
+    terms = []
+    for i, token in enumerate(TOKEN.findall(question)):
+        lower = token.lower()
+        if token[0] in "'\"":
+            terms.append(lower.strip("'\""))
+        elif token[0].isdigit() or lower in NUMBER_WORDS:
+            terms.append(lower)
+        elif lower in NEGATIONS or lower.endswith("n't"):
+            terms.append("not")
+        elif i > 0 and token[0].isupper():
+            # Capitalized mid-sentence, so a name or code like Texas or CA
+            terms.append(lower)
+    return tuple(sorted(terms))
+
+def ngrams(normalized: str) -> Counter:
+    padded = f" {normalized} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+class SQLMemo:
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.fingerprint: Optional[str] = None
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.grams: dict[str, Counter] = {}
+        self.terms: dict[str, tuple[str, ...]] = {}
+        self.norms: dict[str, float] = {}
+        self.postings: dict[str, set[str]] = {}
+        self._lock = asyncio.Lock()
+
+    def _add(self, question: str, sql: str):
+        normalized = normalize_question(question)
+        if normalized in self.entries:
+            self._remove(normalized)
+        self.entries[normalized] = sql
+        self.terms[normalized] = key_terms(question)
+        grams = ngrams(normalized)
+        self.grams[normalized] = grams
+        self.norms[normalized] = sum(c * c for c in grams.values()) ** 0.5
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(normalized)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, normalized: str):
+        self.entries.pop(normalized, None)
+        self.norms.pop(normalized, None)
+        self.terms.pop(normalized, None)
+        for gram in self.grams.pop(normalized, {}):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(normalized)
+                if not keys:
+                    del self.postings[gram]
+
+    def reset(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.entries.clear()
+        self.grams.clear()
+        self.norms.clear()
+        self.terms.clear()
+        self.postings.clear()
+
+    async def ensure(self, fingerprint: str):
+        if self.fingerprint == fingerprint:
+            return
+        async with self._lock:
+            if self.fingerprint == fingerprint:
+                return
+            self.reset(fingerprint)
+            try:
+                async with connect("meta") as conn:
+                    rows = (await conn.execute(
+                        text(LOAD_SQL), {"fingerprint": fingerprint, "limit": self.max_entries}
+                    )).fetchall()
+            except Exception as e:
+                logger.error(f"Failed to load SQL memo: {e}")
+                return
+            for row in rows:
+                self._add(row.question, row.generated_sql)
+            logger.info(f"SQL memo loaded {len(rows)} entries for schema {fingerprint}")
+
+    def lookup(self, question: str, fingerprint: str) -> Optional[tuple[str, str]]:
+        if fingerprint != self.fingerprint:
+            return None
+
+        normalized = normalize_question(question)
+        sql = self.entries.get(normalized)
+        if sql is not None:
+            self.entries.move_to_end(normalized)
+            return sql, "exact"
+
+        terms = key_terms(question)
+        grams = ngrams(normalized)
+        norm = sum(c * c for c in grams.values()) ** 0.5
+        dots: Counter = Counter()
+        for gram, count in grams.items():
+            for candidate in self.postings.get(gram, ()):
+                dots[candidate] += count * self.grams[candidate][gram]
+
+        best, best_score = None, 0.0
+        for candidate, dot in dots.items():
+            # Another year, limit, state or a negation is another question however similar the text
+            if self.terms[candidate] != terms:
+                continue
+            score = dot / (norm * self.norms[candidate])
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best is not None and best_score >= self.threshold:
+            logger.info(f"SQL memo near-duplicate hit ({best_score:.2f}): {best!r}")
+            return self.entries[best], "similar"
+        return None
+
+    def remember(self, question: str, sql: str, fingerprint: str):
+        if fingerprint == self.fingerprint:
+            self._add(question, sql)
+
+    def forget(self, question: str):
+        self._remove(normalize_question(question))
+
+sql_memo = SQLMemo(max_entries=settings.sql_memo_size, threshold=settings.sql_memo_similarity)
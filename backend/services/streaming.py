@@ -0,0 +1,190 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import AsyncIterator
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from backend.services.binder import bind
+from backend.services.llm import generate_sql
+from backend.services.schema_retriever import retrieve_schema
+from backend.services.offload import offload
+from backend.services.planner import admission
+from backend.services.result_cache import cache_key
+from backend.services.validator import canonicalize, validate
+from backend.services.executor import stream_query
+from backend.db.audit import log_query
+from backend.db.catalog import get_catalog
+from backend.core.config import get_settings
+from backend.core.exceptions import ValidationError, ExecutionError, LLMError
+from backend.core.metrics import span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+_background_tasks: set[asyncio.Task] = set()
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode()
+    return str(value)
+
+class NDJSONEncoder:
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, batch) -> bytes:
+        lines = [json.dumps(dict(zip(self.columns, row)), default=json_default) for row in batch]
+        return ("\n".join(lines) + "\n").encode()
+
+    def finish(self) -> bytes:
+        return b""
+
+class CSVEncoder:
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+
+    def _write(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._write([self.columns])
+
+    def encode(self, batch) -> bytes:
+        return self._write(batch)
+
+    def finish(self) -> bytes:
+        return b""
+
+class ArrowEncoder:
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+        self.schema = None
+
+    def header(self) -> bytes:
+        return b""
+
+    def _schema_message(self, data: dict) -> bytes:
+        fields = []
+        for name, values in data.items():
+            arrow_type = pa.array(values).type
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()
+            fields.append(pa.field(name, arrow_type))
+        self.schema = pa.schema(fields)
+        return self.schema.serialize().to_pybytes()
+
+    def encode(self, batch) -> bytes:
+        data = {name: [row[i] for row in batch] for i, name in enumerate(self.columns)}
+        prefix = self._schema_message(data) if self.schema is None else b""
+        record = pa.RecordBatch.from_pydict(data, schema=self.schema)
+        return prefix + record.serialize().to_pybytes()
+
+    def finish(self) -> bytes:
+        prefix = b""
+        if self.schema is None:
+            prefix = self._schema_message({name: [] for name in self.columns})
+        return prefix + ARROW_EOS
+
+ENCODERS = {"ndjson": NDJSONEncoder, "csv": CSVEncoder, "arrow": ArrowEncoder}
+
+@dataclass
+class QueryStream:
+    sql: str
+    media_type: str
+    body: AsyncIterator[bytes]
+
+async def _encode(
+    question: str, sql: str, fingerprint: str, encoder, rows: AsyncIterator, start_time: float,
+    admitted: AsyncExitStack
+):
+    row_count = 0
+    status, error = "stream_success", None
+    try:
+        yield encoder.header()
+        async for batch in rows:
+            row_count += len(batch)
+            yield encoder.encode(batch)
+        yield encoder.finish()
+    except asyncio.CancelledError:
+        status, error = "stream_cancelled", "Client disconnected"
+        raise
+    except Exception as e:
+        status, error = "execution_error", str(e)
+        raise
+    finally:
+        exec_time = int((time.time() - start_time) * 1000)
+        logger.info(f"Stream {status}: {row_count} rows in {exec_time}ms")
+        task = asyncio.create_task(log_query(question, sql, status, error, exec_time, fingerprint))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        await asyncio.shield(rows.aclose())
+        await admitted.aclose()
+
+async def open_query_stream(question: str, fmt: str) -> QueryStream:
+    if fmt == "arrow" and pa is None:
+        raise ValidationError("Arrow format requires pyarrow to be installed")
+
+    start_time = time.time()
+    catalog = await get_catalog()
+    context = retrieve_schema(question, catalog)
+    sql = ""
+    # Held until the body finishes, so a queued expensive stream keeps its slot while it runs
+    admitted = AsyncExitStack()
+
+    try:
+        with span("llm"):
+            sql = (await generate_sql(question, context.text)).sql
+        with span("validate"):
+            validated = await offload.run(validate, sql, settings.stream_max_rows)
+        sql = validated.sql
+        with span("bind"):
+            bind(sql, catalog, validated.tree)
+        canonical_sql, _ = validated.canonical or canonicalize(validated.tree)
+        key = cache_key(canonical_sql, catalog.fingerprint)
+        await admitted.enter_async_context(admission(sql, key))
+        rows = stream_query(sql, settings.stream_batch_size)
+        columns = await rows.__anext__()
+    except (ValidationError, ExecutionError) as e:
+        await admitted.aclose()
+        status = "validation_error" if isinstance(e, ValidationError) else "execution_error"
+        await log_query(question, sql, status, str(e), fingerprint=catalog.fingerprint)
+        raise
+    except LLMError as e:
+        await log_query(question, "", "llm_error", str(e))
+        raise
+    except BaseException:
+        await admitted.aclose()
+        raise
+
+    encoder = ENCODERS[fmt](columns)
+    body = _encode(question, sql, catalog.fingerprint, encoder, rows, start_time, admitted)
+    return QueryStream(sql=sql, media_type=MEDIA_TYPES[fmt], body=body)
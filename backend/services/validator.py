@@ -1,44 +1,138 @@
 import sqlglot
 import logging
-import re
-from sqlglot import parse_one, exp
+from dataclasses import dataclass
+from typing import Optional, Union
+from sqlglot import exp, parse_one
+from sqlglot.optimizer.normalize_identifiers import normalize_identifiers
 
 from backend.core.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
-FORBIDDEN_KEYWORDS = [
-    "INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE",
-    "TRUNCATE", "GRANT", "REVOKE", "EXEC", "EXECUTE", "CALL"
-]
+FORBIDDEN_STATEMENTS = {
+    exp.Insert: "INSERT",
+    exp.Update: "UPDATE",
+    exp.Delete: "DELETE",
+    exp.Drop: "DROP",
+    exp.Create: "CREATE",
+    exp.AlterTable: "ALTER",
+    exp.Merge: "MERGE",
+    exp.Set: "SET",
+    exp.Use: "USE",
+    exp.Into: "SELECT INTO",
+    exp.Lock: "FOR UPDATE/SHARE",
+}
 
-SYSTEM_TABLES = ["pg_", "information_schema"]
+SYSTEM_SCHEMAS = {"information_schema", "pg_catalog", "pg_toast"}
 
-def validate_sql(sql: str) -> str:
-    sql = sql.strip().rstrip(";")
-    
-    if ";" in sql:
-        raise ValidationError("Multiple statements not allowed")
-    
-    sql_upper = sql.upper()
-    for keyword in FORBIDDEN_KEYWORDS:
-        if re.search(rf'\b{keyword}\b', sql_upper):
-            raise ValidationError(f"Forbidden keyword: {keyword}")
-    
+# ts_stat and ts_rewrite run a query passed in as a string, like the *_to_xml family below
+FORBIDDEN_FUNCTIONS = {"set_config", "loread", "lowrite", "ts_stat", "ts_rewrite"}
+
+# Whole families: the *_to_xml functions run SQL or dump relations named in strings,
+# which the table checks never see
+FORBIDDEN_FUNCTION_PREFIXES = (
+    "pg_", "lo_", "dblink",
+    "query_to_xml", "table_to_xml", "cursor_to_xml", "schema_to_xml", "database_to_xml",
+)
+
+@dataclass
+class ValidatedQuery:
+    sql: str
+    tree: Optional[exp.Select]
+    tables: frozenset[str]
+    canonical: Optional[tuple[str, frozenset[str]]] = None
+
+def referenced_tables(parsed: exp.Expression) -> set[str]:
+    cte_names = {cte.alias_or_name for cte in parsed.find_all(exp.CTE)}
+    return {t.name for t in parsed.find_all(exp.Table) if t.name not in cte_names}
+
+def canonicalize(sql: Union[str, exp.Expression]) -> tuple[str, frozenset[str]]:
+    tree = parse_one(sql, read="postgres") if isinstance(sql, str) else sql.copy()
+    parsed = normalize_identifiers(tree, dialect="postgres")
+
+    aliases: dict[str, str] = {}
+    for table in parsed.find_all(exp.Table):
+        if table.alias and table.alias not in aliases:
+            aliases[table.alias] = f"_t{len(aliases)}"
+    for table in parsed.find_all(exp.Table):
+        if table.alias:
+            table.set("alias", exp.TableAlias(this=exp.to_identifier(aliases[table.alias])))
+    for column in parsed.find_all(exp.Column):
+        if column.table in aliases:
+            column.set("table", exp.to_identifier(aliases[column.table]))
+
+    return parsed.sql(dialect="postgres"), frozenset(referenced_tables(parsed))
+
+def function_name(func: exp.Func) -> str:
+    return (func.name if isinstance(func, exp.Anonymous) else func.sql_name()).lower()
+
+def names_system_object(value: exp.Expression) -> bool:
+    """True for a ::regclass-style cast operand, unless it is a literal naming a user object."""
+    if not isinstance(value, exp.Literal) or not value.is_string:
+        return True
+    parts = [part.strip('"').lower() for part in value.name.split(".")]
+    return any(part in SYSTEM_SCHEMAS for part in parts) or parts[-1].startswith("pg_")
+
+def parse(sql: str) -> exp.Expression:
     try:
-        parsed = parse_one(sql, read="postgres")
+        statements = [s for s in sqlglot.parse(sql, read="postgres") if s is not None]
     except Exception as e:
         raise ValidationError(f"Invalid SQL syntax: {str(e)}")
-    
-    if not isinstance(parsed, exp.Select):
+
+    if len(statements) > 1:
+        raise ValidationError("Multiple statements not allowed")
+    if not statements:
+        raise ValidationError("Invalid SQL syntax: empty statement")
+    return statements[0]
+
+def validate(sql: str, limit: int = 100) -> ValidatedQuery:
+    sql = sql.strip().rstrip(";").strip()
+    tree = parse(sql)
+
+    cte_names = set()
+    tables = []
+    has_comments = False
+    for node in tree.find_all(exp.Expression):
+        forbidden = FORBIDDEN_STATEMENTS.get(type(node))
+        if forbidden:
+            raise ValidationError(f"Forbidden statement: {forbidden}")
+        has_comments = has_comments or bool(node.comments)
+        if isinstance(node, exp.CTE):
+            cte_names.add(node.alias_or_name)
+        elif isinstance(node, exp.Table):
+            if node.db.lower() in SYSTEM_SCHEMAS or node.name.lower() in SYSTEM_SCHEMAS \
+                    or node.name.lower().startswith("pg_"):
+                raise ValidationError("Access to system tables not allowed")
+            tables.append(node.name)
+        elif isinstance(node, exp.Cast) and isinstance(node.to, exp.ObjectIdentifier):
+            if names_system_object(node.this):
+                raise ValidationError(f"Cast to {node.to.name} not allowed on system objects")
+        elif isinstance(node, exp.Func):
+            name = function_name(node)
+            if name.startswith(FORBIDDEN_FUNCTION_PREFIXES) or name in FORBIDDEN_FUNCTIONS:
+                raise ValidationError(f"Function not allowed: {name}")
+
+    if not isinstance(tree, exp.Select):
         raise ValidationError("Only SELECT queries allowed")
-    
-    for table in SYSTEM_TABLES:
-        if table in sql.lower():
-            raise ValidationError(f"Access to system tables not allowed")
-    
-    if "LIMIT" not in sql_upper:
-        sql = f"{sql} LIMIT 100"
-        logger.info("Auto-appended LIMIT 100")
-    
-    return sql
+
+    if not tree.args.get("limit"):
+        tree.limit(limit, copy=False)
+        logger.info(f"Auto-appended LIMIT {limit}")
+        # Without comments the tree renders the same query as the original text
+        # plus the new clause, so skip regenerating the whole statement.
+        sql = tree.sql(dialect="postgres") if has_comments else f"{sql} LIMIT {limit}"
+
+    return ValidatedQuery(
+        sql=sql,
+        tree=tree,
+        tables=frozenset(t for t in tables if t not in cte_names)
+    )
+
+def validate_sql(sql: str, limit: int = 100) -> str:
+    return validate(sql, limit).sql
+
+def validate_keyed(sql: str, limit: int = 100) -> ValidatedQuery:
+    """validate() plus the result cache key, computed wherever the parsing runs."""
+    validated = validate(sql, limit)
+    validated.canonical = canonicalize(validated.tree)
+    return validated
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from backend.core.config import get_settings
+from backend.db.catalog import refresh_catalog
+from backend.db.connection import warm_pool
+from backend.services.offload import offload
+from backend.services.schema_retriever import retrieve_schema
+from backend.services.validator import validate_keyed
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WARMUP_SQL = (
+    "SELECT c.customer_id, SUM(o.total_amount) AS total FROM customers c "
+    "JOIN orders o ON o.customer_id = c.customer_id WHERE o.status = 'completed' "
+    "GROUP BY c.customer_id ORDER BY total DESC"
+)
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    error: Optional[str] = None
+    seconds: Optional[float] = None
+
+warmup_state = WarmupState()
+
+def warm_parsers():
+    validate_keyed(WARMUP_SQL)
+
+async def warm_up() -> bool:
+    start = time.perf_counter()
+    try:
+        warm_parsers()
+        await asyncio.gather(
+            warm_pool("query", settings.db_pool_size),
+            warm_pool("audit", 1),
+            warm_pool("meta", 1),
+            offload.warm()
+        )
+        catalog = await refresh_catalog(force=True)
+        retrieve_schema("warmup", catalog)
+    except Exception as e:
+        warmup_state.error = str(e)
+        logger.error(f"Warmup failed: {e}")
+        return False
+
+    warmup_state.ready = True
+    warmup_state.error = None
+    warmup_state.seconds = round(time.perf_counter() - start, 3)
+    logger.info(f"Warmup complete in {warmup_state.seconds}s")
+    return True
+
+async def warm_up_until_ready(interval: float = 5):
+    while not await warm_up():
+        await asyncio.sleep(interval)
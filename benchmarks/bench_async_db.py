@@ -0,0 +1,87 @@
+"""Latency of /query-style requests under concurrency: sync vs async DB path.
+
+Each simulated request awaits a fake LLM call and then runs a SELECT with
+pg_sleep against the database in DATABASE_URL. The "sync" mode calls the
+blocking psycopg2 engine from the coroutine, as process_query used to; the
+"async" mode awaits the asyncpg engine.
+
+    python -m benchmarks.bench_async_db --concurrency 50 --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import create_engine, text
+
+from backend.core.config import get_settings
+from backend.db.connection import async_engine
+
+# The blocking psycopg2 engine /query used before it moved to asyncpg, kept here for comparison
+engine = create_engine(
+    get_settings().database_url, pool_pre_ping=True, pool_size=5, max_overflow=10
+)
+
+QUERY = text("SELECT pg_sleep(:delay), count(*) FROM pg_class")
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def sync_request(llm_delay: float, db_delay: float) -> None:
+    await asyncio.sleep(llm_delay)
+    with engine.connect() as conn:
+        conn.execute(QUERY, {"delay": db_delay}).fetchall()
+
+async def async_request(llm_delay: float, db_delay: float) -> None:
+    await asyncio.sleep(llm_delay)
+    async with async_engine.connect() as conn:
+        (await conn.execute(QUERY, {"delay": db_delay})).fetchall()
+
+async def run(
+    mode: str, concurrency: int, requests: int, llm_delay: float, db_delay: float
+) -> dict:
+    handler = sync_request if mode == "sync" else async_request
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(llm_delay, db_delay)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-ms", type=int, default=200)
+    parser.add_argument("--db-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        stats = await run(
+            mode, args.concurrency, args.requests, args.llm_ms / 1000, args.db_ms / 1000
+        )
+        print(
+            f"{stats['mode']:>5}: {stats['rps']:7.1f} req/s  "
+            f"p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms"
+        )
+
+    engine.dispose()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
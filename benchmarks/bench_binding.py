@@ -0,0 +1,169 @@
+"""Time to reject a hallucinated identifier: schema binding vs execute-and-catch.
+
+Takes the valid SQL of the load-test workload and bench_validator, and derives
+broken variants the way models get them wrong: a typo in a column, an
+invented column, a singular/plural table name. Every variant is rejected
+three ways against the catalog of the database in DATABASE_URL:
+
+    bind      the binding stage on the already parsed tree
+    qualify   sqlglot's optimizer qualify() with a schema dict, for reference
+    execute   execute_cached(), the path process_query took before binding
+              (admission EXPLAIN, then the query), failing in Postgres
+
+It also reports how often the binder and Postgres agree on the failure
+class, and what binding adds to queries that are valid:
+
+    python -m benchmarks.bench_binding --database guardsql_bench --iterations 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy.engine import make_url
+from sqlglot import exp, parse_one
+
+from benchmarks.bench_llm_client import percentile
+
+def typo(name: str, rng: random.Random) -> str:
+    if len(name) < 3:
+        return name + name[-1]
+    i = rng.randrange(1, len(name))
+    return name[:i] + name[i + 1:]
+
+def hallucinate(sql: str, rng: random.Random) -> list[str]:
+    variants = []
+    tree = parse_one(sql, read="postgres")
+    columns = [c for c in tree.find_all(exp.Column) if isinstance(c.this, exp.Identifier)]
+    tables = [t for t in tree.find_all(exp.Table) if isinstance(t.this, exp.Identifier)]
+    for mutate in (lambda name: typo(name, rng), lambda name: f"{name.rstrip('_id')}_name"):
+        if columns:
+            broken = tree.copy()
+            column = rng.choice(
+                [c for c in broken.find_all(exp.Column) if isinstance(c.this, exp.Identifier)]
+            )
+            column.set("this", exp.to_identifier(mutate(column.name)))
+            variants.append(broken.sql(dialect="postgres"))
+    if tables:
+        broken = tree.copy()
+        table = rng.choice(
+            [t for t in broken.find_all(exp.Table) if isinstance(t.this, exp.Identifier)]
+        )
+        name = table.name
+        table.set("this", exp.to_identifier(name[:-1] if name.endswith("s") else f"{name}s"))
+        variants.append(broken.sql(dialect="postgres"))
+    return variants
+
+def summary(label: str, samples: list[float]) -> str:
+    return (f"{label:>8} {statistics.median(samples):>10.1f} {percentile(samples, 99):>10.1f} "
+            f"{statistics.mean(samples):>10.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database", help="database next to DATABASE_URL to query (default: DATABASE_URL)"
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    if args.database:
+        # Before the backend modules are imported, they create their engines from the settings
+        os.environ["DATABASE_URL"] = make_url(os.environ["DATABASE_URL"]).set(
+            database=args.database
+        ).render_as_string(hide_password=False)
+
+    from sqlglot.optimizer.qualify import qualify
+    from sqlglot.schema import MappingSchema
+
+    from backend.core.exceptions import BindingError, ExecutionError, ValidationError
+    from backend.db.catalog import get_catalog
+    from backend.services.binder import bind
+    from backend.services.repair import classify
+    from backend.services.result_cache import execute_cached
+    from backend.services.validator import validate
+    from benchmarks.bench_validator import GENERATED_SQL
+    from benchmarks.workload import workload
+
+    catalog = await get_catalog()
+    types = {
+        name: {c.name: c.data_type for c in table.columns} for name, table in catalog.tables.items()
+    }
+    schema = MappingSchema(types, dialect="postgres")
+    rng = random.Random(args.seed)
+
+    valid = []
+    for sql in dict.fromkeys(GENERATED_SQL + list(workload().values())):
+        try:
+            query = validate(sql)
+            await execute_cached(query, catalog.fingerprint)
+            valid.append(query)
+        except (ValidationError, ExecutionError):
+            pass
+    broken = [validate(sql) for query in valid for sql in hallucinate(query.sql, rng)]
+
+    timings = {"bind": [], "qualify": [], "execute": []}
+    same = rejected = missed = accepted = 0
+    for query in broken:
+        try:
+            await execute_cached(query, catalog.fingerprint)
+            accepted += 1
+            continue
+        except ExecutionError as e:
+            db_kind = classify(e).kind
+        try:
+            bind(query.sql, catalog, query.tree)
+            missed += 1
+            print(f"  not caught by binding ({db_kind} in Postgres): {query.sql[:100]}")
+            continue
+        except BindingError as e:
+            rejected += 1
+            same += e.kind == db_kind
+
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            try:
+                bind(query.sql, catalog, query.tree)
+            except BindingError:
+                pass
+            timings["bind"].append((time.perf_counter() - start) * 1e6)
+
+            start = time.perf_counter()
+            try:
+                qualify(
+                    query.tree.copy(), schema=schema, dialect="postgres",
+                    validate_qualify_columns=True
+                )
+            except Exception:
+                pass
+            timings["qualify"].append((time.perf_counter() - start) * 1e6)
+
+            start = time.perf_counter()
+            try:
+                await execute_cached(query, catalog.fingerprint)
+            except ExecutionError:
+                pass
+            timings["execute"].append((time.perf_counter() - start) * 1e6)
+
+    overhead = []
+    for query in valid:
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            bind(query.sql, catalog, query.tree)
+            overhead.append((time.perf_counter() - start) * 1e6)
+
+    print(f"{len(broken)} hallucinated variants of {len(valid)} queries: "
+          f"{rejected} rejected by binding ({same} with the class Postgres reports), "
+          f"{missed} only by Postgres, {accepted} accepted by Postgres")
+    print(f"{'path':>8} {'p50':>10} {'p99':>10} {'mean':>10}  (microseconds to failure)")
+    for label, samples in timings.items():
+        if samples:
+            print(summary(label, samples))
+    print(summary("valid", overhead) + "  (binding cost on valid queries)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Throughput of generate_sql: a client per call vs the shared pooled client.
+
+Starts the fake Ollama server from tests/fake_ollama.py on a local port and
+fires concurrent generations at it. The "per-call" mode opens a fresh
+httpx.AsyncClient for every request, as generate_sql used to; the "pooled"
+mode goes through LLMClient with keep-alive connections.
+
+    python -m benchmarks.bench_llm_client --concurrency 32 --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+import uvicorn
+
+from backend.services.llm_client import LLMClient
+from tests.fake_ollama import create_app
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def consume(client: httpx.AsyncClient, url: str) -> None:
+    body = {"prompt": "", "stream": True}
+    async with client.stream("POST", f"{url}/api/generate", json=body) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_lines():
+            pass
+
+async def run(mode: str, url: str, concurrency: int, requests: int) -> dict:
+    pooled = LLMClient([url], max_concurrency=concurrency, max_queue=requests, timeout=30)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "pooled":
+                async with pooled.acquire() as backend:
+                    await consume(pooled.client, backend.url)
+            else:
+                async with httpx.AsyncClient(timeout=30) as client:
+                    await consume(client, url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await pooled.close()
+
+    return {
+        "mode": mode,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--port", type=int, default=18434)
+    parser.add_argument("--token-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(token_delay=args.token_ms / 1000), port=args.port, log_level="warning"
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"http://127.0.0.1:{args.port}"
+    for mode in ("per-call", "pooled"):
+        stats = await run(mode, url, args.concurrency, args.requests)
+        print(
+            f"{stats['mode']:>8}: {stats['rps']:7.1f} req/s  "
+            f"p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms"
+        )
+
+    server.should_exit = True
+    await serving
+
+if __name__ == "__main__":
+    asyncio.run(main())
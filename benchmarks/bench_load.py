@@ -0,0 +1,248 @@
+"""Load test of backend.main:app with the TEST_QUERIES.md workload.
+
+Starts the fake Ollama server (answering each question with the SQL in
+benchmarks/workload.py) and the API via backend.serve as subprocesses,
+replays the workload at a fixed concurrency, and reports throughput,
+end-to-end and per-stage latency percentiles (from the response "timings")
+and the memory high-water mark summed over the API worker processes.
+Result and memo caches are off unless --caches is given, so every request
+runs the whole pipeline.
+
+    python -m benchmarks.datagen --database guardsql_bench --scale 1
+    python -m benchmarks.bench_load --database guardsql_bench --concurrency 16 --requests 1000
+    python -m benchmarks.bench_load ... --workers 4        # multi-worker mode
+    python -m benchmarks.bench_load ... --save-baseline    # store benchmarks/baseline.json
+    python -m benchmarks.bench_load ... --compare          # exit 1 on a regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from sqlalchemy.engine import make_url
+
+from backend.core.config import get_settings
+from benchmarks.bench_llm_client import percentile
+from benchmarks.workload import workload
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+def spawn(name: str, args: list[str], env: dict[str, str], cwd: str) -> subprocess.Popen:
+    with open(Path(cwd) / f"{name}.log", "wb") as log:
+        return subprocess.Popen(
+            [sys.executable, *args], env={**os.environ, "PYTHONPATH": str(ROOT), **env}, cwd=cwd,
+            stdout=log, stderr=subprocess.STDOUT
+        )
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+def process_tree(pid: int) -> list[int]:
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except OSError:
+        return [pid]
+    return [pid, *(descendant for child in children for descendant in process_tree(int(child)))]
+
+def memory_high_water_mb(pid: int) -> Optional[float]:
+    """Sum of VmHWM over the process and its workers."""
+    total = 0
+    for process in process_tree(pid):
+        try:
+            for line in Path(f"/proc/{process}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total += int(line.split()[1])
+        except OSError:
+            pass
+    return round(total / 1024, 1) if total else None
+
+def summarize(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    return {
+        "p50": round(statistics.median(values), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+    }
+
+async def drive(url: str, questions: list[str], concurrency: int, requests: int, seed: int) -> dict:
+    order = [random.Random(seed + i).choice(questions) for i in range(requests)]
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal next_index
+        while next_index < len(order):
+            question = order[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.post("/query", json={"question": question})
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                for stage, ms in (response.json().get("timings") or {}).items():
+                    stages[stage].append(ms)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+
+def report(result: dict):
+    print(f"{result['requests']} requests at concurrency {result['concurrency']} "
+          f"on {result['workers']} worker(s): {result['rps']} req/s")
+    print(f"  status codes: {result['status_codes']}")
+    print(f"  memory high-water: {result['memory_mb']} MB")
+    print(f"  {'stage':>16} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for stage, stats in [("end-to-end", result["latency_ms"]), *result["stages_ms"].items()]:
+        print(f"  {stage:>16} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    if result["rps"] < baseline["rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['rps']} -> {result['rps']} req/s")
+    checks = [("end-to-end", result["latency_ms"], baseline["latency_ms"])]
+    checks += [
+        (stage, stats, baseline["stages_ms"].get(stage))
+        for stage, stats in result["stages_ms"].items()
+    ]
+    for stage, current, previous in checks:
+        # Sub-millisecond stages are too noisy to compare relatively
+        if previous and previous["p95"] >= 1 and current["p95"] > previous["p95"] * (1 + tolerance):
+            regressions.append(f"{stage} p95 {previous['p95']} -> {current['p95']} ms")
+    if result["memory_mb"] and baseline.get("memory_mb"):
+        if result["memory_mb"] > baseline["memory_mb"] * (1 + tolerance):
+            regressions.append(
+                f"memory high-water {baseline['memory_mb']} -> {result['memory_mb']} MB"
+            )
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database", help="database next to DATABASE_URL to query (default: DATABASE_URL)"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--token-ms", type=int, default=5, help="fake Ollama delay per token")
+    parser.add_argument(
+        "--ttft-ms", type=int, default=50, help="fake Ollama delay before the first token"
+    )
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--ollama-port", type=int, default=18434)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="API worker processes (backend.serve)"
+    )
+    parser.add_argument(
+        "--caches", action="store_true", help="keep the result cache and SQL memo on"
+    )
+    parser.add_argument(
+        "--env", action="append", default=[], help="extra KEY=VALUE for the API process"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--compare", action="store_true", help="exit 1 when worse than the baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    database_url = get_settings().database_url
+    if args.database:
+        url = make_url(database_url).set(database=args.database)
+        database_url = url.render_as_string(hide_password=False)
+    questions = workload()
+    workdir = tempfile.mkdtemp(prefix="guardsql-bench-")
+    answers = Path(workdir) / "answers.json"
+    print(f"Server logs in {workdir}")
+    answers.write_text(json.dumps(questions))
+
+    ollama = spawn(
+        "ollama",
+        ["-m", "tests.fake_ollama", "--port", str(args.ollama_port),
+         "--token-ms", str(args.token_ms), "--ttft-ms", str(args.ttft_ms),
+         "--answers", str(answers)],
+        {}, workdir
+    )
+    env = {
+        "DATABASE_URL": database_url,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.ollama_port}",
+        "OLLAMA_MODEL": "bench",
+        "AUTH_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(args.port),
+        "WORKERS": str(args.workers),
+        "SHARED_STATE_DIR": workdir,
+        "RESULT_CACHE_ENABLED": str(args.caches).lower(),
+        "SQL_MEMO_ENABLED": str(args.caches).lower(),
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    api = spawn("api", ["-m", "backend.serve"], env, workdir)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(f"http://127.0.0.1:{args.ollama_port}/docs", ollama)
+        await wait_ready(f"{url}/ready", api)
+        if args.warmup:
+            await drive(url, list(questions), args.concurrency, args.warmup, args.seed - 1)
+        result = await drive(url, list(questions), args.concurrency, args.requests, args.seed)
+        result["workers"] = args.workers
+        result["memory_mb"] = memory_high_water_mb(api.pid)
+    finally:
+        for process in (api, ollama):
+            process.terminate()
+            process.wait()
+
+    report(result)
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+    elif args.baseline.exists():
+        regressions = compare(result, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSION: {regression}")
+        if not regressions:
+            print(f"  within {args.tolerance:.0%} of {args.baseline}")
+        if regressions and args.compare:
+            sys.exit(1)
+    elif args.compare:
+        sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Event-loop lag under a mixed workload with CPU work inline vs offloaded.
+
+Simulated requests wait on I/O, validate a generated SQL statement and
+serialize a result; every --large-every request returns --large-rows rows,
+the rest a handful. A probe task sleeps 1 ms in a loop and records how late
+it wakes up, which is the delay every other coroutine on the loop (health
+checks, streaming, LLM token reads) sees. Each mode runs the same workload:
+
+    python -m benchmarks.bench_offload --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from backend.api.encoding import encode_response
+from backend.services.offload import Offload
+from backend.services.validator import validate_keyed
+from benchmarks.bench_llm_client import percentile
+from benchmarks.bench_validator import GENERATED_SQL
+
+def make_rows(count: int) -> list[tuple]:
+    start = datetime(2024, 1, 1)
+    return [
+        (i, f"customer_{i}", Decimal(f"{i % 1000}.99"), start + timedelta(minutes=i), "completed")
+        for i in range(count)
+    ]
+
+COLUMNS = ["order_id", "customer", "total_amount", "order_date", "status"]
+
+async def probe(lags: list[float], stop: asyncio.Event, interval: float = 0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+async def request(pool: Offload, sql: str, rows: list[tuple], io_ms: float, min_rows: int):
+    await asyncio.sleep(io_ms / 1000)
+    validated_sql = (await pool.run(validate_keyed, sql, 100)).sql
+    result = {
+        "sql": validated_sql, "rows": rows, "columns": COLUMNS, "row_count": len(rows),
+        "execution_time_ms": 0
+    }
+    if len(rows) >= min_rows:
+        await pool.run_in_thread(encode_response, result, False)
+    else:
+        encode_response(result, False)
+
+async def run(mode: str, args) -> dict:
+    pool = Offload(mode, args.workers, args.max_pending)
+    pool.start()
+    small, large = make_rows(args.small_rows), make_rows(args.large_rows)
+    rng = random.Random(args.seed)
+    plan = [
+        (rng.choice(GENERATED_SQL), large if i % args.large_every == 0 else small)
+        for i in range(args.requests)
+    ]
+    try:
+        await asyncio.gather(*(pool.run(validate_keyed, sql, 100) for sql in GENERATED_SQL))
+        lags: list[float] = []
+        latencies: list[float] = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(lags, stop))
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def timed(sql, rows):
+            async with semaphore:
+                start = time.perf_counter()
+                await request(pool, sql, rows, args.io_ms, args.min_rows)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(sql, rows) for sql, rows in plan))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+    finally:
+        pool.close()
+
+    return {
+        "rps": args.requests / elapsed,
+        "latency_p50": statistics.median(latencies),
+        "latency_p99": percentile(latencies, 99),
+        "lag_p50": statistics.median(lags),
+        "lag_p99": percentile(lags, 99),
+        "lag_max": max(lags),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--io-ms", type=float, default=5, help="simulated database/LLM wait per request"
+    )
+    parser.add_argument("--small-rows", type=int, default=10)
+    parser.add_argument("--large-rows", type=int, default=5000)
+    parser.add_argument("--large-every", type=int, default=10)
+    parser.add_argument("--min-rows", type=int, default=1000, help="OFFLOAD_MIN_ROWS")
+    parser.add_argument("--workers", type=int, default=2, help="OFFLOAD_WORKERS")
+    parser.add_argument("--max-pending", type=int, default=32, help="OFFLOAD_MAX_PENDING")
+    parser.add_argument("--modes", default="off,thread,process")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests at concurrency {args.concurrency}, "
+          f"{args.large_rows} rows every {args.large_every}, {args.workers} offload workers")
+    print(f"{'mode':>8} {'req/s':>8} {'lat p50':>9} {'lat p99':>9} "
+          f"{'lag p50':>9} {'lag p99':>9} {'lag max':>9}  (ms)")
+    for mode in args.modes.split(","):
+        r = await run(mode, args)
+        print(f"{mode:>8} {r['rps']:>8.1f} {r['latency_p50']:>9.1f} {r['latency_p99']:>9.1f} "
+              f"{r['lag_p50']:>9.2f} {r['lag_p99']:>9.2f} {r['lag_max']:>9.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Per-query validation cost: the old regex/substring validator vs the AST pass.
+
+Runs every SQL statement found in TEST_QUERIES.md, plus the SQL the model
+typically produces for the natural-language questions in that file, through
+both validators. Rejections count as a validation too. The "+cache key" rows
+add the result-cache canonicalization that follows validation: the legacy
+path has to parse the SQL a second time, the AST path reuses the tree.
+
+    python -m benchmarks.bench_validator --iterations 200
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+
+from sqlglot import parse_one, exp
+
+from backend.core.exceptions import ValidationError
+from backend.services.result_cache import canonicalize
+from backend.services.validator import validate
+
+TEST_QUERIES = Path(__file__).resolve().parent.parent / "TEST_QUERIES.md"
+
+GENERATED_SQL = [
+    "SELECT * FROM customers",
+    "SELECT COUNT(*) FROM orders",
+    "SELECT * FROM products WHERE price < 100",
+    "SELECT * FROM products ORDER BY price DESC LIMIT 5",
+    "SELECT category, AVG(price) AS avg_price FROM products GROUP BY category",
+    "SELECT c.first_name, c.last_name, o.order_id, o.total_amount FROM customers c "
+    "JOIN orders o ON o.customer_id = c.customer_id WHERE c.state = 'NY'",
+    "SELECT * FROM orders WHERE order_date BETWEEN '2024-01-01' AND '2024-01-31'",
+    "SELECT c.customer_id, c.first_name, SUM(o.total_amount) AS total_spent FROM customers c "
+    "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.customer_id, c.first_name "
+    "ORDER BY total_spent DESC LIMIT 5",
+    "SELECT p.* FROM products p LEFT JOIN order_items oi ON oi.product_id = p.product_id "
+    "WHERE oi.order_item_id IS NULL",
+    "WITH counts AS (SELECT customer_id, COUNT(*) AS n FROM orders GROUP BY customer_id) "
+    "SELECT c.*, counts.n FROM customers c JOIN counts ON counts.customer_id = c.customer_id "
+    "WHERE counts.n > 1",
+    "SELECT * FROM products WHERE product_name = 'pg_dump handbook'",
+]
+
+LEGACY_FORBIDDEN = [
+    "INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE",
+    "TRUNCATE", "GRANT", "REVOKE", "EXEC", "EXECUTE", "CALL"
+]
+
+def legacy_validate(sql: str, limit: int = 100) -> str:
+    sql = sql.strip().rstrip(";")
+    if ";" in sql:
+        raise ValidationError("Multiple statements not allowed")
+    sql_upper = sql.upper()
+    for keyword in LEGACY_FORBIDDEN:
+        if re.search(rf'\b{keyword}\b', sql_upper):
+            raise ValidationError(f"Forbidden keyword: {keyword}")
+    try:
+        parsed = parse_one(sql, read="postgres")
+    except Exception as e:
+        raise ValidationError(f"Invalid SQL syntax: {str(e)}")
+    if not isinstance(parsed, exp.Select):
+        raise ValidationError("Only SELECT queries allowed")
+    for table in ["pg_", "information_schema"]:
+        if table in sql.lower():
+            raise ValidationError("Access to system tables not allowed")
+    if "LIMIT" not in sql_upper:
+        sql = f"{sql} LIMIT {limit}"
+    return sql
+
+def legacy_pipeline(sql: str):
+    canonicalize(legacy_validate(sql))
+
+def ast_pipeline(sql: str):
+    canonicalize(validate(sql).tree)
+
+def documented_sql() -> list[str]:
+    blocks = re.findall(r"```(?:sql)?\n(.*?)```", TEST_QUERIES.read_text(), re.S)
+    statements = [" ".join(block.split()) for block in blocks]
+    statement = re.compile(r"(SELECT|WITH|INSERT|UPDATE|DELETE|DROP)\b", re.I)
+    return [s for s in statements if statement.match(s)]
+
+def time_validator(validator, queries: list[str], iterations: int) -> list[float]:
+    per_query = []
+    for sql in queries:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validator(sql)
+            except ValidationError:
+                pass
+        per_query.append((time.perf_counter() - start) / iterations * 1e6)
+    return per_query
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = documented_sql() + GENERATED_SQL
+    print(f"{len(queries)} queries, {args.iterations} iterations each")
+    runs = (
+        ("legacy validate", legacy_validate),
+        ("ast validate", validate),
+        ("legacy validate+cache key", legacy_pipeline),
+        ("ast validate+cache key", ast_pipeline),
+    )
+    for name, validator in runs:
+        costs = time_validator(validator, queries, args.iterations)
+        print(f"{name:>26}: mean {statistics.mean(costs):7.1f} us  "
+              f"median {statistics.median(costs):7.1f} us  max {max(costs):7.1f} us")
+
+if __name__ == "__main__":
+    main()
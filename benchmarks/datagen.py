@@ -0,0 +1,166 @@
+"""Seeded synthetic schema and data at benchmark scale.
+
+Creates the four init_db.sql tables in a dedicated database and fills them
+with generated rows (scale 1 is 10k customers, 1k products, 100k orders and
+300k order items; scale 10 gives millions), then adds --tables synthetic
+tables that reference customers so schema retrieval has a realistic
+catalog to search. The same --seed always produces the same schema and data.
+
+    python -m benchmarks.datagen --database guardsql_bench --scale 10 --tables 2000
+"""
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from backend.core.config import get_settings
+
+INIT_SQL = Path(__file__).resolve().parent.parent / "init_db.sql"
+
+BASE_TABLES = ("order_items", "orders", "products", "customers")
+
+AREAS = [
+    "sales", "billing", "support", "inventory", "shipping", "marketing", "finance", "hr", "web",
+    "partner"
+]
+ENTITIES = [
+    "event", "invoice", "ticket", "shipment", "campaign", "payment", "visit", "contract", "refund",
+    "review", "subscription", "coupon", "return", "lead", "note"
+]
+EXTRA_COLUMNS = [
+    ("quantity", "INTEGER", "(random() * 100)::int"),
+    ("score", "NUMERIC(6, 2)", "round((random() * 1000)::numeric, 2)"),
+    ("region", "VARCHAR(20)", "(ARRAY['north', 'south', 'east', 'west'])[1 + (g % 4)]"),
+    ("is_active", "BOOLEAN", "random() < 0.8"),
+    ("updated_at", "TIMESTAMP", "TIMESTAMP '2024-01-01' + (random() * 365) * INTERVAL '1 day'"),
+    ("reference", "VARCHAR(40)", "md5(g::text)"),
+    ("priority", "SMALLINT", "(random() * 5)::smallint"),
+]
+
+STATUSES = "ARRAY['pending', 'processing', 'shipped', 'completed', 'cancelled']"
+STATES = "ARRAY['NY', 'CA', 'TX', 'IL', 'AZ', 'WA', 'FL', 'MA']"
+CITIES = (
+    "ARRAY['New York', 'Los Angeles', 'Houston', 'Chicago', 'Phoenix', 'Seattle', 'Miami', "
+    "'Boston']"
+)
+CATEGORIES = "ARRAY['Electronics', 'Accessories', 'Furniture', 'Office', 'Outdoor']"
+
+def base_ddl() -> list[str]:
+    return re.findall(r"CREATE TABLE IF NOT EXISTS .*?\);", INIT_SQL.read_text(), re.S)
+
+def fill_base(conn, scale: float):
+    customers = max(1, int(10_000 * scale))
+    products = max(1, int(1_000 * scale))
+    orders = max(1, int(100_000 * scale))
+    conn.execute(text(f"""
+        INSERT INTO customers (first_name, last_name, email, city, state, country)
+        SELECT 'first_' || g, 'last_' || (g % 5000), 'customer' || g || '@example.com',
+               ({CITIES})[1 + (g % 8)], ({STATES})[1 + (g % 8)], 'USA'
+        FROM generate_series(1, {customers}) g
+    """))
+    conn.execute(text(f"""
+        INSERT INTO products (product_name, category, price, stock_quantity)
+        SELECT 'Product ' || g, ({CATEGORIES})[1 + (g % 5)],
+               round((5 + random() * 1995)::numeric, 2), (random() * 500)::int
+        FROM generate_series(1, {products}) g
+    """))
+    conn.execute(text(f"""
+        INSERT INTO orders (customer_id, order_date, total_amount, status)
+        SELECT 1 + (random() * ({customers} - 1))::int,
+               TIMESTAMP '2023-01-01' + (random() * 730) * INTERVAL '1 day',
+               round((10 + random() * 2000)::numeric, 2), ({STATUSES})[1 + (random() * 4)::int]
+        FROM generate_series(1, {orders}) g
+    """))
+    conn.execute(text(f"""
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+        SELECT o, 1 + (random() * ({products} - 1))::int, 1 + (random() * 4)::int,
+               round((5 + random() * 500)::numeric, 2)
+        FROM generate_series(1, {orders}) o, generate_series(1, 3) i
+    """))
+    return {
+        "customers": customers, "products": products, "orders": orders, "order_items": orders * 3
+    }
+
+def synthetic_tables(count: int, seed: int) -> list[tuple[str, list[tuple[str, str, str]]]]:
+    rng = random.Random(seed)
+    tables = []
+    for i in range(count):
+        name = f"{rng.choice(AREAS)}_{rng.choice(ENTITIES)}_{i:04d}"
+        extras = rng.sample(EXTRA_COLUMNS, rng.randint(1, len(EXTRA_COLUMNS)))
+        tables.append((name, extras))
+    return tables
+
+def create_synthetic(conn, tables, rows: int, customers: int):
+    for name, extras in tables:
+        columns = ",\n".join(f"    {column} {data_type}" for column, data_type, _ in extras)
+        conn.execute(text(f"""
+            CREATE TABLE {name} (
+                id SERIAL PRIMARY KEY,
+                customer_id INTEGER REFERENCES customers(customer_id),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                {columns}
+            )
+        """))
+        if rows:
+            names = ", ".join(column for column, _, _ in extras)
+            values = ", ".join(expr for _, _, expr in extras)
+            conn.execute(text(f"""
+                INSERT INTO {name} (customer_id, {names})
+                SELECT 1 + (random() * ({customers} - 1))::int, {values}
+                FROM generate_series(1, {rows}) g
+            """))
+
+def ensure_database(url):
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database}
+        ).scalar()
+        if exists:
+            conn.execute(text(f'DROP DATABASE "{url.database}" WITH (FORCE)'))
+        conn.execute(text(f'CREATE DATABASE "{url.database}"'))
+    admin.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database", default="guardsql_bench", help="database to (re)create next to DATABASE_URL"
+    )
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument(
+        "--tables", type=int, default=200, help="synthetic tables on top of the base schema"
+    )
+    parser.add_argument("--table-rows", type=int, default=100, help="rows per synthetic table")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = make_url(get_settings().database_url).set(
+        drivername="postgresql+psycopg2", database=args.database
+    )
+    started = time.perf_counter()
+    ensure_database(url)
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("SELECT setseed(:seed)"), {"seed": (args.seed % 1000) / 1000})
+        for statement in base_ddl():
+            conn.execute(text(statement))
+        counts = fill_base(conn, args.scale)
+        tables = synthetic_tables(args.tables, args.seed)
+        create_synthetic(conn, tables, args.table_rows, counts["customers"])
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    print(f"Created {url.render_as_string(hide_password=True)} in {elapsed:.1f}s")
+    for table, rows in counts.items():
+        print(f"  {table:>12}: {rows:>10,} rows")
+    print(f"  {args.tables} synthetic tables x {args.table_rows} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""The TEST_QUERIES.md questions paired with the SQL a model typically answers.
+
+The load driver replays these questions and the fake Ollama server answers
+them with the paired SQL, so a run exercises validation, planning and
+execution the way real traffic does, rejected statements included.
+"""
+import re
+from pathlib import Path
+
+TEST_QUERIES = Path(__file__).resolve().parent.parent / "TEST_QUERIES.md"
+
+CANNED_SQL = {
+    "Show me all customers": "SELECT * FROM customers",
+    "Show me all products": "SELECT * FROM products",
+    "How many customers do we have?": "SELECT COUNT(*) FROM customers",
+    "How many orders are there?": "SELECT COUNT(*) FROM orders",
+    "Show me all customers from Texas": "SELECT * FROM customers WHERE state = 'TX'",
+    "List customers from CA": "SELECT * FROM customers WHERE state = 'CA'",
+    "Show me products under $100": "SELECT * FROM products WHERE price < 100",
+    "List products priced above $500": "SELECT * FROM products WHERE price > 500",
+    "Show me all electronics products": "SELECT * FROM products WHERE category = 'Electronics'",
+    "List all furniture items": "SELECT * FROM products WHERE category = 'Furniture'",
+    "Show top 5 most expensive products": "SELECT * FROM products ORDER BY price DESC LIMIT 5",
+    "Show me the 5 cheapest products": "SELECT * FROM products ORDER BY price ASC LIMIT 5",
+    "Show me the last 10 orders": "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10",
+    "List customers sorted by last name": "SELECT * FROM customers ORDER BY last_name",
+    "How many orders are completed?": "SELECT COUNT(*) FROM orders WHERE status = 'completed'",
+    "Show me all pending orders": "SELECT * FROM orders WHERE status = 'pending'",
+    "List all shipped orders": "SELECT * FROM orders WHERE status = 'shipped'",
+    "What is the total revenue from all orders?":
+        "SELECT SUM(total_amount) AS total_revenue FROM orders",
+    "What is the average order amount?": "SELECT AVG(total_amount) AS average_order FROM orders",
+    "How many products are in each category?":
+        "SELECT category, COUNT(*) AS products FROM products GROUP BY category",
+    "Count orders grouped by status":
+        "SELECT status, COUNT(*) AS orders FROM orders GROUP BY status",
+    "Show me customers with their order totals":
+        "SELECT c.customer_id, c.first_name, c.last_name, SUM(o.total_amount) AS order_total "
+        "FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+        "GROUP BY c.customer_id, c.first_name, c.last_name",
+    "Show order details with customer names":
+        "SELECT o.order_id, o.order_date, o.total_amount, c.first_name, c.last_name "
+        "FROM orders o JOIN customers c ON c.customer_id = o.customer_id",
+    "Which products have been ordered?":
+        "SELECT DISTINCT p.product_id, p.product_name FROM products p "
+        "JOIN order_items oi ON oi.product_id = p.product_id",
+    "Show customers from New York with their orders":
+        "SELECT c.first_name, c.last_name, o.order_id, o.total_amount FROM customers c "
+        "JOIN orders o ON o.customer_id = c.customer_id WHERE c.city = 'New York'",
+    "Show products between $50 and $200": "SELECT * FROM products WHERE price BETWEEN 50 AND 200",
+    "Show orders from January 2024":
+        "SELECT * FROM orders WHERE order_date >= '2024-01-01' AND order_date < '2024-02-01'",
+    "Show products with stock less than 50": "SELECT * FROM products WHERE stock_quantity < 50",
+    "Show top 5 customers by total spending":
+        "SELECT c.customer_id, c.first_name, c.last_name, SUM(o.total_amount) AS total_spent "
+        "FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+        "GROUP BY c.customer_id, c.first_name, c.last_name ORDER BY total_spent DESC LIMIT 5",
+    "Which products have never been ordered?":
+        "SELECT p.* FROM products p LEFT JOIN order_items oi ON oi.product_id = p.product_id "
+        "WHERE oi.order_item_id IS NULL",
+    "What is the average price per category?":
+        "SELECT category, AVG(price) AS average_price FROM products GROUP BY category",
+    "Show customers with more than 1 order":
+        "SELECT c.customer_id, c.first_name, c.last_name, COUNT(o.order_id) AS orders "
+        "FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+        "GROUP BY c.customer_id, c.first_name, c.last_name HAVING COUNT(o.order_id) > 1",
+    "Show me pg_tables": "SELECT * FROM pg_tables",
+    "Show customers from Antarctica": "SELECT * FROM customers WHERE country = 'Antarctica'",
+    "Show customers from TEXAS": "SELECT * FROM customers WHERE UPPER(state) = 'TX'",
+    'Show products with name containing "27""':
+        "SELECT * FROM products WHERE product_name LIKE '%27\"%'",
+    "Show products priced exactly at $29.99": "SELECT * FROM products WHERE price = 29.99",
+}
+
+def documented_questions() -> list[str]:
+    numbered_block = re.compile(r"^\s*\d+\. \*\*.*?\*\*\s*\n\s*```\n(.*?)\n\s*```", re.S | re.M)
+    blocks = numbered_block.findall(TEST_QUERIES.read_text())
+    return [block.strip() for block in blocks]
+
+def workload() -> dict[str, str]:
+    """Question -> canned SQL; statements typed as questions are answered verbatim."""
+    return {question: CANNED_SQL.get(question, question) for question in documented_questions()}
@@ -43,14 +43,60 @@ CREATE TABLE IF NOT EXISTS order_items (
     unit_price DECIMAL(10, 2) NOT NULL
 );
 
+-- Query logs are partitioned by month; the API creates upcoming partitions and drops expired ones
 CREATE TABLE IF NOT EXISTS query_logs (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     question TEXT NOT NULL,
     generated_sql TEXT,
     status VARCHAR(50) NOT NULL,
     error_message TEXT,
     execution_time_ms INTEGER,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    schema_fingerprint VARCHAR(32),
+    sql_hash CHAR(32) GENERATED ALWAYS AS (md5(COALESCE(generated_sql, ''))) STORED,
+    catalog_ms INTEGER,
+    schema_ms INTEGER,
+    prompt_ms INTEGER,
+    llm_ms INTEGER,
+    validate_ms INTEGER,
+    plan_ms INTEGER,
+    db_ms INTEGER,
+    retry_ms INTEGER,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_query_logs_created_at ON query_logs (created_at);
+CREATE INDEX IF NOT EXISTS idx_query_logs_status ON query_logs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_query_logs_sql_hash ON query_logs (sql_hash);
+CREATE INDEX IF NOT EXISTS idx_query_logs_fingerprint ON query_logs (schema_fingerprint, question);
+
+DO $$
+DECLARE
+    month DATE := date_trunc('month', CURRENT_DATE);
+BEGIN
+    FOR i IN 0..2 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF query_logs FOR VALUES FROM (%L) TO (%L)',
+            'query_logs_p' || to_char(month, 'YYYYMM'), month, month + interval '1 month'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS query_log_rollups (
+    bucket TIMESTAMP NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    latency_bucket SMALLINT NOT NULL,
+    requests INTEGER NOT NULL,
+    PRIMARY KEY (bucket, status, latency_bucket)
+);
+
+CREATE TABLE IF NOT EXISTS query_log_questions (
+    day DATE NOT NULL,
+    question TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    PRIMARY KEY (day, question)
 );
 
 -- Insert sample customers
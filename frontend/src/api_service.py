@@ -1,13 +1,26 @@
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional, Tuple
 
-from config import API_BASE_URL, REQUEST_TIMEOUT
+from config import API_BASE_URL, REQUEST_TIMEOUT, HTTP_POOL_SIZE
+
+def build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Shared by every browser session of this Streamlit server; urllib3's pool is thread-safe
+session = build_session()
+executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="guardsql-api")
 
 class APIService:
     @staticmethod
     def check_health() -> Tuple[bool, str]:
         try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=2)
+            response = session.get(f"{API_BASE_URL}/health", timeout=2)
             if response.status_code == 200:
                 return True, "Online"
             return False, f"Error {response.status_code}"
@@ -19,9 +32,9 @@ class APIService:
     @staticmethod
     def execute_query(question: str, auth: Optional[Tuple[str, str]] = None) -> Dict:
         try:
-            response = requests.post(
+            response = session.post(
                 f"{API_BASE_URL}/query",
-                json={"question": question},
+                json={"question": question, "format": "columnar"},
                 auth=auth,
                 timeout=REQUEST_TIMEOUT
             )
@@ -42,3 +55,7 @@ class APIService:
             return {"success": False, "error": "Request timed out", "code": 0}
         except Exception as e:
             return {"success": False, "error": str(e), "code": 0}
+    
+    @staticmethod
+    def submit_query(question: str, auth: Optional[Tuple[str, str]] = None) -> Future:
+        return executor.submit(APIService.execute_query, question, auth)
@@ -1,8 +1,46 @@
+import math
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
 from api_service import APIService
+from config import PAGE_SIZE, MAX_MESSAGES, HISTORY_MAX_MB
+from results import ResultStore
+
+def render_result(msg: dict):
+    store = st.session_state.results
+    message_id = msg["id"]
+    if store.get(message_id) is None:
+        st.caption("Result dropped from history to save memory; ask again to see the rows.")
+        return
+    
+    pages = math.ceil(msg["row_count"] / PAGE_SIZE)
+    page = 0
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages}, {PAGE_SIZE} rows each)", min_value=1, max_value=pages, value=1,
+            key=f"page_{message_id}"
+        ) - 1
+    st.dataframe(store.page(message_id, page, PAGE_SIZE), use_container_width=True, height=300)
+    
+    # CSV is only built once asked for, then kept with the result
+    csv = store.csv(message_id, generate=False)
+    if csv is None:
+        st.button("📥 Prepare CSV", key=f"csv_{message_id}", on_click=store.csv, args=(message_id,))
+    else:
+        st.download_button(
+            "📥 Download",
+            csv,
+            f"results_{message_id}.csv",
+            "text/csv",
+            key=f"dl_{message_id}"
+        )
+
+def add_message(message: dict):
+    st.session_state.messages.append(message)
+    while len(st.session_state.messages) > MAX_MESSAGES:
+        dropped = st.session_state.messages.pop(0)
+        if "id" in dropped:
+            st.session_state.results.discard(dropped["id"])
 
 st.set_page_config(
     page_title="GuardSQL",
@@ -15,6 +53,12 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "processing" not in st.session_state:
     st.session_state.processing = False
+if "pending" not in st.session_state:
+    st.session_state.pending = None
+if "results" not in st.session_state:
+    st.session_state.results = ResultStore(HISTORY_MAX_MB * 1024 * 1024)
+if "next_id" not in st.session_state:
+    st.session_state.next_id = 0
 
 st.markdown("""
 <style>
@@ -210,7 +254,7 @@ with st.form(key="chat_form", clear_on_submit=True):
         )
 
 # Render messages below input
-for idx, msg in enumerate(st.session_state.messages):
+for msg in st.session_state.messages:
     if msg["role"] == "user":
         st.markdown(f"""
             <div class="message message-user">
@@ -249,69 +293,57 @@ for idx, msg in enumerate(st.session_state.messages):
             with st.expander("📝 SQL", expanded=False):
                 st.code(msg["sql"], language="sql")
             
-            if msg["results"]:
-                import pandas as pd
-                df = pd.DataFrame(msg["results"])
-                st.dataframe(df, use_container_width=True, height=300)
-                
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    "📥 Download",
-                    csv,
-                    f"results_{idx}.csv",
-                    "text/csv",
-                    key=f"dl_{idx}"
-                )
+            if msg["row_count"]:
+                render_result(msg)
         
         st.markdown("</div></div>", unsafe_allow_html=True)
-    
-    elif msg["role"] == "loading":
-        st.markdown("""
-            <div class="message message-assistant">
-                <div class="bubble bubble-assistant">
-                    <div class="loading">
-                        <div class="dot"></div>
-                        <div class="dot"></div>
-                        <div class="dot"></div>
-                    </div>
+
+if st.session_state.pending is not None:
+    st.markdown("""
+        <div class="message message-assistant">
+            <div class="bubble bubble-assistant">
+                <div class="loading">
+                    <div class="dot"></div>
+                    <div class="dot"></div>
+                    <div class="dot"></div>
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        </div>
+    """, unsafe_allow_html=True)
 
 if send and user_input and not st.session_state.processing:
     st.session_state.processing = True
     
-    st.session_state.messages.append({
+    add_message({
         "role": "user",
         "content": user_input
     })
     
-    st.session_state.messages.append({
-        "role": "loading"
-    })
+    # Sent now, so the request is in flight while the history re-renders
+    st.session_state.pending = APIService.submit_query(user_input)
     
     st.rerun()
 
-if st.session_state.messages and st.session_state.messages[-1]["role"] == "loading":
-    st.session_state.messages.pop()
-    
-    user_msg = [m for m in st.session_state.messages if m["role"] == "user"][-1]["content"]
-    
-    result = APIService.execute_query(user_msg)
+if st.session_state.pending is not None:
+    result = st.session_state.pending.result()
+    st.session_state.pending = None
     
     if result["success"]:
         data = result["data"]
-        st.session_state.messages.append({
+        message_id = str(st.session_state.next_id)
+        st.session_state.next_id += 1
+        if data["row_count"]:
+            st.session_state.results.put(message_id, data["data"])
+        add_message({
             "role": "assistant",
+            "id": message_id,
             "sql": data["sql"],
             "row_count": data["row_count"],
             "col_count": len(data["columns"]),
-            "exec_time": data["execution_time_ms"],
-            "results": data["results"],
-            "columns": data["columns"]
+            "exec_time": data["execution_time_ms"]
         })
     else:
-        st.session_state.messages.append({
+        add_message({
             "role": "assistant",
             "error": result["error"]
         })
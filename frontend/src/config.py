@@ -2,3 +2,7 @@ import os
 
 API_BASE_URL = os.getenv("GUARDSQL_API_URL", "http://localhost:8000")
 REQUEST_TIMEOUT = int(os.getenv("GUARDSQL_TIMEOUT", "70"))
+HTTP_POOL_SIZE = int(os.getenv("GUARDSQL_HTTP_POOL_SIZE", "10"))
+PAGE_SIZE = int(os.getenv("GUARDSQL_PAGE_SIZE", "500"))
+MAX_MESSAGES = int(os.getenv("GUARDSQL_MAX_MESSAGES", "100"))
+HISTORY_MAX_MB = int(os.getenv("GUARDSQL_HISTORY_MB", "200"))
@@ -0,0 +1,66 @@
+import pandas as pd
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+def build_dataframe(data: dict) -> pd.DataFrame:
+    df = pd.DataFrame(dict(zip(data["columns"], data["values"])), columns=data["columns"])
+    for column, col_type in zip(data["columns"], data["types"]):
+        if col_type in ("decimal", "float"):
+            df[column] = pd.to_numeric(df[column])
+        elif col_type in ("timestamp", "timestamptz", "date"):
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+@dataclass
+class StoredResult:
+    df: pd.DataFrame
+    nbytes: int
+    csv: Optional[bytes] = None
+
+class ResultStore:
+    """DataFrames per message id, oldest evicted first once over max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.results: OrderedDict[str, StoredResult] = OrderedDict()
+
+    def put(self, message_id: str, data: dict) -> pd.DataFrame:
+        df = build_dataframe(data)
+        self.results[message_id] = StoredResult(df, int(df.memory_usage(deep=True).sum()))
+        self.nbytes += self.results[message_id].nbytes
+        self.evict()
+        return df
+
+    def get(self, message_id: str) -> Optional[pd.DataFrame]:
+        stored = self.results.get(message_id)
+        return stored.df if stored else None
+
+    def page(self, message_id: str, page: int, page_size: int) -> Optional[pd.DataFrame]:
+        df = self.get(message_id)
+        if df is None:
+            return None
+        return df.iloc[page * page_size:(page + 1) * page_size]
+
+    def csv(self, message_id: str, generate: bool = True) -> Optional[bytes]:
+        stored = self.results.get(message_id)
+        if stored is None:
+            return None
+        if stored.csv is None and generate:
+            stored.csv = stored.df.to_csv(index=False).encode()
+            stored.nbytes += len(stored.csv)
+            self.nbytes += len(stored.csv)
+            self.evict()
+        return stored.csv
+
+    def discard(self, message_id: str):
+        stored = self.results.pop(message_id, None)
+        if stored:
+            self.nbytes -= stored.nbytes
+
+    def evict(self):
+        # The newest result always stays, even when it alone is over budget
+        while self.nbytes > self.max_bytes and len(self.results) > 1:
+            _, stored = self.results.popitem(last=False)
+            self.nbytes -= stored.nbytes
@@ -0,0 +1,100 @@
+"""A stand-in for Ollama's /api/generate that streams a canned SQL answer.
+
+Use it in-process through httpx.ASGITransport, or run it as a server:
+
+    python -m tests.fake_ollama --port 11434 --token-ms 20
+
+With --answers pointing at a JSON object of question -> SQL, the question in
+the prompt picks the answer; unknown questions get the default tokens.
+"""
+import argparse
+import asyncio
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_TOKENS = [
+    "SELECT", " *", " FROM", " orders", " WHERE", " status", " =", " 'completed'", ";",
+    "\n\nThis", " query", " returns", " completed", " orders", "."
+]
+
+QUESTION_PATTERN = re.compile(r"(?:^|\n)(?:Original question|Question): (.*)")
+
+def tokenize(sql: str) -> list[str]:
+    return re.findall(r"\s*\S+", sql.rstrip().rstrip(";")) + [";"]
+
+def create_app(
+    tokens: list[str] = None,
+    token_delay: float = 0.0,
+    failing_hosts: set[str] = None,
+    answers: dict[str, str] = None,
+    first_token_delay: float = 0.0
+) -> FastAPI:
+    app = FastAPI()
+    app.state.tokens = tokens or DEFAULT_TOKENS
+    app.state.token_delay = token_delay
+    app.state.first_token_delay = first_token_delay
+    app.state.answers = {q.strip().lower(): tokenize(sql) for q, sql in (answers or {}).items()}
+    app.state.failing_hosts = failing_hosts if failing_hosts is not None else set()
+    app.state.requests = Counter()
+    app.state.active = 0
+    app.state.peak = 0
+
+    def pick_tokens(prompt: str) -> list[str]:
+        match = QUESTION_PATTERN.search(prompt)
+        if match:
+            return app.state.answers.get(match.group(1).strip().lower(), app.state.tokens)
+        return app.state.tokens
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        host = request.headers.get("host", "")
+        app.state.requests[host] += 1
+        if host in app.state.failing_hosts:
+            return JSONResponse({"error": "model unavailable"}, status_code=500)
+        tokens = pick_tokens((await request.json()).get("prompt", ""))
+
+        async def body():
+            app.state.active += 1
+            app.state.peak = max(app.state.peak, app.state.active)
+            try:
+                if app.state.first_token_delay:
+                    await asyncio.sleep(app.state.first_token_delay)
+                for token in tokens:
+                    if app.state.token_delay:
+                        await asyncio.sleep(app.state.token_delay)
+                    yield json.dumps({"response": token, "done": False}) + "\n"
+                yield json.dumps({
+                    "response": "",
+                    "done": True,
+                    "eval_count": len(tokens),
+                    "eval_duration": int(max(app.state.token_delay, 0.001) * len(tokens) * 1e9)
+                }) + "\n"
+            finally:
+                app.state.active -= 1
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--token-ms", type=int, default=20)
+    parser.add_argument("--ttft-ms", type=int, default=0)
+    parser.add_argument("--answers", help="JSON file mapping questions to SQL")
+    args = parser.parse_args()
+    answers = json.loads(Path(args.answers).read_text()) if args.answers else None
+    uvicorn.run(
+        create_app(
+            token_delay=args.token_ms / 1000, answers=answers, first_token_delay=args.ttft_ms / 1000
+        ),
+        port=args.port,
+        log_level="warning"
+    )
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.core.metrics import counters
+from backend.db import audit
+from backend.db.audit import AuditRecord, AuditWriter
+
+def record(question: str) -> AuditRecord:
+    return AuditRecord(question, "SELECT 1", "success", None, 5, "abc", time.time())
+
+@pytest.fixture
+def inserted(monkeypatch):
+    batches = []
+
+    async def fake_insert(records):
+        batches.append([r.question for r in records])
+
+    monkeypatch.setattr(audit, "insert_records", fake_insert)
+    return batches
+
+def test_batches_by_size_and_flushes_on_stop(inserted):
+    async def run():
+        writer = AuditWriter(queue_size=100, batch_size=3, flush_interval=10)
+        writer.start()
+        for i in range(7):
+            await writer.submit(record(f"q{i}"))
+        await writer.stop()
+
+    asyncio.run(run())
+    assert inserted == [["q0", "q1", "q2"], ["q3", "q4", "q5"], ["q6"]]
+
+def test_flushes_partial_batch_after_interval(inserted):
+    async def run():
+        writer = AuditWriter(queue_size=100, batch_size=100, flush_interval=0.05)
+        writer.start()
+        await writer.submit(record("lonely"))
+        await asyncio.sleep(0.2)
+        flushed = list(inserted)
+        await writer.stop()
+        return flushed
+
+    assert asyncio.run(run()) == [["lonely"]]
+
+def test_drop_policy_when_queue_full(monkeypatch):
+    release = asyncio.Event()
+
+    async def slow_insert(records):
+        await release.wait()
+
+    monkeypatch.setattr(audit, "insert_records", slow_insert)
+
+    async def run():
+        writer = AuditWriter(queue_size=1, batch_size=1, flush_interval=10, full_policy="drop")
+        writer.start()
+        before = counters["audit_dropped"]
+        for i in range(4):
+            await writer.submit(record(f"q{i}"))
+            await asyncio.sleep(0)
+        dropped = counters["audit_dropped"] - before
+        release.set()
+        await writer.stop()
+        return dropped
+
+    assert asyncio.run(run()) == 2
+
+def test_spills_to_file_and_replays(monkeypatch, tmp_path):
+    batches = []
+    available = False
+
+    async def flaky_insert(records):
+        if not available:
+            raise ConnectionError("database down")
+        batches.append([r.question for r in records])
+
+    monkeypatch.setattr(audit, "insert_records", flaky_insert)
+    spill = tmp_path / "audit.jsonl"
+
+    async def run():
+        nonlocal available
+        writer = AuditWriter(queue_size=10, batch_size=10, flush_interval=10, spill_path=str(spill))
+        await writer.submit(record("while down"))
+        assert spill.exists()
+        available = True
+        await writer.submit(record("after recovery"))
+
+    asyncio.run(run())
+    assert batches == [["while down"], ["after recovery"]]
+    assert not spill.exists()
+
+def test_timing_columns_fold_retry_stages():
+    params = record("timed").params(time.time())
+    assert params["llm_ms"] is None
+
+    timed = AuditRecord("q", "SELECT 1", "success_retry", None, 90, "abc", time.time(),
+                        {"llm": 40.4, "db": 2.6, "retry_llm": 30.0, "retry_db": 5.2})
+    params = timed.params(time.time())
+    stages = (params["llm_ms"], params["db_ms"], params["retry_ms"], params["plan_ms"])
+    assert stages == (40, 3, 35, None)
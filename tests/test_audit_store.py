@@ -0,0 +1,65 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from backend.db import audit_store
+from backend.db.audit_store import add_months, latency_percentiles, partition_month, partition_name
+from backend.db.connection import connect
+
+QUESTION = "test_audit_store question"
+
+def test_month_arithmetic():
+    assert add_months(date(2024, 11, 15), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 31), -1) == date(2023, 12, 1)
+    assert partition_name(date(2024, 3, 1)) == "query_logs_p202403"
+    assert partition_month("query_logs_p202403") == date(2024, 3, 1)
+    assert partition_month("query_logs_legacy") is None
+
+def test_latency_percentiles_from_histogram():
+    # 90 requests under 50ms, 9 in the 500-1000ms bucket, 1 over a minute
+    histogram = {0: 90, 4: 9, 10: 1}
+    assert latency_percentiles(histogram) == {"p50": 50, "p95": 1000, "p99": 1000}
+    assert latency_percentiles({}) == {"p50": None, "p95": None, "p99": None}
+
+def test_rollups_feed_stats(run_db):
+    async def run():
+        await audit_store.init_audit_store()
+        async with connect("meta") as conn:
+            await conn.execute(text("""
+                INSERT INTO query_logs (question, generated_sql, status, execution_time_ms)
+                VALUES (:q, 'SELECT 1', 'success', 20), (:q, 'SELECT 1', 'success', 30),
+                       (:q, 'SELECT 1', 'validation_error', 2)
+            """), {"q": QUESTION})
+            await conn.commit()
+        try:
+            await audit_store.refresh_rollups()
+            return await audit_store.query_stats(hours=1, top=100)
+        finally:
+            async with connect("meta") as conn:
+                await conn.execute(
+                    text("DELETE FROM query_logs WHERE question = :q"), {"q": QUESTION}
+                )
+                await conn.commit()
+            await audit_store.refresh_rollups()
+
+    stats = run_db(run)
+    assert stats["requests"] >= 3
+    assert stats["status_counts"]["validation_error"] >= 1
+    mine = next(q for q in stats["top_questions"] if q["question"] == QUESTION)
+    assert mine == {"question": QUESTION, "requests": 3, "errors": 1}
+
+def test_retention_drops_only_expired_partitions(monkeypatch, run_db):
+    monkeypatch.setattr(audit_store.settings, "audit_retention_months", 12)
+
+    async def run():
+        await audit_store.init_audit_store()
+        async with connect("meta") as conn:
+            await audit_store.create_partitions(conn, date(2001, 1, 1), date(2001, 1, 1))
+            dropped = await audit_store.drop_expired_partitions(conn, date.today())
+            await conn.commit()
+            remaining = (await conn.execute(text(audit_store.PARTITIONS_SQL))).scalars().all()
+        return dropped, remaining
+
+    dropped, remaining = run_db(run)
+    assert dropped == ["query_logs_p200101"]
+    assert partition_name(date.today().replace(day=1)) in remaining
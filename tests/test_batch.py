@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.api import routes
+from backend.core.exceptions import ValidationError
+from backend.db import audit
+from backend.main import app
+from backend.services.serialization import loads
+
+client = TestClient(app)
+
+async def fake_process_query(question: str, catalog=None) -> dict:
+    if question.startswith("DROP"):
+        await audit.log_query(question, question, "validation_error", "Forbidden statement: DROP")
+        raise ValidationError("Forbidden statement: DROP")
+    await asyncio.sleep(0.2 if question == "slow" else 0)
+    await audit.log_query(question, "SELECT 1", "success")
+    return {
+        "sql": "SELECT 1", "rows": [(1,)], "columns": ["n"], "row_count": 1, "execution_time_ms": 1,
+        "timings": {"llm": 1.0}
+    }
+
+async def fake_catalog():
+    return None
+
+def post_batch(monkeypatch, questions: list[str]) -> tuple[list[dict], list[list[str]]]:
+    flushes = []
+
+    async def fake_insert(records):
+        flushes.append([r.question for r in records])
+
+    monkeypatch.setattr(routes, "process_query", fake_process_query)
+    monkeypatch.setattr(routes, "get_catalog", fake_catalog)
+    monkeypatch.setattr(audit, "insert_records", fake_insert)
+    response = client.post("/query/batch", json={"questions": questions})
+    assert response.status_code == 200
+    return [loads(line) for line in response.text.splitlines()], flushes
+
+def test_batch_streams_items_as_they_complete(monkeypatch):
+    lines, flushes = post_batch(monkeypatch, ["slow", "fast", "DROP TABLE customers"])
+
+    assert lines[2]["index"] == 0
+    by_index = {line["index"]: line for line in lines[:3]}
+    assert by_index[0]["status"] == 200 and by_index[0]["result"]["results"] == [{"n": 1}]
+    assert by_index[2]["status"] == 400 and "DROP" in by_index[2]["error"]
+    assert lines[3]["summary"]["succeeded"] == 2 and lines[3]["summary"]["failed"] == 1
+    assert len(flushes) == 1
+    assert sorted(flushes[0]) == sorted(["slow", "fast", "DROP TABLE customers"])
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(routes.settings, "batch_max_questions", 2)
+    response = client.post("/query/batch", json={"questions": ["a", "b", "c"]})
+    assert response.status_code == 422
@@ -0,0 +1,63 @@
+import pytest
+
+from backend.core.exceptions import BindingError
+from backend.services import binder
+from backend.services.binder import bind
+from backend.services.repair import classify
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders",
+    "SELECT c.first_name, SUM(o.total_amount) AS spent FROM customers c "
+    "JOIN orders o ON o.customer_id = c.customer_id GROUP BY c.first_name ORDER BY spent DESC",
+    "SELECT customer_id FROM orders JOIN customers USING (customer_id)",
+    "WITH t AS (SELECT customer_id, COUNT(*) AS n FROM orders GROUP BY 1) "
+    "SELECT t.n FROM t WHERE n > 1",
+    "SELECT state, (SELECT MAX(total_amount) FROM orders o WHERE o.customer_id = c.customer_id) "
+    "FROM customers c",
+    "SELECT category FROM products p "
+    "WHERE EXISTS (SELECT 1 FROM order_items WHERE product_id = p.product_id)",
+    "SELECT t.status FROM (SELECT status, COUNT(*) FROM orders GROUP BY status) t",
+    "SELECT g FROM generate_series(1, 3) AS g",
+    "SELECT c FROM customers c",
+    "SELECT COUNT(*) FROM query_logs",
+])
+def test_valid_queries_bind(sql, make_catalog):
+    bind(sql, make_catalog(0))
+
+@pytest.mark.parametrize("sql, kind, identifier", [
+    ("SELECT SUM(totl_amount) FROM orders", "undefined_column", "totl_amount"),
+    ("SELECT o.totl FROM orders o", "undefined_column", "o.totl"),
+    ("SELECT COUNT(*) FROM order_item", "undefined_table", "order_item"),
+    ("SELECT customer_id FROM orders o JOIN customers c ON o.customer_id = c.customer_id",
+     "ambiguous_column", "customer_id"),
+    ("SELECT x.state FROM customers c", "undefined_table", None),
+    ("SELECT t.bogus FROM (SELECT status FROM orders) t", "undefined_column", "t.bogus"),
+    ('SELECT "State" FROM customers', "undefined_column", "State"),
+])
+def test_unknown_identifiers_fail_like_postgres(sql, kind, identifier, make_catalog):
+    with pytest.raises(BindingError) as raised:
+        bind(sql, make_catalog(0))
+    assert (raised.value.kind, raised.value.identifier) == (kind, identifier)
+    assert classify(raised.value).kind == kind
+
+def test_error_lists_what_exists(make_catalog):
+    with pytest.raises(BindingError) as raised:
+        bind("SELECT o.totl FROM orders o", make_catalog(0))
+    assert str(raised.value) == (
+        "column o.totl does not exist\n"
+        "HINT:  Available columns: customer_id, order_id, total_amount."
+    )
+    assert raised.value.sqlstate == "42703"
+
+def test_disabled(monkeypatch, make_catalog):
+    monkeypatch.setattr(binder.settings, "bind_check_enabled", False)
+    bind("SELECT bogus FROM nowhere", make_catalog(0))
+
+def test_other_schemas_and_views_are_left_to_postgres(make_catalog):
+    catalog = make_catalog(0)
+    catalog.other_relations = frozenset({"order_totals"})
+    bind("SELECT segment FROM analytics.customers", catalog)
+    joined = "FROM order_totals o JOIN customers c USING (customer_id)"
+    bind(f"SELECT o.anything, c.state {joined}", catalog)
+    with pytest.raises(BindingError):
+        bind(f"SELECT c.bogus {joined}", catalog)
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+
+from backend.api import routes
+from backend.api.routes import run_until_disconnected
+from backend.api.schemas import QueryRequest
+from backend.core.exceptions import QueryTimeoutError
+from backend.db.connection import connect
+from backend.services import cancellation
+from backend.services.executor import execute_query
+
+SLEEPING = (
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE query LIKE 'SELECT pg_sleep(%' AND state = 'active'"
+)
+
+class DisconnectingRequest:
+    def __init__(self, after: float):
+        self.deadline = time.monotonic() + after
+
+    async def is_disconnected(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+def test_timeout_overrides(monkeypatch):
+    overrides = cancellation.parse_overrides(
+        "route:/query/stream=600000, user:analyst=120000, bogus"
+    )
+    assert overrides == {("route", "/query/stream"): 600000, ("user", "analyst"): 120000}
+
+    monkeypatch.setattr(cancellation, "OVERRIDES", overrides)
+    assert cancellation.timeout_for("/query/stream") == 600000
+    assert cancellation.timeout_for("/query/stream", "analyst") == 120000
+    default = cancellation.settings.statement_timeout_ms
+    assert cancellation.timeout_for("/query", "someone") == default
+
+def test_statement_timeout_cancels_slow_query(run_db):
+    async def run():
+        start = time.perf_counter()
+        with pytest.raises(QueryTimeoutError):
+            await execute_query("SELECT pg_sleep(5)", timeout_ms=200)
+        return time.perf_counter() - start
+
+    assert run_db(run) < 2
+
+def test_statement_timeout_from_context(run_db):
+    async def run():
+        cancellation.statement_timeout.set(200)
+        with pytest.raises(QueryTimeoutError):
+            await execute_query("SELECT pg_sleep(5)")
+
+    run_db(run)
+
+def test_disconnect_cancels_running_query(run_db):
+    async def run():
+        request = DisconnectingRequest(after=0.3)
+        query = execute_query("SELECT pg_sleep(5)", timeout_ms=10000)
+        result = await run_until_disconnected(request, query)
+        async with connect("meta") as conn:
+            still_running = (await conn.execute(text(SLEEPING))).scalar()
+        return result, still_running
+
+    assert run_db(run) == (None, 0)
+
+async def test_disconnect_cancels_opening_stream(monkeypatch):
+    cancelled = []
+
+    async def slow_open_query_stream(question, fmt):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(question)
+            raise
+
+    monkeypatch.setattr(routes, "open_query_stream", slow_open_query_stream)
+    monkeypatch.setattr(routes.settings, "disconnect_poll_interval", 0.05)
+    request = DisconnectingRequest(after=0.1)
+    response = await routes.stream_query(
+        QueryRequest(question="orders"), request, "ndjson", True, None
+    )
+    assert response.status_code == 499
+    assert cancelled == ["orders"]
@@ -0,0 +1,108 @@
+import asyncio
+import os
+from collections import namedtuple
+
+import pytest
+
+from backend.db import catalog as catalog_module
+from backend.db.catalog import build_catalog, dump_catalog, parse_catalog
+
+ColumnRow = namedtuple(
+    "ColumnRow", "table_name table_comment column_name data_type nullable column_comment"
+)
+ConstraintRow = namedtuple("ConstraintRow", "table_name kind column_name ref_table ref_column")
+
+COLUMNS = [
+    ColumnRow("customers", None, "customer_id", "integer", False, None),
+    ColumnRow("customers", None, "state", "character varying(50)", True, "Two-letter state code"),
+    ColumnRow("orders", "Customer orders", "order_id", "integer", False, None),
+    ColumnRow("orders", "Customer orders", "customer_id", "integer", True, None),
+    ColumnRow("query_logs", None, "id", "integer", False, None),
+]
+
+CONSTRAINTS = [
+    ConstraintRow("customers", "p", "customer_id", None, None),
+    ConstraintRow("orders", "p", "order_id", None, None),
+    ConstraintRow("orders", "f", "customer_id", "customers", "customer_id"),
+]
+
+def test_build_catalog():
+    catalog = build_catalog(COLUMNS, CONSTRAINTS, "abc")
+    assert set(catalog.tables) == {"customers", "orders"}
+
+    orders = catalog.tables["orders"]
+    assert orders.comment == "Customer orders"
+    assert orders.primary_key == ["order_id"]
+    assert orders.foreign_keys[0].ref_table == "customers"
+    assert catalog.tables["customers"].columns[1].comment == "Two-letter state code"
+
+def test_render_matches_prompt_format():
+    catalog = build_catalog(COLUMNS, CONSTRAINTS, "abc")
+    assert catalog.render().startswith(
+        "Table: customers\n  customer_id integer\n  state character varying(50)"
+    )
+    assert "query_logs" not in catalog.render()
+
+def test_fingerprint_tracks_content():
+    first = build_catalog(COLUMNS, CONSTRAINTS, "abc")
+    same = build_catalog(COLUMNS, CONSTRAINTS, "other")
+    changed = build_catalog(COLUMNS[:-2], CONSTRAINTS, "abc")
+    assert first.fingerprint == same.fingerprint
+    assert first.fingerprint != changed.fingerprint
+
+def test_fingerprint_tracks_keys():
+    first = build_catalog(COLUMNS, CONSTRAINTS, "abc")
+    assert first.fingerprint != build_catalog(COLUMNS, CONSTRAINTS[:2], "abc").fingerprint
+    assert first.fingerprint != build_catalog(COLUMNS, CONSTRAINTS[1:], "abc").fingerprint
+
+def test_dump_and_parse_round_trip():
+    catalog = build_catalog(COLUMNS, CONSTRAINTS, "abc")
+    restored = parse_catalog(dump_catalog(catalog))
+    assert restored.tables == catalog.tables
+    assert restored.checksum == "abc"
+    assert restored.render() == catalog.render()
+
+def test_other_relations_exclude_described_tables():
+    relations = ["customers", "orders", "order_totals", "query_logs"]
+    catalog = build_catalog(COLUMNS, CONSTRAINTS, "abc", relations)
+    assert catalog.other_relations == {"order_totals", "query_logs"}
+    assert parse_catalog(dump_catalog(catalog)).other_relations == catalog.other_relations
+
+def test_shared_catalog_file(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    monkeypatch.setattr(catalog_module.settings, "catalog_cache_path", str(path))
+    assert catalog_module.read_shared_catalog() is None
+
+    catalog_module.write_shared_catalog(build_catalog(COLUMNS, CONSTRAINTS, "abc"))
+    assert catalog_module.read_shared_catalog().tables["orders"].primary_key == ["order_id"]
+
+    path.write_text("{not json")
+    assert catalog_module.read_shared_catalog() is None
+
+async def test_refresher_reloads_after_another_worker_rewrites_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    monkeypatch.setattr(catalog_module.settings, "catalog_cache_path", str(path))
+    monkeypatch.setattr(catalog_module.settings, "schema_probe_interval", 0)
+    monkeypatch.setattr(catalog_module, "_shared_stamp", None)
+    catalog_module.write_shared_catalog(build_catalog(COLUMNS, CONSTRAINTS, "abc"))
+    probes, reloads = [], []
+
+    async def fake_probe_checksum():
+        probes.append(1)
+        if len(probes) == 2:
+            # Another worker reloads and rewrites the file between two probes
+            catalog_module.write_shared_catalog(build_catalog(COLUMNS[:-2], CONSTRAINTS, "abc"))
+            stamp = os.stat(path).st_mtime_ns + 1_000_000
+            os.utime(path, ns=(stamp, stamp))
+        return "abc"
+
+    async def fake_refresh_catalog(force=False):
+        reloads.append(force)
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(catalog_module, "probe_checksum", fake_probe_checksum)
+    monkeypatch.setattr(catalog_module, "_catalog", await catalog_module.load_shared_or_fresh())
+    monkeypatch.setattr(catalog_module, "refresh_catalog", fake_refresh_catalog)
+    with pytest.raises(asyncio.CancelledError):
+        await catalog_module.catalog_refresher()
+    assert len(probes) == 2 and reloads == [True]
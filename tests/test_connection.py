@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+from backend.db import connection
+from backend.db.connection import Replica, connect, create_pool
+
+UNREACHABLE = "postgresql://postgres@127.0.0.1:1/guardsql_db"
+
+def test_query_pool_prefers_least_busy_healthy_replica(monkeypatch):
+    busy = Replica("postgresql://a/db", create_pool("postgresql://a/db", 1, 0, 1))
+    idle = Replica("postgresql://b/db", create_pool("postgresql://b/db", 1, 0, 1))
+    down = Replica("postgresql://c/db", create_pool("postgresql://c/db", 1, 0, 1), healthy=False)
+    monkeypatch.setattr(connection, "replicas", [busy, idle, down])
+    monkeypatch.setattr(busy.engine.pool, "checkedout", lambda: 3)
+
+    engines = connection.query_engines()
+    assert engines == [idle.engine, busy.engine, connection.async_engine]
+
+def test_unreachable_replica_fails_over_to_primary(monkeypatch, run_db):
+    replica = Replica(UNREACHABLE, create_pool(UNREACHABLE, 1, 0, 1))
+    monkeypatch.setattr(connection, "replicas", [replica])
+
+    async def run():
+        async with connect("query") as conn:
+            return (await conn.execute(text("SELECT 1"))).scalar()
+
+    assert run_db(run) == 1
+    assert not replica.healthy
+
+def test_lag_check_readmits_replica(monkeypatch, run_db):
+    replica = Replica(connection.settings.database_url, connection.meta_engine, healthy=False)
+    monkeypatch.setattr(connection, "replicas", [replica])
+
+    run_db(connection.check_replicas)
+    assert replica.healthy
+    assert replica.lag_seconds == 0
+
+def test_pool_snapshot_reports_waits_and_saturation(run_db):
+    async def run():
+        async with connect("audit"):
+            return connection.pool_snapshot()
+
+    snapshot = run_db(run)
+    assert set(snapshot) == {"query", "audit", "meta"}
+    audit = snapshot["audit"]
+    assert audit["checked_out"] == 1
+    assert audit["saturation"] == round(1 / audit["capacity"], 3)
+    assert audit["checkouts"] >= 1 and audit["wait_ms_max"] >= audit["wait_ms_avg"]
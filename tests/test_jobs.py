@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from backend.core.metrics import span, start_timings
+from backend.services.jobs import JobQueue, JobStore
+
+def make_queue(tmp_path, concurrency: int = 1, max_queued: int = 10, ttl: int = 60) -> JobQueue:
+    store = JobStore(str(tmp_path))
+    return JobQueue(store, concurrency=concurrency, max_queued=max_queued, ttl=ttl)
+
+async def wait_finished(queue: JobQueue, *job_ids: str):
+    while not all(queue.get(job_id).finished for job_id in job_ids):
+        await asyncio.sleep(0.01)
+
+def test_runs_higher_priority_first(tmp_path):
+    order = []
+
+    async def runner(job):
+        order.append(job.question)
+        await asyncio.sleep(0.01)
+        return 200, b"{}"
+
+    async def run():
+        queue = make_queue(tmp_path)
+        jobs = [queue.submit(q, False, p, None) for q, p in [("first", 0), ("low", 0), ("high", 5)]]
+        queue.start(runner)
+        await wait_finished(queue, *(job.id for job in jobs))
+        await queue.stop()
+
+    asyncio.run(run())
+    assert order == ["high", "first", "low"]
+
+def test_failed_job_keeps_error_and_body(tmp_path):
+    async def runner(job):
+        start_timings()
+        with span("llm"):
+            pass
+        return 400, json.dumps({"detail": "Forbidden statement: DROP"}).encode()
+
+    async def run():
+        queue = make_queue(tmp_path)
+        job = queue.submit("drop it", False, 0, None)
+        queue.start(runner)
+        await wait_finished(queue, job.id)
+        await queue.stop()
+        return job.id
+
+    job_id = asyncio.run(run())
+    stored = JobStore(str(tmp_path)).load(job_id)
+    error = "Forbidden statement: DROP"
+    assert (stored.status, stored.status_code, stored.error) == ("failed", 400, error)
+    assert "llm" in stored.timings
+    assert json.loads(JobStore(str(tmp_path)).load_result(job_id))["detail"] == error
+
+def test_cancel_running_and_queued(tmp_path):
+    async def runner(job):
+        start_timings()
+        with span("llm"):
+            await asyncio.sleep(10)
+        return 200, b"{}"
+
+    async def run():
+        queue = make_queue(tmp_path)
+        running, queued = queue.submit("slow", False, 0, None), queue.submit("next", False, 0, None)
+        queue.start(runner)
+        await asyncio.sleep(0.05)
+        assert queue.get(running.id).stage == "llm"
+        queue.cancel(queued.id)
+        queue.cancel(running.id)
+        await wait_finished(queue, running.id, queued.id)
+        await queue.stop()
+        return queue.get(running.id), queue.get(queued.id)
+
+    running, queued = asyncio.run(run())
+    assert running.status == queued.status == "cancelled"
+    assert running.error == "Cancelled while running"
+    assert queued.error == "Cancelled before it started"
+
+def test_full_queue_and_expiry(tmp_path):
+    queue = make_queue(tmp_path, max_queued=1, ttl=0)
+    job = queue.submit("one", False, 0, None)
+    assert queue.submit("two", False, 0, None) is None
+    assert queue.store.purge_expired(job.created_at + 1) == 1
+    assert queue.store.load(job.id) is None
@@ -0,0 +1,25 @@
+from backend.services.llm import clean_sql, complete_statement
+
+def test_clean_sql_strips_fences_and_semicolon():
+    fenced = "```sql\nSELECT * FROM customers;\n```\nThis query..."
+    assert clean_sql(fenced) == "SELECT * FROM customers"
+    assert clean_sql("Here you go:\n```\nSELECT 1\n```") == "SELECT 1"
+    assert clean_sql("  SELECT * FROM orders;  ") == "SELECT * FROM orders"
+
+def test_statement_incomplete_while_streaming():
+    assert complete_statement("SELECT * FROM customers WHERE") is None
+    assert complete_statement("```sql\nSELECT * FROM customers") is None
+
+def test_statement_complete_on_semicolon():
+    text = "SELECT * FROM customers;\n\nThis query returns all customers"
+    assert complete_statement(text) == "SELECT * FROM customers"
+
+def test_semicolon_inside_literal_or_parens_ignored():
+    assert complete_statement("SELECT * FROM products WHERE product_name = 'a;b'") is None
+    assert complete_statement("SELECT (SELECT 1;") is None
+    assert complete_statement("SELECT * FROM products WHERE product_name = 'a;b';") == \
+        "SELECT * FROM products WHERE product_name = 'a;b'"
+
+def test_statement_complete_on_closing_fence():
+    text = "```sql\nSELECT count(*) FROM orders\n```\nExplanation"
+    assert complete_statement(text) == "SELECT count(*) FROM orders"
@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.core.exceptions import LLMSaturatedError
+from backend.services import llm
+from backend.services.llm_client import LLMClient
+from tests.fake_ollama import create_app
+
+def make_client(app, urls=("http://a", "http://b"), **kwargs) -> LLMClient:
+    options = {"max_concurrency": 4, "max_queue": 8, "timeout": 5}
+    options.update(kwargs)
+    return LLMClient(list(urls), transport=httpx.ASGITransport(app=app), **options)
+
+def test_picks_least_outstanding_backend():
+    client = make_client(create_app())
+    client.backends[0].outstanding = 2
+    client.backends[1].outstanding = 1
+    assert client._pick().url == "http://b"
+
+def test_saturated_client_fails_fast():
+    async def run():
+        client = make_client(
+            create_app(token_delay=0.05), max_concurrency=1, max_queue=1, retry_after=7
+        )
+
+        async def generate():
+            async with client.acquire() as backend:
+                await client.client.post(f"{backend.url}/api/generate", json={})
+
+        running = asyncio.create_task(generate())
+        queued = asyncio.create_task(generate())
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMSaturatedError) as excinfo:
+            async with client.acquire():
+                pass
+        await asyncio.gather(running, queued)
+        await client.close()
+        return excinfo.value
+
+    assert asyncio.run(run()).retry_after == 7
+
+def test_failing_backend_is_ejected_and_readmitted():
+    async def run():
+        app = create_app(failing_hosts={"a"})
+        client = make_client(app, eject_after=2, eject_seconds=60)
+
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                async with client.acquire() as backend:
+                    client.backends[1].outstanding = 5
+                    response = await client.client.post(f"{backend.url}/api/generate", json={})
+                    response.raise_for_status()
+        client.backends[1].outstanding = 0
+
+        ejected = client.backends[0]
+        assert ejected.ejected_until > 0
+        async with client.acquire() as backend:
+            assert backend.url == "http://b"
+
+        ejected.ejected_until = 0.0
+        app.state.failing_hosts.clear()
+        client.backends[1].outstanding = 5
+        async with client.acquire() as backend:
+            assert backend.url == "http://a"
+            response = await client.client.post(f"{backend.url}/api/generate", json={})
+            response.raise_for_status()
+        await client.close()
+        return ejected
+
+    assert asyncio.run(run()).failures == 0
+
+def test_generate_sql_uses_shared_client(monkeypatch):
+    async def run():
+        app = create_app()
+        client = make_client(app, urls=("http://a",))
+        monkeypatch.setattr(llm, "llm_client", client)
+        generations = await asyncio.gather(
+            *(llm.generate_sql("completed orders", "orders(status)") for _ in range(3))
+        )
+        await client.close()
+        return app, generations
+
+    app, generations = asyncio.run(run())
+    assert all(g.sql == "SELECT * FROM orders WHERE status = 'completed'" for g in generations)
+    assert app.state.requests["a"] == 3
+
+def test_fake_ollama_answers_by_question(monkeypatch):
+    async def run():
+        app = create_app(
+            answers={"How many customers do we have?": "SELECT COUNT(*) FROM customers"}
+        )
+        client = make_client(app, urls=("http://a",))
+        monkeypatch.setattr(llm, "llm_client", client)
+        known = await llm.generate_sql("How many customers do we have?", "customers(customer_id)")
+        retried = await llm.generate_sql(
+            "How many customers do we have?", "customers", error_context="boom"
+        )
+        unknown = await llm.generate_sql("completed orders", "orders(status)")
+        await client.close()
+        return known.sql, retried.sql, unknown.sql
+
+    known, retried, unknown = asyncio.run(run())
+    assert known == retried == "SELECT COUNT(*) FROM customers"
+    assert unknown == "SELECT * FROM orders WHERE status = 'completed'"
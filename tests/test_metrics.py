@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from backend.core import metrics
+from backend.core.metrics import Histogram, render_prometheus, span, start_timings
+
+def test_nested_spans_report_self_time():
+    async def run():
+        timings = start_timings()
+        with span("execute"):
+            time.sleep(0.01)
+            with span("db"):
+                time.sleep(0.03)
+        timings.prefix = "retry_"
+        with span("llm"):
+            time.sleep(0.01)
+        return timings
+
+    timings = asyncio.run(run())
+    assert set(timings.stages) == {"execute", "db", "retry_llm"}
+    assert 25 <= timings.stages["db"] < 60
+    assert 8 <= timings.stages["execute"] < 25
+    assert timings.total("retry_") == timings.stages["retry_llm"]
+
+def test_spans_without_request_only_feed_histograms(monkeypatch):
+    monkeypatch.setattr(metrics, "stage_histograms", {})
+    with span("catalog_load"):
+        pass
+    assert metrics.stage_histograms["catalog_load"].count == 1
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.1", 2), ("1", 3), ("+Inf", 4)]
+
+def test_prometheus_text_format(monkeypatch):
+    monkeypatch.setattr(metrics, "counters", metrics.Counter({"queries_retried": 2}))
+    monkeypatch.setattr(metrics, "stage_histograms", {"llm": Histogram(buckets=(1,))})
+    metrics.stage_histograms["llm"].observe(0.5)
+
+    text = render_prometheus(
+        {"pool_saturation": {'pool="query"': 0.25}, "llm_queue_waiting": {"": 0}}
+    )
+    assert "guardsql_queries_retried_total 2" in text
+    assert 'guardsql_stage_seconds_bucket{stage="llm",le="1"} 1' in text
+    assert 'guardsql_stage_seconds_count{stage="llm"} 1' in text
+    assert 'guardsql_pool_saturation{pool="query"} 0.25' in text
+    assert "guardsql_llm_queue_waiting 0" in text
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.api.encoding import encode_response
+from backend.core.exceptions import ValidationError
+from backend.core.metrics import counters
+from backend.services import binder, offload as offload_module
+from backend.services.binder import bind
+from backend.services.offload import Offload, validate_offloaded
+from backend.services.serialization import loads
+from backend.services.validator import canonicalize, validate, validate_keyed
+
+SQL = "SELECT c.first_name FROM customers c JOIN orders o ON o.customer_id = c.customer_id"
+
+def test_keyed_validation_matches_inline():
+    inline = validate(SQL)
+    keyed = validate_keyed(SQL)
+    assert keyed.sql == inline.sql
+    assert keyed.tables == inline.tables
+    assert keyed.canonical == canonicalize(inline.tree)
+
+async def test_process_pool_round_trip():
+    offload = Offload("process", 1, 4)
+    offload.start()
+    try:
+        validated = await offload.run(validate_keyed, SQL, 100)
+        assert validated.sql.endswith("LIMIT 100")
+        assert validated.tree.args["limit"] is not None
+        with pytest.raises(ValidationError):
+            await offload.run(validate_keyed, "DELETE FROM customers", 100)
+    finally:
+        offload.close()
+
+@pytest.mark.parametrize("mode", ["off", "thread"])
+async def test_binding_reuses_the_validated_tree(monkeypatch, mode, make_catalog):
+    pool = Offload(mode, 1, 4)
+    pool.start()
+    monkeypatch.setattr(offload_module, "offload", pool)
+    try:
+        validated = await validate_offloaded(SQL)
+    finally:
+        pool.close()
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("the SQL was parsed a second time")
+
+    monkeypatch.setattr(binder, "parse_one", no_parse)
+    bind(validated.sql, make_catalog(0), validated.tree)
+    assert validated.canonical == canonicalize(validate(SQL).tree)
+
+async def test_full_pool_runs_inline():
+    offload = Offload("thread", 1, 0)
+    offload.start()
+    before = counters["offload_inline"]
+    try:
+        assert await offload.run(sum, [1, 2]) == 3
+    finally:
+        offload.close()
+    assert counters["offload_inline"] == before + 1
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        Offload("gpu", 1, 1).start()
+
+def test_encode_response_sets_serialize_timing():
+    result = {
+        "sql": "SELECT 1", "rows": [(1, "a")], "columns": ["id", "name"], "row_count": 1,
+        "execution_time_ms": 3, "timings": {"db": 1.0}
+    }
+    body, elapsed = encode_response(dict(result, timings={"db": 1.0}), columnar=False)
+    payload = loads(body)
+    assert payload["results"] == [{"id": 1, "name": "a"}]
+    assert "serialize" in payload["timings"] and elapsed >= 0
+
+    body, _ = encode_response(result, columnar=True)
+    assert loads(body)["data"]["values"] == [[1], ["a"]]
+
+async def test_process_mode_serializes_on_threads():
+    offload = Offload("process", 1, 4)
+    offload.start()
+    try:
+        assert isinstance(offload.threads, ThreadPoolExecutor)
+        result = {"sql": "SELECT 1", "rows": [(1, "a")], "columns": ["id", "name"], "row_count": 1,
+                  "execution_time_ms": 3}
+        body, _ = await offload.run_in_thread(encode_response, result, True)
+        assert loads(body)["data"]["values"] == [[1], ["a"]]
+    finally:
+        offload.close()
+    assert offload.threads is None and offload.executor is None
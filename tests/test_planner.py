@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.core.exceptions import PlanRejectedError
+from backend.services import planner
+from backend.services.planner import PlanCache, PlanEstimate, parse_plan
+
+CARTESIAN_PLAN = [{
+    "Plan": {
+        "Node Type": "Limit", "Total Cost": 2500000.5, "Plan Rows": 100,
+        "Plans": [{
+            "Node Type": "Sort", "Total Cost": 2500000.0, "Plan Rows": 22500000,
+            "Plans": [{
+                "Node Type": "Nested Loop", "Total Cost": 300000.0, "Plan Rows": 22500000,
+                "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "orders",
+                     "Total Cost": 12.5, "Plan Rows": 4500},
+                    {"Node Type": "Seq Scan", "Relation Name": "customers",
+                     "Total Cost": 11.0, "Plan Rows": 5000}
+                ]
+            }]
+        }]
+    }
+}]
+
+def test_parse_plan_extracts_cost_rows_and_nodes():
+    plan = parse_plan(CARTESIAN_PLAN)
+    assert plan.total_cost == 2500000.5
+    assert plan.rows == 100
+    assert plan.max_rows == 22500000
+    assert plan.node_types == ["Limit", "Sort", "Nested Loop", "Seq Scan", "Seq Scan"]
+
+LIMITED_SCAN_PLAN = [{
+    "Plan": {
+        "Node Type": "Limit", "Total Cost": 1.9, "Plan Rows": 100,
+        "Plans": [{
+            "Node Type": "Seq Scan", "Parent Relationship": "Outer", "Relation Name": "orders",
+            "Total Cost": 240000.0, "Plan Rows": 12000000
+        }]
+    }
+}]
+
+def test_rows_below_limit_only_count_through_blocking_nodes(monkeypatch):
+    monkeypatch.setattr(planner.settings, "plan_max_cost", 1000000)
+    monkeypatch.setattr(planner.settings, "plan_max_rows", 10000000)
+    plan = parse_plan(LIMITED_SCAN_PLAN)
+    assert (plan.rows, plan.max_rows) == (100, 100)
+    assert planner.over_threshold(plan) is None
+
+    # A Sort under the Limit still reads every row of the join below it
+    assert parse_plan(CARTESIAN_PLAN).max_rows == 22500000
+
+def test_thresholds(monkeypatch):
+    monkeypatch.setattr(planner.settings, "plan_max_cost", 1000000)
+    monkeypatch.setattr(planner.settings, "plan_max_rows", 10000000)
+    assert "cost" in planner.over_threshold(parse_plan(CARTESIAN_PLAN))
+    assert planner.over_threshold(PlanEstimate(50.0, 10, 10, ["Seq Scan"])) is None
+
+def test_plan_cache_expires_and_evicts():
+    cache = PlanCache(max_entries=2, ttl=60)
+    cheap = PlanEstimate(1.0, 1, 1, ["Result"])
+    for key in ("a", "b", "c"):
+        cache.put(key, cheap)
+    assert cache.get("a") is None
+    assert cache.get("c") is cheap
+
+    cache.entries["c"] = (cheap, time.time() - 1)
+    assert cache.get("c") is None
+
+def test_expensive_plan_rejected_with_reason(monkeypatch):
+    explained = []
+
+    async def fake_explain(sql):
+        explained.append(sql)
+        return parse_plan(CARTESIAN_PLAN)
+
+    monkeypatch.setattr(planner, "explain", fake_explain)
+    monkeypatch.setattr(planner, "plan_cache", PlanCache(16, 60))
+    monkeypatch.setattr(planner.settings, "plan_mode", "reject")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(PlanRejectedError, match="Nested Loop"):
+                async with planner.admission("SELECT * FROM orders, customers", "key"):
+                    pass
+
+    asyncio.run(run())
+    assert len(explained) == 1
@@ -0,0 +1,245 @@
+import asyncio
+
+import pytest
+
+from backend.core.exceptions import ExecutionError, LLMError, QueryTimeoutError
+from backend.db.catalog import Column, SchemaCatalog, Table
+from backend.services import query_service, repair
+from backend.services.llm import Generation
+from backend.services.planner import PlanCache, PlanEstimate
+from backend.services.repair import classify, fix_identifiers
+from backend.services.sql_memo import SQLMemo
+from backend.services.validator import validate
+
+def db_error(message: str, sqlstate: str) -> ExecutionError:
+    return ExecutionError(
+        "(sqlalchemy.dialects.postgresql.asyncpg.ProgrammingError) "
+        "<class 'asyncpg.exceptions.Error'>: "
+        f"{message}\n[SQL: SELECT 1]\n(Background on this error at: https://sqlalche.me/e/20/f405)",
+        sqlstate
+    )
+
+def test_classify_postgres_errors():
+    failure = classify(db_error('column "totl_amount" does not exist', "42703"))
+    assert (failure.kind, failure.identifier) == ("undefined_column", "totl_amount")
+    assert failure.message == 'column "totl_amount" does not exist'
+
+    assert classify(db_error("column o.totl does not exist", "42703")).identifier == "o.totl"
+    assert classify(db_error('relation "order" does not exist', "42P01")).identifier == "order"
+    kinds = [
+        classify(db_error('column reference "customer_id" is ambiguous', "42702")).kind,
+        classify(db_error("operator does not exist: integer ~~ unknown", "42883")).kind,
+        classify(db_error("function datediff(unknown, date) does not exist", "42883")).kind,
+        classify(QueryTimeoutError("Query exceeded the statement timeout", "57014")).kind,
+    ]
+    assert kinds == ["ambiguous_column", "type_mismatch", "undefined_function", "timeout"]
+    assert classify(ExecutionError("connection reset")).kind == "other"
+
+def test_classify_uses_postgres_hint():
+    failure = classify(db_error(
+        'column o.total does not exist\n'
+        'HINT:  Perhaps you meant to reference the column "o.totals".', "42703"
+    ))
+    assert failure.hint == "o.totals"
+    assert "Perhaps you meant" in failure.error_context()
+
+def test_fix_unknown_column(make_catalog):
+    catalog = make_catalog(0)
+    failure = classify(db_error("column o.totl_amount does not exist", "42703"))
+    fixed = fix_identifiers("SELECT SUM(o.totl_amount) FROM orders o LIMIT 100", failure, catalog)
+    assert fixed == "SELECT SUM(o.total_amount) FROM orders AS o LIMIT 100"
+
+    failure = classify(db_error('column "zzz" does not exist', "42703"))
+    assert fix_identifiers("SELECT zzz FROM orders", failure, catalog) is None
+
+def test_fix_unknown_table_and_its_qualifiers(make_catalog):
+    failure = classify(db_error('relation "customer" does not exist', "42P01"))
+    fixed = fix_identifiers("SELECT customer.state FROM customer", failure, make_catalog(0))
+    assert fixed == "SELECT customers.state FROM customers"
+
+def test_fix_ambiguous_column(make_catalog):
+    failure = classify(db_error('column reference "customer_id" is ambiguous', "42702"))
+    fixed = fix_identifiers(
+        "SELECT customer_id, c.state FROM orders o "
+        "JOIN customers c ON o.customer_id = c.customer_id",
+        failure, make_catalog(0)
+    )
+    assert fixed.startswith("SELECT o.customer_id, c.state")
+
+@pytest.mark.parametrize("sql, message", [
+    ("SELECT customer_name FROM customers", 'column "customer_name" does not exist'),
+    ("SELECT c.customer_name FROM customers c", "column c.customer_name does not exist"),
+    ("SELECT SUM(order_total) FROM orders", 'column "order_total" does not exist'),
+])
+def test_unclear_column_matches_are_left_to_the_llm(sql, message):
+    catalog = SchemaCatalog({
+        "customers": Table(
+            "customers", [Column("customer_id", "integer"), Column("first_name", "text")]
+        ),
+        "orders": Table("orders", [Column("order_id", "integer"), Column("order_date", "date")]),
+    }, checksum="test")
+    failure = classify(db_error(message, "42703"))
+    assert fix_identifiers(sql, failure, catalog) is None
+
+def test_fix_respects_how_the_column_is_used():
+    catalog = SchemaCatalog({
+        "orders": Table("orders", [Column("order_id", "integer"), Column("status", "text")])
+    }, checksum="test")
+    failure = classify(db_error('column "statu" does not exist', "42703"))
+    assert fix_identifiers("SELECT SUM(statu) FROM orders", failure, catalog) is None
+    assert fix_identifiers("SELECT * FROM orders WHERE statu = 'open'", failure, catalog) == (
+        "SELECT * FROM orders WHERE status = 'open'"
+    )
+
+@pytest.mark.parametrize("sql", [
+    "SELECT customer_id, COUNT(o.order_id) FROM orders o RIGHT JOIN customers c "
+    "ON o.customer_id = c.customer_id GROUP BY customer_id",
+    "SELECT customer_id FROM customers c LEFT JOIN orders o ON o.customer_id = c.customer_id",
+    "SELECT customer_id FROM customers c, orders o",
+])
+def test_ambiguous_column_outside_inner_join_keys_not_fixed(sql, make_catalog):
+    failure = classify(db_error('column reference "customer_id" is ambiguous', "42702"))
+    assert fix_identifiers(sql, failure, make_catalog(0)) is None
+
+def test_deterministic_repair_is_not_memoized(monkeypatch, make_catalog):
+    catalog = make_catalog(0)
+    memo = SQLMemo(max_entries=10, threshold=0.9)
+    memo.reset(catalog.fingerprint)
+    executed, statuses = [], []
+
+    async def fake_generate_shared(*args, **kwargs):
+        return Generation(sql="SELECT SUM(totl_amount) FROM orders")
+
+    async def fake_execute(query, fingerprint):
+        executed.append(query.sql)
+        return [(1,)], ["sum"], False
+
+    async def fake_repair(question, schema, catalog, sql, failure, on_partial=None):
+        return repair.Repair(validate("SELECT SUM(total_amount) FROM orders"), "fix_identifiers")
+
+    async def fake_log(question, sql, status, *args, **kwargs):
+        statuses.append(status)
+
+    monkeypatch.setattr(query_service, "generate_shared", fake_generate_shared)
+    monkeypatch.setattr(query_service, "execute_cached", fake_execute)
+    monkeypatch.setattr(query_service, "repair_query", fake_repair)
+    monkeypatch.setattr(query_service, "log_query", fake_log)
+    monkeypatch.setattr(query_service, "sql_memo", memo)
+    monkeypatch.setattr(query_service.settings, "sql_memo_enabled", False)
+
+    result = asyncio.run(query_service.process_query("total revenue", catalog=catalog))
+    assert result["sql"] == "SELECT SUM(total_amount) FROM orders LIMIT 100"
+    assert executed == [result["sql"]]
+    assert memo.lookup("total revenue", catalog.fingerprint) is None
+    # The memo reloads success and success_retry rows from the log; this one must not come back
+    assert statuses == ["success_fixed"]
+
+def test_repair_prefers_identifier_fix(monkeypatch, make_catalog):
+    explained = []
+
+    async def fake_explain(sql):
+        explained.append(sql)
+        return PlanEstimate(10.0, 1, 1, ["Seq Scan"])
+
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("the LLM should not be called")
+
+    monkeypatch.setattr(repair, "explain", fake_explain)
+    monkeypatch.setattr(repair, "plan_cache", PlanCache(16, 60))
+    monkeypatch.setattr(repair, "generate_shared", no_llm)
+    failure = classify(db_error('column "totl_amount" does not exist', "42703"))
+
+    result = asyncio.run(repair.repair_query(
+        "total revenue", "", make_catalog(0), "SELECT SUM(totl_amount) FROM orders LIMIT 100",
+        failure
+    ))
+    assert result.method == "fix_identifiers"
+    assert result.query.sql == "SELECT SUM(total_amount) FROM orders LIMIT 100"
+    assert explained == [result.query.sql]
+    assert len(repair.plan_cache.entries) == 1
+
+def test_identifier_fixes_repeat_while_binding_fails(monkeypatch, make_catalog):
+    async def fake_explain(sql):
+        return PlanEstimate(10.0, 1, 1, ["Seq Scan"])
+
+    monkeypatch.setattr(repair, "explain", fake_explain)
+    monkeypatch.setattr(repair, "plan_cache", PlanCache(16, 60))
+    failure = classify(db_error('relation "ordrs" does not exist', "42P01"))
+
+    result = asyncio.run(repair.repair_query(
+        "total revenue", "", make_catalog(0),
+        "SELECT SUM(o.totl_amount) FROM ordrs AS o LIMIT 100", failure
+    ))
+    assert result.query.sql == "SELECT SUM(o.total_amount) FROM orders AS o LIMIT 100"
+
+def test_candidates_race_to_first_valid(monkeypatch, make_catalog):
+    monkeypatch.setattr(repair.settings, "repair_candidates", 3)
+
+    async def fake_generate_shared(question, schema, fingerprint, error_context, on_partial=None):
+        await asyncio.sleep(0.01)
+        return Generation(sql="SELECT bogus FROM orders")
+
+    async def fake_generate_sql(question, schema, error_context, temperature):
+        await asyncio.sleep(0.05)
+        return Generation(sql="SELECT total_amount FROM orders")
+
+    async def fake_explain(sql):
+        if "bogus" in sql:
+            raise ExecutionError('column "bogus" does not exist', "42703")
+        return PlanEstimate(10.0, 1, 1, ["Seq Scan"])
+
+    monkeypatch.setattr(repair, "generate_shared", fake_generate_shared)
+    monkeypatch.setattr(repair, "generate_sql", fake_generate_sql)
+    monkeypatch.setattr(repair, "explain", fake_explain)
+    monkeypatch.setattr(repair, "plan_cache", PlanCache(16, 60))
+    failure = classify(db_error("operator does not exist: integer ~~ unknown", "42883"))
+
+    result = asyncio.run(repair.repair_query("revenue", "", make_catalog(0), "SELECT 1", failure))
+    assert result.method == "llm"
+    assert result.query.sql == "SELECT total_amount FROM orders LIMIT 100"
+
+    async def failing_generate_sql(*args, **kwargs):
+        raise LLMError("busy")
+
+    monkeypatch.setattr(repair, "generate_sql", failing_generate_sql)
+    with pytest.raises(ExecutionError, match="bogus"):
+        asyncio.run(repair.repair_query("revenue", "", make_catalog(0), "SELECT 1", failure))
+
+def test_race_skips_candidates_over_the_plan_limits(monkeypatch, make_catalog):
+    monkeypatch.setattr(repair.settings, "repair_candidates", 2)
+    monkeypatch.setattr(repair.settings, "plan_check_enabled", True)
+    monkeypatch.setattr(repair.settings, "plan_mode", "reject")
+    monkeypatch.setattr(repair.settings, "plan_max_cost", 1000)
+
+    async def fake_generate_shared(question, schema, fingerprint, error_context, on_partial=None):
+        return Generation(
+            sql="SELECT o.order_id FROM orders o, customers c ORDER BY o.total_amount"
+        )
+
+    async def fake_generate_sql(question, schema, error_context, temperature):
+        await asyncio.sleep(0.02)
+        return Generation(sql="SELECT order_id FROM orders")
+
+    async def fake_explain(sql):
+        if "customers" in sql:
+            return PlanEstimate(5000000.0, 100, 22500000, ["Limit", "Sort", "Nested Loop"])
+        return PlanEstimate(10.0, 100, 100, ["Limit", "Seq Scan"])
+
+    monkeypatch.setattr(repair, "generate_shared", fake_generate_shared)
+    monkeypatch.setattr(repair, "generate_sql", fake_generate_sql)
+    monkeypatch.setattr(repair, "explain", fake_explain)
+    monkeypatch.setattr(repair, "plan_cache", PlanCache(16, 60))
+    failure = classify(QueryTimeoutError("Query exceeded the statement timeout", "57014"))
+
+    result = asyncio.run(repair.repair_query("orders", "", make_catalog(0), "SELECT 1", failure))
+    assert result.query.sql == "SELECT order_id FROM orders LIMIT 100"
+
+def test_repair_rates_by_kind():
+    failure = repair.Failure("ambiguous_column", "ambiguous")
+    with repair.tracked(failure):
+        pass
+    with pytest.raises(ExecutionError):
+        with repair.tracked(failure):
+            raise ExecutionError("still broken")
+    rates = repair.repair_rates()["ambiguous_column"]
+    assert rates["attempts"] >= 2 and 0 < rates["success_rate"] < 1
@@ -0,0 +1,78 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from backend.services.result_cache import canonicalize, ResultCache, SQLiteStore
+
+def test_canonical_form_ignores_formatting_and_aliases():
+    variants = [
+        "SELECT c.name FROM customers c WHERE c.state = 'TX' LIMIT 100",
+        "select   X.NAME\nfrom Customers AS x where x.state = 'TX' limit 100",
+    ]
+    canonical = {canonicalize(sql)[0] for sql in variants}
+    assert len(canonical) == 1
+
+def test_canonical_form_keeps_literals():
+    first, _ = canonicalize("SELECT * FROM customers WHERE state = 'TX'")
+    second, _ = canonicalize("SELECT * FROM customers WHERE state = 'tx'")
+    assert first != second
+
+def test_canonical_tables_exclude_ctes():
+    _, tables = canonicalize(
+        "WITH big AS (SELECT * FROM orders WHERE total_amount > 500) "
+        "SELECT * FROM big JOIN customers c ON c.customer_id = big.customer_id"
+    )
+    assert tables == {"orders", "customers"}
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", frozenset({"t"}), [], [])
+    cache.put("b", frozenset({"t"}), [], [])
+    cache.get("a")
+    cache.put("c", frozenset({"t"}), [], [])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+def test_ttl_expiry():
+    cache = ResultCache(max_entries=10, ttl=60)
+    cache.put("a", frozenset({"t"}), [(1,)], ["x"])
+    cache.entries["a"].expires_at = time.time() - 1
+    assert cache.get("a") is None
+    assert "t" not in cache.table_keys
+
+def test_invalidate_by_table():
+    cache = ResultCache(max_entries=10, ttl=60)
+    cache.put("a", frozenset({"orders", "customers"}), [], [])
+    cache.put("b", frozenset({"products"}), [], [])
+    assert cache.invalidate_tables({"customers"}) == 1
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+def test_sqlite_store_shared_between_caches(tmp_path):
+    path = str(tmp_path / "results.db")
+    writer = ResultCache(max_entries=10, ttl=60, store=SQLiteStore(path, 100))
+    reader = ResultCache(max_entries=10, ttl=60, store=SQLiteStore(path, 100))
+
+    rows = [(1, Decimal("29.99"), datetime(2024, 1, 15, 10, 30)), (2, None, None)]
+    writer.put("a", frozenset({"orders"}), rows, ["id", "total", "created_at"])
+    assert reader.get("a").rows == rows
+
+    writer.invalidate_tables({"orders"})
+    reader.entries.clear()
+    assert reader.get("a") is None
+
+def test_invalidation_drops_other_caches_memory_copies(tmp_path):
+    path = str(tmp_path / "results.db")
+    worker_a = ResultCache(max_entries=10, ttl=60, store=SQLiteStore(path, 100))
+    worker_b = ResultCache(max_entries=10, ttl=60, store=SQLiteStore(path, 100))
+
+    worker_a.put("a", frozenset({"orders"}), [(1,)], ["id"])
+    worker_a.put("b", frozenset({"customers"}), [(2,)], ["id"])
+    assert worker_b.get("a") is not None and worker_b.get("b") is not None
+
+    worker_a.invalidate_tables({"orders"})
+    assert worker_b.get("a") is None
+    assert worker_b.get("b").rows == [(2,)]
+
+    worker_a.clear()
+    assert worker_b.get("b") is None
@@ -0,0 +1,31 @@
+from backend.services.schema_retriever import tokenize, render_table, retrieve_schema
+
+def test_tokenize_identifiers():
+    assert tokenize("order_items") == ["order", "item"]
+    assert tokenize("shelfCode") == ["shelf", "code"]
+    assert tokenize("How many categories?") == ["category"]
+
+def test_render_table_compact(make_catalog):
+    catalog = make_catalog(0)
+    line = render_table(catalog.tables["orders"])
+    assert line == (
+        "orders(order_id integer PK, customer_id integer -> customers.customer_id, "
+        "total_amount numeric(10,2))"
+    )
+
+def test_prunes_to_relevant_tables(make_catalog):
+    context = retrieve_schema("How many products are in each category?", make_catalog(), top_k=2)
+    assert context.tables[0] == "products"
+    assert "warehouse_bin_0" not in context.tables
+    assert context.total_tables == 24
+    assert context.pruning_ratio > 0.5
+
+def test_adds_fk_join_path(make_catalog):
+    context = retrieve_schema("customer state with product category", make_catalog(), top_k=2)
+    assert {"customers", "products"} <= set(context.tables)
+    assert {"orders", "order_items"} <= set(context.tables)
+
+def test_small_schema_not_pruned(make_catalog):
+    context = retrieve_schema("show customers", make_catalog(0), top_k=8)
+    assert len(context.tables) == 4
+    assert context.pruning_ratio == 0.0
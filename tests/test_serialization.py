@@ -0,0 +1,28 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from backend.services.serialization import to_columnar, from_columnar, dumps, loads
+
+COLUMNS = ["id", "price", "created_at", "shipped_on", "ref", "note"]
+ROWS = [
+    (1, Decimal("1299.99"), datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc), date(2024, 1, 16),
+     UUID("12345678-1234-5678-1234-567812345678"), None),
+    (2, None, datetime(2024, 1, 17, 9, 15, tzinfo=timezone.utc), None, None, None),
+]
+
+def test_columnar_layout():
+    data = to_columnar(ROWS, COLUMNS)
+    assert data["columns"] == COLUMNS
+    assert data["types"] == ["int", "decimal", "timestamptz", "date", "uuid", "text"]
+    assert data["values"][0] == [1, 2]
+    assert data["values"][1] == ["1299.99", None]
+
+def test_round_trip_preserves_types():
+    data = loads(dumps(to_columnar(ROWS, COLUMNS)))
+    assert from_columnar(data) == ROWS
+
+def test_empty_result():
+    data = to_columnar([], COLUMNS)
+    assert data["values"] == [[] for _ in COLUMNS]
+    assert from_columnar(data) == []
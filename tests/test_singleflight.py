@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from backend.core.metrics import counters
+from backend.services.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight = SingleFlight("test_shared")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ["row"]
+
+        results = await asyncio.gather(*(flight.do("q", work) for _ in range(10)))
+        return calls, results, flight
+
+    calls, results, flight = asyncio.run(run())
+    assert calls == 1
+    assert results == [["row"]] * 10
+    assert counters["test_shared_calls"] == 1
+    assert counters["test_shared_coalesced"] == 9
+    assert not flight.calls
+
+def test_distinct_keys_do_not_coalesce():
+    async def run():
+        flight = SingleFlight("test_distinct")
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2))
+        )
+
+    assert asyncio.run(run()) == [1, 2]
+
+def test_error_reaches_every_waiter():
+    async def run():
+        flight = SingleFlight("test_error")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        return await asyncio.gather(
+            *(flight.do("q", work) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) and str(r) == "boom" for r in results)
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def run():
+        flight = SingleFlight("test_cancel_one")
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flight.do("q", work))
+        second = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+def test_last_waiter_cancelling_cancels_the_call():
+    async def run():
+        flight = SingleFlight("test_cancel_all")
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flight
+
+    assert not asyncio.run(run()).calls
@@ -0,0 +1,60 @@
+import pytest
+
+from backend.services.sql_memo import SQLMemo, key_terms, normalize_question
+
+SQL = "SELECT * FROM customers WHERE state = 'TX' LIMIT 100"
+
+def make_memo(threshold: float = 0.9) -> SQLMemo:
+    memo = SQLMemo(max_entries=10, threshold=threshold)
+    memo.reset("fp1")
+    memo.remember("Show me all customers from Texas", SQL, "fp1")
+    return memo
+
+def test_normalize_question():
+    normalized = normalize_question("  Show me ALL customers from Texas? ")
+    assert normalized == "show me all customers from texas"
+    assert normalize_question("Products under $100.") == "products under $100"
+
+def test_exact_hit():
+    assert make_memo().lookup("show me all customers from TEXAS?", "fp1") == (SQL, "exact")
+
+def test_near_duplicate_hit():
+    sql, kind = make_memo().lookup("Show me all the customers from Texas", "fp1")
+    assert sql == SQL
+    assert kind == "similar"
+
+def test_different_literal_misses():
+    assert make_memo().lookup("Show me all customers from Ohio", "fp1") is None
+
+def test_schema_change_invalidates():
+    memo = make_memo()
+    assert memo.lookup("Show me all customers from Texas", "fp2") is None
+    memo.reset("fp2")
+    assert memo.lookup("Show me all customers from Texas", "fp2") is None
+
+def test_bounded_size():
+    memo = SQLMemo(max_entries=2, threshold=0.9)
+    memo.reset("fp")
+    for i in range(3):
+        memo.remember(f"question number {i}", f"SELECT {i}", "fp")
+    assert len(memo.entries) == 2
+    assert memo.lookup("question number 0", "fp") is None
+
+@pytest.mark.parametrize("remembered, asked", [
+    ("How many orders were placed in 2023?", "How many orders were placed in 2024?"),
+    ("How many orders were placed in 2023?", "How many orders were not placed in 2023?"),
+    ("Who are the top 5 customers by revenue?", "Who are the top 10 customers by revenue?"),
+    ("Who are the top five customers by revenue?", "Who are the top three customers by revenue?"),
+    ("List all customers who placed an order", "List all customers who placed an order in CA"),
+    ("List customers with status 'active'", "List customers with status 'inactive'"),
+    ("Which products have sold", "Which products haven't sold"),
+])
+def test_near_duplicate_with_different_key_terms_misses(remembered, asked):
+    memo = SQLMemo(max_entries=10, threshold=0.8)
+    memo.reset("fp")
+    memo.remember(remembered, SQL, "fp")
+    assert memo.lookup(asked, "fp") is None
+
+def test_key_terms():
+    terms = key_terms("Show me orders from Texas over $100 that weren't shipped")
+    assert terms == ("100", "not", "texas")
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.core.exceptions import PlanRejectedError
+from backend.services import planner, streaming
+from backend.services.llm import Generation
+from backend.services.planner import PlanCache, PlanEstimate
+from backend.services.streaming import NDJSONEncoder, CSVEncoder, ArrowEncoder, pa
+
+COLUMNS = ["id", "price", "created_at"]
+BATCH = [(1, Decimal("29.99"), datetime(2024, 1, 15, 10, 30)), (2, None, None)]
+
+def test_ndjson_encoder():
+    lines = NDJSONEncoder(COLUMNS).encode(BATCH).decode().splitlines()
+    assert json.loads(lines[0]) == {"id": 1, "price": 29.99, "created_at": "2024-01-15T10:30:00"}
+    assert json.loads(lines[1])["price"] is None
+
+def test_csv_encoder():
+    encoder = CSVEncoder(COLUMNS)
+    body = (encoder.header() + encoder.encode(BATCH)).decode().splitlines()
+    assert body == ["id,price,created_at", "1,29.99,2024-01-15 10:30:00", "2,,"]
+
+@pytest.mark.skipif(pa is None, reason="pyarrow not installed")
+def test_arrow_encoder_round_trip():
+    encoder = ArrowEncoder(COLUMNS)
+    payload = encoder.encode(BATCH) + encoder.encode(BATCH) + encoder.finish()
+    table = pa.ipc.open_stream(payload).read_all()
+    assert table.num_rows == 4
+    assert table.column("price").to_pylist()[0] == Decimal("29.99")
+
+@pytest.mark.skipif(pa is None, reason="pyarrow not installed")
+def test_arrow_encoder_empty_result():
+    encoder = ArrowEncoder(COLUMNS)
+    table = pa.ipc.open_stream(encoder.finish()).read_all()
+    assert table.num_rows == 0
+    assert table.schema.names == COLUMNS
+
+def test_stream_holds_its_planner_admission_until_done(monkeypatch, make_catalog):
+    async def fake_generate_sql(question, schema):
+        return Generation(sql="SELECT o.total_amount FROM orders o, customers c")
+
+    async def fake_explain(sql):
+        return PlanEstimate(5_000_000.0, 100, 22_500_000, ["Nested Loop"])
+
+    async def fake_stream_query(sql, batch_size):
+        yield ["total_amount"]
+        yield [(1,), (2,)]
+
+    async def fake_log_query(*args, **kwargs):
+        pass
+
+    catalog = make_catalog(0)
+
+    async def fake_get_catalog():
+        return catalog
+
+    monkeypatch.setattr(streaming, "generate_sql", fake_generate_sql)
+    monkeypatch.setattr(streaming, "get_catalog", fake_get_catalog)
+    monkeypatch.setattr(streaming, "stream_query", fake_stream_query)
+    monkeypatch.setattr(streaming, "log_query", fake_log_query)
+    monkeypatch.setattr(planner, "explain", fake_explain)
+    monkeypatch.setattr(planner, "plan_cache", PlanCache(16, 60))
+    monkeypatch.setattr(planner.settings, "plan_check_enabled", True)
+    monkeypatch.setattr(planner.settings, "plan_mode", "queue")
+
+    async def run():
+        monkeypatch.setattr(planner, "expensive_lane", asyncio.Semaphore(1))
+        stream = await streaming.open_query_stream("revenue", "ndjson")
+        assert planner.expensive_lane.locked()
+        body = [chunk async for chunk in stream.body]
+        assert not planner.expensive_lane.locked()
+        assert b"".join(body).count(b"\n") == 2
+
+        monkeypatch.setattr(planner.settings, "plan_mode", "reject")
+        with pytest.raises(PlanRejectedError):
+            await streaming.open_query_stream("revenue", "ndjson")
+
+    asyncio.run(run())
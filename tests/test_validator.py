@@ -1,6 +1,6 @@
 import pytest
 
-from backend.services.validator import validate_sql
+from backend.services.validator import validate, validate_sql
 from backend.core.exceptions import ValidationError
 
 def test_valid_select():
@@ -52,3 +52,74 @@ def test_non_select():
     sql = "SHOW TABLES"
     with pytest.raises(ValidationError, match="Only SELECT"):
         validate_sql(sql)
+
+def test_literal_mentioning_system_prefix_allowed():
+    result = validate_sql("SELECT * FROM products WHERE product_name = 'pg_dump guide'")
+    assert "'pg_dump guide'" in result
+
+def test_limit_injected_despite_limit_like_column():
+    result = validate_sql("SELECT limit_amount FROM customers")
+    assert result.endswith("LIMIT 100")
+
+def test_semicolon_inside_literal_is_single_statement():
+    result = validate_sql("SELECT * FROM products WHERE product_name = 'a;b';")
+    assert "'a;b'" in result
+
+def test_system_schema_and_functions_rejected():
+    with pytest.raises(ValidationError, match="system tables"):
+        validate_sql("SELECT * FROM information_schema.tables")
+    with pytest.raises(ValidationError, match="Function not allowed"):
+        validate_sql("SELECT pg_sleep(10)")
+
+def test_data_modifying_cte_rejected():
+    sql = "WITH gone AS (DELETE FROM orders RETURNING *) SELECT * FROM gone"
+    with pytest.raises(ValidationError, match="Forbidden statement: DELETE"):
+        validate_sql(sql)
+
+def test_validate_returns_tree_and_tables():
+    query = validate(
+        "WITH big AS (SELECT * FROM orders WHERE total_amount > 100) "
+        "SELECT c.email FROM customers c JOIN big ON big.customer_id = c.customer_id"
+    )
+    assert query.tables == frozenset({"orders", "customers"})
+    assert query.tree.args["limit"] is not None
+    assert query.sql.endswith("LIMIT 100")
+
+def test_trailing_comment_cannot_swallow_limit():
+    result = validate_sql("SELECT * FROM customers -- newest first")
+    assert "LIMIT 100" in result
+    assert validate(result).tree.args["limit"] is not None
+
+@pytest.mark.parametrize("sql", [
+    "SELECT query_to_xml('SELECT * FROM information_schema.tables', true, false, '')",
+    "SELECT * FROM query_to_xml('select usename, passwd from pg_user', true, false, '') x",
+    "SELECT query_to_xml_and_xmlschema('SELECT 1', true, false, '')",
+    "SELECT table_to_xml('customers', true, false, '')",
+    "SELECT cursor_to_xml('c', 10, true, false, '')",
+    "SELECT schema_to_xml('public', true, false, '')",
+    "SELECT database_to_xml(true, false, '')",
+    "SELECT lo_unlink(16384)",
+    "SELECT lo_get(16384)",
+    "SELECT loread(0, 10)",
+    "SELECT dblink_connect('host=db')",
+    "SELECT * FROM ts_stat('SELECT to_tsvector(rolpassword) FROM pg_authid')",
+    "SELECT ts_rewrite(to_tsquery('a'), "
+    "'SELECT rolname::tsquery, rolname::tsquery FROM pg_authid')",
+])
+def test_sql_executing_and_large_object_functions_rejected(sql):
+    with pytest.raises(ValidationError, match="Function not allowed"):
+        validate_sql(sql)
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 'pg_catalog.pg_settings'::regclass",
+    "SELECT 'pg_settings'::regclass",
+    "SELECT CAST('information_schema.tables' AS regclass)",
+    "SELECT 'pg_catalog.now'::regproc",
+    "SELECT ('pg_' || 'user')::regclass",
+])
+def test_reg_casts_naming_system_objects_rejected(sql):
+    with pytest.raises(ValidationError, match="not allowed on system objects"):
+        validate_sql(sql)
+
+def test_reg_cast_of_user_table_allowed():
+    assert validate_sql("SELECT 'orders'::regclass").endswith("LIMIT 100")